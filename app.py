@@ -4,19 +4,39 @@ Application web personnelle pour la gestion et l'optimisation du roster Star War
 Usage local uniquement - Aucune interaction directe avec le jeu
 """
 
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, Response, render_template, request, jsonify
 import sqlite3
-import requests
+import csv
+import hashlib
 import json
-import pandas as pd
-from datetime import datetime
+import multiprocessing
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 import io
+import itertools
 import os
-from collections import defaultdict
+import sys
+import zlib
+import queue
+import random
+import threading
+import time
+import uuid
+from array import array
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from functools import lru_cache
 from dotenv import load_dotenv
-from bs4 import BeautifulSoup
 import re
-import cloudscraper
+try:
+    from lxml import etree
+except ImportError:  # parsing en flux indisponible, repli sur BeautifulSoup
+    etree = None
+# BeautifulSoup, cloudscraper et requests sont importés à la première
+# utilisation (parsing, scraping), pyarrow à celle d'un export Arrow/Parquet :
+# voir bench_startup.py
 
 # Charge les variables d'environnement
 load_dotenv()
@@ -24,119 +44,800 @@ load_dotenv()
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'your-secret-key-change-this')
 
+# Base de données
+DATABASE_PATH = os.environ.get('SWGOH_DB_PATH', 'swgoh_data.db')
+
+# Connexions SQLite réutilisées (pool) et PRAGMAs appliqués à leur ouverture
+SQLITE_POOL_SIZE = int(os.environ.get('SQLITE_POOL_SIZE', 8))
+SQLITE_PRAGMAS = {
+    'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+    'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE', -32000)),  # négatif = Kio
+    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)),  # ms
+    'temp_store': os.environ.get('SQLITE_TEMP_STORE', 'MEMORY'),
+}
+
 # Configuration API
 SWGOH_HELP_API_URL = "https://api.swgoh.help"
-SWGOH_GG_API_URL = "https://swgoh.gg/api"
+# URL de base swgoh.gg (surchargeable pour pointer sur fixture_server.py en rejeu)
+SWGOH_GG_BASE_URL = os.environ.get('SWGOH_GG_BASE_URL', 'https://swgoh.gg').rstrip('/')
+SWGOH_GG_API_URL = f"{SWGOH_GG_BASE_URL}/api"
+# Endpoint JSON /api/player/<code>/ en priorité, scraping HTML en repli
+PLAYER_JSON_ENABLED = os.environ.get('PLAYER_JSON_ENABLED', '1') == '1'
 API_TOKEN = os.environ.get('SWGOH_API_TOKEN', '')
 
+# Configuration du scraper
+SCRAPER_BROWSER = {
+    'browser': 'chrome',
+    'platform': 'windows',
+    'mobile': False
+}
+SCRAPER_POOL_SIZE = int(os.environ.get('SCRAPER_POOL_SIZE', 4))
+SCRAPER_IDLE_TIMEOUT = float(os.environ.get('SCRAPER_IDLE_TIMEOUT', 300))
+FETCH_DEADLINE = float(os.environ.get('FETCH_DEADLINE', 20))
+
+# Limitation de débit et reprises vers swgoh.gg
+SCRAPE_RATE = float(os.environ.get('SCRAPE_RATE', 2.0))  # requêtes / seconde
+SCRAPE_BURST = int(os.environ.get('SCRAPE_BURST', 4))
+SCRAPE_MAX_RETRIES = int(os.environ.get('SCRAPE_MAX_RETRIES', 3))
+SCRAPE_BACKOFF_BASE = float(os.environ.get('SCRAPE_BACKOFF_BASE', 1.0))
+SCRAPE_BACKOFF_MAX = float(os.environ.get('SCRAPE_BACKOFF_MAX', 30.0))
+CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get('CIRCUIT_FAILURE_THRESHOLD', 5))
+CIRCUIT_RESET_TIMEOUT = float(os.environ.get('CIRCUIT_RESET_TIMEOUT', 60))
+
+# Cache HTTP sur disque des pages swgoh.gg
+HTTP_CACHE_ENABLED = os.environ.get('HTTP_CACHE_ENABLED', '1') == '1'
+HTTP_CACHE_PATH = os.environ.get('HTTP_CACHE_PATH', 'http_cache.db')
+HTTP_CACHE_TTL = float(os.environ.get('HTTP_CACHE_TTL', 600))
+HTTP_CACHE_MAX_BYTES = int(os.environ.get('HTTP_CACHE_MAX_BYTES', 50 * 1024 * 1024))
+
+# Parseur HTML (lxml par défaut, repli automatique sur html.parser)
+HTML_PARSER = os.environ.get('HTML_PARSER', 'lxml')
+ROSTER_CHUNK_SIZE = int(os.environ.get('ROSTER_CHUNK_SIZE', 64 * 1024))
+SAVE_BATCH_SIZE = int(os.environ.get('SAVE_BATCH_SIZE', 50))
+
+def _available_cores():
+    """Cœurs utilisables par ce processus (affinité CPU comprise)"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+# Parsing des pages roster dans un pool de processus (0 = parsing dans le thread appelant)
+PARSE_WORKERS = int(os.environ.get('PARSE_WORKERS', _available_cores()))
+PARSE_POOL_MIN_BYTES = int(os.environ.get('PARSE_POOL_MIN_BYTES', 50 * 1024))
+
+# Version des parseurs : invalide les résultats parsés mis en cache
+PARSER_VERSION = 4
+
+# Catalogue local des unités (portrait -> base_id -> nom), voir download_unit_catalogue()
+UNIT_CATALOGUE_PATH = os.environ.get('UNIT_CATALOGUE_PATH', 'unit_catalogue.json')
+
+# Historique des rosters : snapshots bruts gardés HISTORY_RAW_DAYS jours, puis un par
+# jour jusqu'à HISTORY_DAILY_DAYS, puis un par semaine jusqu'à HISTORY_RETENTION_DAYS
+HISTORY_ENABLED = os.environ.get('HISTORY_ENABLED', '1') == '1'
+HISTORY_RAW_DAYS = float(os.environ.get('HISTORY_RAW_DAYS', 7))
+HISTORY_DAILY_DAYS = float(os.environ.get('HISTORY_DAILY_DAYS', 90))
+HISTORY_RETENTION_DAYS = float(os.environ.get('HISTORY_RETENTION_DAYS', 365))
+
+# Inventaires de mods (colonnes NumPy) gardés en mémoire pour l'optimiseur, en nombre de joueurs
+MOD_INVENTORY_CACHE_SIZE = int(os.environ.get('MOD_INVENTORY_CACHE_SIZE', 64))
+
+# Ingestion en masse (guilde)
+INGEST_WORKERS = int(os.environ.get('INGEST_WORKERS', 4))
+
+# File de jobs en arrière-plan
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+JOB_RETENTION = float(os.environ.get('JOB_RETENTION', 3600))
+
 # ==================== BASE DE DONNÉES ====================
 
+def add_column(table, column, declaration):
+    """Étape de migration : ALTER TABLE ADD COLUMN, sans erreur si la colonne existe déjà"""
+    def step(conn):
+        columns = {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+        if column not in columns:
+            conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} {declaration}')
+    return step
+
+def move_legacy_loadout_payloads(conn):
+    """Étape de la migration 6, figée : le JSON brut des loadouts passe dans loadout_payloads
+
+    Copie volontaire de l'encodage de l'époque (JSON trié compact, sha256,
+    zlib niveau 6) : une évolution de store_loadout_payload ne change pas
+    ce que fait la migration sur une ancienne base.
+    """
+    cursor = conn.cursor()
+    rows = cursor.execute('SELECT id, data FROM loadouts WHERE data IS NOT NULL AND payload_hash IS NULL').fetchall()
+    for loadout_id, raw in rows:
+        try:
+            data = json.loads(raw)
+        except ValueError:
+            data = {}
+        encoded = json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+        payload_hash = hashlib.sha256(encoded).hexdigest()
+        cursor.execute('INSERT OR IGNORE INTO loadout_payloads (hash, payload, size) VALUES (?, ?, ?)',
+                       (payload_hash, zlib.compress(encoded, 6), len(encoded)))
+        characters = data.get('characters') if isinstance(data, dict) else None
+        cursor.execute('''UPDATE loadouts SET payload_hash = ?, loadout_type = ?, character_count = ?, data = NULL
+                          WHERE id = ?''',
+                       (payload_hash, data.get('type') if isinstance(data, dict) else None,
+                        len(characters or []), loadout_id))
+
+# Migrations du schéma, suivies par PRAGMA user_version. Chaque migration est
+# (version, description, étapes) ; une étape est une instruction SQL ou une
+# fonction recevant la connexion. Ajouter une migration = ajouter une entrée
+# en fin de liste ; ne jamais modifier une migration déjà appliquée.
+SCHEMA_MIGRATIONS = [
+    (1, "Tables initiales", [
+        # Table pour les informations du joueur
+        '''CREATE TABLE IF NOT EXISTS player_info (
+            ally_code TEXT PRIMARY KEY,
+            name TEXT,
+            level INTEGER,
+            guild_name TEXT,
+            galactic_power INTEGER,
+            character_gp INTEGER,
+            ship_gp INTEGER,
+            last_updated TIMESTAMP
+        )''',
+        # Table pour les personnages
+        '''CREATE TABLE IF NOT EXISTS characters (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ally_code TEXT,
+            base_id TEXT,
+            name TEXT,
+            level INTEGER,
+            gear_level INTEGER,
+            relic_tier INTEGER,
+            power INTEGER,
+            is_zeta INTEGER,
+            galactic_power INTEGER,
+            FOREIGN KEY (ally_code) REFERENCES player_info(ally_code)
+        )''',
+        # Table pour les mods
+        '''CREATE TABLE IF NOT EXISTS mods (
+            id TEXT PRIMARY KEY,
+            ally_code TEXT,
+            character_id TEXT,
+            slot INTEGER,
+            set_type TEXT,
+            level INTEGER,
+            tier INTEGER,
+            rarity INTEGER,
+            primary_stat_type TEXT,
+            primary_stat_value REAL,
+            speed REAL DEFAULT 0,
+            offense REAL DEFAULT 0,
+            offense_percent REAL DEFAULT 0,
+            protection REAL DEFAULT 0,
+            protection_percent REAL DEFAULT 0,
+            health REAL DEFAULT 0,
+            health_percent REAL DEFAULT 0,
+            defense REAL DEFAULT 0,
+            defense_percent REAL DEFAULT 0,
+            potency REAL DEFAULT 0,
+            tenacity REAL DEFAULT 0,
+            critical_chance REAL DEFAULT 0,
+            is_equipped INTEGER DEFAULT 1,
+            FOREIGN KEY (ally_code) REFERENCES player_info(ally_code)
+        )''',
+        # Table pour les loadouts
+        '''CREATE TABLE IF NOT EXISTS loadouts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ally_code TEXT,
+            name TEXT,
+            description TEXT,
+            event_type TEXT,
+            data TEXT,
+            created_at TIMESTAMP,
+            FOREIGN KEY (ally_code) REFERENCES player_info(ally_code)
+        )''',
+        # Table pour les priorités d'optimisation
+        '''CREATE TABLE IF NOT EXISTS optimization_priorities (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ally_code TEXT,
+            character_id TEXT,
+            priority_level INTEGER,
+            stat_weights TEXT,
+            FOREIGN KEY (ally_code) REFERENCES player_info(ally_code)
+        )''',
+    ]),
+    (2, "Index des requêtes fréquentes", [
+        # Dashboard (top 10 GP), liste des personnages triée par GP, comptes par joueur
+        'CREATE INDEX IF NOT EXISTS idx_characters_ally_gp ON characters (ally_code, galactic_power DESC, name)',
+        'CREATE INDEX IF NOT EXISTS idx_characters_ally_base ON characters (ally_code, base_id)',
+        'CREATE INDEX IF NOT EXISTS idx_characters_ally_relic ON characters (ally_code, relic_tier)',
+        # Filtres équipé / non équipé et par slot, mods d'un personnage (optimiseur)
+        'CREATE INDEX IF NOT EXISTS idx_mods_ally_equipped_slot ON mods (ally_code, is_equipped, slot)',
+        'CREATE INDEX IF NOT EXISTS idx_mods_ally_character ON mods (ally_code, character_id)',
+        'CREATE INDEX IF NOT EXISTS idx_loadouts_ally_created ON loadouts (ally_code, created_at DESC)',
+        'CREATE INDEX IF NOT EXISTS idx_player_info_updated ON player_info (last_updated)',
+        'CREATE INDEX IF NOT EXISTS idx_priorities_ally_character ON optimization_priorities (ally_code, character_id)',
+    ]),
+    (3, "Personnage unique par joueur (synchronisation incrémentale)", [
+        # Doublons éventuels laissés par l'ancien parsing : on garde le plus récent
+        '''DELETE FROM characters WHERE id NOT IN (
+            SELECT MAX(id) FROM characters GROUP BY ally_code, base_id
+        )''',
+        'DROP INDEX IF EXISTS idx_characters_ally_base',
+        'CREATE UNIQUE INDEX idx_characters_ally_base ON characters (ally_code, base_id)',
+    ]),
+    (4, "Historique des rosters", [
+        # base_id -> entier, pour des snapshots compacts
+        '''CREATE TABLE IF NOT EXISTS history_units (
+            id INTEGER PRIMARY KEY,
+            base_id TEXT UNIQUE NOT NULL
+        )''',
+        # Une ligne par chargement : courbes de GP sans décoder de snapshot
+        '''CREATE TABLE IF NOT EXISTS player_history (
+            ally_code TEXT,
+            taken_at INTEGER,
+            galactic_power INTEGER,
+            character_gp INTEGER,
+            ship_gp INTEGER,
+            character_count INTEGER,
+            PRIMARY KEY (ally_code, taken_at)
+        ) WITHOUT ROWID''',
+        # Roster (GP, gear, relic par unité) empaqueté, seulement quand il a changé
+        '''CREATE TABLE IF NOT EXISTS roster_snapshots (
+            ally_code TEXT,
+            taken_at INTEGER,
+            unit_count INTEGER,
+            units BLOB,
+            PRIMARY KEY (ally_code, taken_at)
+        ) WITHOUT ROWID''',
+        # Progression (relic / gear ups, nouvelles unités) issue des changements de chaque synchronisation
+        '''CREATE TABLE IF NOT EXISTS unit_events (
+            ally_code TEXT,
+            happened_at INTEGER,
+            base_id TEXT,
+            kind TEXT,
+            from_value INTEGER,
+            to_value INTEGER
+        )''',
+        'CREATE INDEX IF NOT EXISTS idx_unit_events_ally_kind ON unit_events (ally_code, kind, happened_at)',
+    ]),
+    (5, "Résumé du dashboard par joueur", [
+        # Maintenu par save_player_data : le dashboard ne lit qu'une ligne
+        '''CREATE TABLE IF NOT EXISTS player_summary (
+            ally_code TEXT PRIMARY KEY,
+            name TEXT,
+            level INTEGER,
+            guild_name TEXT,
+            galactic_power INTEGER,
+            total_characters INTEGER,
+            relics_r5_plus INTEGER,
+            relic_distribution TEXT,
+            total_mods INTEGER,
+            top_characters TEXT,
+            updated_at TIMESTAMP
+        )''',
+        'CREATE INDEX IF NOT EXISTS idx_player_summary_updated ON player_summary (updated_at)',
+        # Résumé des joueurs déjà en base (SQL figé, indépendant de refresh_player_summary)
+        '''INSERT OR REPLACE INTO player_summary
+            (ally_code, name, level, guild_name, galactic_power, total_characters, relics_r5_plus,
+             relic_distribution, total_mods, top_characters, updated_at)
+        SELECT p.ally_code, p.name, p.level, p.guild_name, p.galactic_power,
+               (SELECT COUNT(*) FROM characters c WHERE c.ally_code = p.ally_code),
+               (SELECT COUNT(*) FROM characters c WHERE c.ally_code = p.ally_code AND c.relic_tier >= 5),
+               (SELECT json_group_object(CAST(tier AS TEXT), n) FROM
+                    (SELECT COALESCE(relic_tier, 0) AS tier, COUNT(*) AS n FROM characters c
+                     WHERE c.ally_code = p.ally_code GROUP BY tier ORDER BY tier)),
+               (SELECT COUNT(*) FROM mods m WHERE m.ally_code = p.ally_code),
+               (SELECT json_group_array(json_object('name', name, 'gp', galactic_power)) FROM
+                    (SELECT name, galactic_power FROM characters c WHERE c.ally_code = p.ally_code
+                     ORDER BY galactic_power DESC LIMIT 10)),
+               p.last_updated
+        FROM player_info p''',
+    ]),
+    (6, "Contenu des loadouts compressé et dédoublonné", [
+        # JSON compressé (zlib), adressé par son hash : deux loadouts identiques partagent leur contenu
+        '''CREATE TABLE IF NOT EXISTS loadout_payloads (
+            hash TEXT PRIMARY KEY,
+            payload BLOB,
+            size INTEGER
+        ) WITHOUT ROWID''',
+        add_column('loadouts', 'payload_hash', 'TEXT'),
+        # Métadonnées de la liste, sans décoder le contenu
+        add_column('loadouts', 'loadout_type', 'TEXT'),
+        add_column('loadouts', 'character_count', 'INTEGER DEFAULT 0'),
+        'CREATE INDEX IF NOT EXISTS idx_loadouts_payload_hash ON loadouts (payload_hash)',
+        # Pagination par (created_at, id) sans tri temporaire
+        'DROP INDEX IF EXISTS idx_loadouts_ally_created',
+        'CREATE INDEX idx_loadouts_ally_created ON loadouts (ally_code, created_at DESC, id DESC)',
+        move_legacy_loadout_payloads,
+    ]),
+    (7, "Version de l'inventaire des mods par joueur", [
+        # Incrémentée par save_player_data quand les mods changent : l'optimiseur
+        # reconstruit son inventaire en mémoire une fois par version
+        '''CREATE TABLE IF NOT EXISTS mod_inventory_versions (
+            ally_code TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        ) WITHOUT ROWID''',
+    ]),
+    (8, "Source du roster enregistré (json / html)", [
+        # Sans catalogue, les base_id du scraping HTML (portraits) diffèrent de ceux de l'API JSON
+        add_column('player_info', 'roster_source', 'TEXT'),
+    ]),
+]
+
+SCHEMA_VERSION = SCHEMA_MIGRATIONS[-1][0]
+
+def schema_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+def migrate_db(conn, migrations=None):
+    """Applique les migrations en attente ; renvoie les versions appliquées
+
+    Chaque migration est appliquée dans sa propre transaction (BEGIN
+    IMMEDIATE : deux processus qui démarrent en même temps ne l'appliquent
+    pas deux fois) avec la mise à jour de user_version ; une migration en
+    échec est annulée entièrement et l'erreur est propagée.
+    """
+    migrations = SCHEMA_MIGRATIONS if migrations is None else migrations
+    applied = []
+    for version, description, steps in migrations:
+        if schema_version(conn) >= version:
+            continue
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # Relu sous verrou : un autre processus a pu migrer entre-temps
+            if schema_version(conn) >= version:
+                conn.rollback()
+                continue
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute(f'PRAGMA user_version = {int(version)}')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(version)
+        print(f"🗄️  Migration {version} appliquée: {description}")
+
+    current = schema_version(conn)
+    latest = migrations[-1][0] if migrations else 0
+    if current > latest:
+        print(f"⚠️  Base en version {current}, plus récente que l'application ({latest})")
+    if applied:
+        conn.execute('PRAGMA optimize')
+    return applied
+
 def init_db():
-    """Initialise la base de données SQLite"""
-    conn = sqlite3.connect('swgoh_data.db')
-    c = conn.cursor()
-    
-    # Table pour les informations du joueur
-    c.execute('''CREATE TABLE IF NOT EXISTS player_info (
-        ally_code TEXT PRIMARY KEY,
-        name TEXT,
-        level INTEGER,
-        guild_name TEXT,
-        galactic_power INTEGER,
-        character_gp INTEGER,
-        ship_gp INTEGER,
-        last_updated TIMESTAMP
-    )''')
-    
-    # Table pour les personnages
-    c.execute('''CREATE TABLE IF NOT EXISTS characters (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        ally_code TEXT,
-        base_id TEXT,
-        name TEXT,
-        level INTEGER,
-        gear_level INTEGER,
-        relic_tier INTEGER,
-        power INTEGER,
-        is_zeta INTEGER,
-        galactic_power INTEGER,
-        FOREIGN KEY (ally_code) REFERENCES player_info(ally_code)
-    )''')
-    
-    # Table pour les mods
-    c.execute('''CREATE TABLE IF NOT EXISTS mods (
-        id TEXT PRIMARY KEY,
-        ally_code TEXT,
-        character_id TEXT,
-        slot INTEGER,
-        set_type TEXT,
-        level INTEGER,
-        tier INTEGER,
-        rarity INTEGER,
-        primary_stat_type TEXT,
-        primary_stat_value REAL,
-        speed REAL DEFAULT 0,
-        offense REAL DEFAULT 0,
-        offense_percent REAL DEFAULT 0,
-        protection REAL DEFAULT 0,
-        protection_percent REAL DEFAULT 0,
-        health REAL DEFAULT 0,
-        health_percent REAL DEFAULT 0,
-        defense REAL DEFAULT 0,
-        defense_percent REAL DEFAULT 0,
-        potency REAL DEFAULT 0,
-        tenacity REAL DEFAULT 0,
-        critical_chance REAL DEFAULT 0,
-        is_equipped INTEGER DEFAULT 1,
-        FOREIGN KEY (ally_code) REFERENCES player_info(ally_code)
-    )''')
-    
-    # Table pour les loadouts
-    c.execute('''CREATE TABLE IF NOT EXISTS loadouts (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        ally_code TEXT,
-        name TEXT,
-        description TEXT,
-        event_type TEXT,
-        data TEXT,
-        created_at TIMESTAMP,
-        FOREIGN KEY (ally_code) REFERENCES player_info(ally_code)
-    )''')
-    
-    # Table pour les priorités d'optimisation
-    c.execute('''CREATE TABLE IF NOT EXISTS optimization_priorities (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        ally_code TEXT,
-        character_id TEXT,
-        priority_level INTEGER,
-        stat_weights TEXT,
-        FOREIGN KEY (ally_code) REFERENCES player_info(ally_code)
-    )''')
-    
-    conn.commit()
-    conn.close()
+    """Initialise la base de données SQLite et applique les migrations en attente"""
+    conn = get_db_connection()
+    try:
+        migrate_db(conn)
+    finally:
+        conn.close()
+
+class PooledConnection(sqlite3.Connection):
+    """Connexion SQLite dont close() la rend au pool au lieu de la fermer"""
+
+    pool = None
+    path = None
+    idle = False
+
+    def close(self):
+        if self.pool is None:
+            super().close()
+        else:
+            self.pool.release(self)
+
+    def close_for_real(self):
+        super().close()
+
+class ConnectionPool:
+    """Pool de connexions SQLite réutilisées d'une requête à l'autre
+
+    Chaque connexion est ouverte une fois avec SQLITE_PRAGMAS (WAL : les
+    lectures du dashboard ne sont plus bloquées par une sauvegarde en
+    cours). Une connexion n'est utilisée que par un thread à la fois : elle
+    est empruntée par get_db_connection() et rendue par close(). Les
+    emprunts ne bloquent jamais ; au-delà de `size` connexions inactives
+    par base, les connexions rendues sont vraiment fermées.
+    """
+
+    def __init__(self, size=SQLITE_POOL_SIZE, pragmas=None):
+        self.size = max(0, int(size))
+        self.pragmas = SQLITE_PRAGMAS if pragmas is None else pragmas
+        self._idle = defaultdict(list)  # chemin de la base -> connexions inactives
+        self._lock = threading.Lock()
+        self.stats = {'created': 0, 'reused': 0, 'closed': 0}
+
+    def _connect(self, path):
+        conn = sqlite3.connect(path, factory=PooledConnection, check_same_thread=False,
+                               timeout=self.pragmas.get('busy_timeout', 5000) / 1000)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        conn.pool = self
+        conn.path = path
+        return conn
+
+    def acquire(self, path=None):
+        """Emprunte une connexion à la base `path` (DATABASE_PATH par défaut)"""
+        path = path or DATABASE_PATH
+        conn = None
+        with self._lock:
+            idle = self._idle[path]
+            if idle:
+                conn = idle.pop()
+                conn.idle = False
+                self.stats['reused'] += 1
+        if conn is None:
+            conn = self._connect(path)
+            with self._lock:
+                self.stats['created'] += 1
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def release(self, conn):
+        """Rend une connexion ; une transaction non commitée est annulée (comme close())"""
+        if conn.idle:
+            return
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            idle = self._idle[conn.path]
+            if len(idle) < self.size:
+                conn.idle = True
+                idle.append(conn)
+                return
+            self.stats['closed'] += 1
+        conn.close_for_real()
+
+    def close(self):
+        """Ferme toutes les connexions inactives"""
+        with self._lock:
+            connections = [conn for idle in self._idle.values() for conn in idle]
+            self._idle.clear()
+            self.stats['closed'] += len(connections)
+        for conn in connections:
+            conn.close_for_real()
+
+DB_POOL = ConnectionPool()
 
 def get_db_connection():
-    """Retourne une connexion à la base de données"""
-    conn = sqlite3.connect('swgoh_data.db')
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Connexion à la base, empruntée au pool : conn.close() la rend au pool"""
+    return DB_POOL.acquire()
+
+# ==================== CATALOGUE DES UNITÉS ====================
+
+class UnitCatalogue:
+    """Catalogue local des unités : portrait -> base_id -> nom canonique + drapeaux
+
+    Chargé une fois en mémoire (dicts) depuis un fichier JSON, rechargé
+    quand le fichier change. Sans fichier, le catalogue est vide et le
+    parsing retombe sur les heuristiques (nom deviné, base_id du portrait).
+    """
+
+    def __init__(self, path=UNIT_CATALOGUE_PATH):
+        self.path = path
+        self.by_portrait = {}
+        self.by_base_id = {}
+        self.fingerprint = ''
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.by_base_id)
+
+    def load(self, path=None):
+        """(Re)charge le catalogue depuis un fichier ; renvoie le nombre d'unités"""
+        path = path or self.path
+        with open(path, 'rb') as f:
+            raw = f.read()
+        
+        by_portrait = {}
+        by_base_id = {}
+        for unit in json.loads(raw).get('units', []):
+            entry = {
+                'base_id': unit['base_id'],
+                'name': unit['name'],
+                'combat_type': int(unit.get('combat_type', 1)),
+                'is_galactic_legend': bool(unit.get('is_galactic_legend', False))
+            }
+            by_base_id[entry['base_id']] = entry
+            if unit.get('portrait'):
+                by_portrait[unit['portrait'].lower()] = entry
+        
+        with self._lock:
+            # Remplacement d'un bloc : les lecteurs voient l'ancien ou le nouveau catalogue
+            self.path = path
+            self.by_portrait = by_portrait
+            self.by_base_id = by_base_id
+            self.fingerprint = hashlib.sha1(raw).hexdigest()[:12]
+            self._mtime = os.path.getmtime(path)
+        return len(by_base_id)
+
+    def refresh(self):
+        """Recharge le fichier s'il a changé depuis le dernier chargement (un seul stat)"""
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return False
+        if mtime == self._mtime:
+            return False
+        try:
+            count = self.load()
+        except (ValueError, KeyError) as e:
+            print(f"⚠️  Catalogue des unités illisible ({self.path}): {e}")
+            self._mtime = mtime
+            return False
+        print(f"📚 Catalogue des unités chargé: {count} unités")
+        return True
+
+    def lookup_portrait(self, portrait_id):
+        """Unité correspondant à un identifiant de portrait (tex.charui_<id>.png)"""
+        return self.by_portrait.get(portrait_id.lower())
+
+UNIT_CATALOGUE = UnitCatalogue()
+
+def build_unit_catalogue(characters, ships=()):
+    """Construit le contenu du catalogue depuis l'API swgoh.gg (/characters/, /ships/)"""
+    units = []
+    for default_type, payload in ((1, characters), (2, ships)):
+        for unit in payload:
+            match = PORTRAIT_ID_RE.search(unit.get('image') or '')
+            units.append({
+                'base_id': unit['base_id'],
+                'name': unit['name'],
+                'portrait': match.group(1) if match else None,
+                'combat_type': unit.get('combat_type', default_type),
+                'is_galactic_legend': bool(unit.get('is_galactic_legend', False))
+            })
+    return {'updated_at': datetime.now(timezone.utc).isoformat(), 'units': units}
+
+def download_unit_catalogue(path=None):
+    """Télécharge le catalogue depuis swgoh.gg, l'écrit puis le recharge"""
+    path = path or UNIT_CATALOGUE.path
+    payloads = []
+    for endpoint in ('characters', 'ships'):
+        deadline = time.monotonic() + FETCH_DEADLINE
+        response = scrape_get(f"{SWGOH_GG_API_URL}/{endpoint}/", deadline)
+        if response.status_code != 200:
+            raise IngestError(f"Catalogue: HTTP {response.status_code} sur /api/{endpoint}/")
+        payloads.append(response.json())
+    
+    catalogue = build_unit_catalogue(*payloads)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(catalogue, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+    return UNIT_CATALOGUE.load(path)
+
+def parsed_cache_version():
+    """Version des résultats parsés en cache : parseur + contenu du catalogue"""
+    UNIT_CATALOGUE.refresh()
+    return f"{PARSER_VERSION}:{UNIT_CATALOGUE.fingerprint}"
 
 # ==================== PARSING ====================
 
-def parse_unit_card(card):
-    """Parse une unit-card (structure SWGOH.gg 2024-2025)"""
+def _class_list(attrs):
+    """Classes d'un tag, que l'attribut soit encore brut (str) ou déjà découpé"""
+    classes = attrs.get('class') or []
+    return classes.split() if isinstance(classes, str) else classes
+
+def _is_unit_card(name, attrs):
+    """Cartes de personnages de la page roster"""
+    return name == 'div' and 'unit-card' in _class_list(attrs)
+
+def _is_profile_tag(name, attrs):
+    """Sous-arbres utiles de la page profil : nom, lien de guilde, stats GP"""
+    if name == 'h5':
+        return 'pull-left' in _class_list(attrs)
+    if name == 'a':
+        return '/g/' in (attrs.get('href') or '')
+    if name == 'div':
+        return 'profile-stat' in _class_list(attrs)
+    return False
+
+# Seuls ces sous-arbres sont construits : le reste de la page est ignoré au parsing.
+# Prédicats plutôt que class_=... : pendant le parsing l'attribut class est encore
+# une chaîne brute ("unit-card unit-card--dark-side") et ne matcherait pas.
+ROSTER_STRAINER = _is_unit_card
+PROFILE_STRAINER = _is_profile_tag
+
+@lru_cache(maxsize=None)
+def _soup_strainer(predicate):
+    from bs4 import SoupStrainer
+    return SoupStrainer(predicate)
+
+def make_soup(html, parse_only=None):
+    """Construit l'arbre avec HTML_PARSER (lxml), repli sur html.parser si absent
+
+    `parse_only` est un prédicat (ROSTER_STRAINER, PROFILE_STRAINER),
+    converti une fois en SoupStrainer.
+    """
+    from bs4 import BeautifulSoup, FeatureNotFound
+    strainer = _soup_strainer(parse_only) if parse_only else None
     try:
-        # === NOM DU PERSONNAGE ===
-        # Le nom n'est PAS dans l'attribut alt (vide), mais dans le texte de la carte
-        name = "Unknown"
+        return BeautifulSoup(html, HTML_PARSER, parse_only=strainer)
+    except FeatureNotFound:
+        return BeautifulSoup(html, 'html.parser', parse_only=strainer)
+
+# Motifs compilés une fois pour toutes les cartes
+PORTRAIT_ID_RE = re.compile(r'tex\.charui_([^.]+)\.png')
+POWER_RE = re.compile(r'(\d{1,3}(?:,\d{3})+|\d{5,6})')
+NAME_KEYWORDS_RE = re.compile('|'.join([
+    'commander', 'captain', 'general', 'master', 'lord', 'dark', 'jedi',
+    'trooper', 'pilot', 'clone', 'droid', 'vader', 'skywalker', 'yoda',
+    'kenobi', 'ahsoka', 'revan', 'malak', 'bane', 'maul', 'rey', 'kylo'
+]))
+GUILD_LINK_RE = re.compile(r'/g/')
+NON_DIGIT_RE = re.compile(r'[^\d]')
+
+# Marque une balise svg sans <text> (ignorée comme dans svg.find('text'))
+_NO_SVG_TEXT = object()
+
+def _scan_unit_card(card):
+    """Parcourt une carte en une seule passe
+
+    Renvoie les lignes de texte (comme get_text(separator='|', strip=True)
+    découpé sur '|'), le texte du premier <text> de chaque svg dans l'ordre
+    du document, et le src du premier img.character-portrait__img.
+    """
+    from bs4 import Tag
+
+    string_types = card.interesting_string_types
+    if isinstance(string_types, type):
+        string_types = (string_types,)
+    
+    lines = []
+    svg_texts = []
+    open_svgs = []        # pile des indices des svg ouverts
+    capture = None        # (balise <text>, indices svg, morceaux de texte)
+    portrait = None
+    
+    stack = [(card, iter(card.contents))]
+    while stack:
+        node, children = stack[-1]
+        child = next(children, None)
+        
+        if child is None:
+            stack.pop()
+            if node.name == 'svg':
+                open_svgs.pop()
+            if capture and capture[0] is node:
+                value = ''.join(capture[2])
+                for index in capture[1]:
+                    svg_texts[index] = value
+                capture = None
+            continue
+        
+        if isinstance(child, Tag):
+            name = child.name
+            if name == 'svg':
+                open_svgs.append(len(svg_texts))
+                svg_texts.append(_NO_SVG_TEXT)
+            elif name == 'text' and capture is None:
+                # Premier <text> des svg ouverts qui n'en ont pas encore
+                waiting = [index for index in open_svgs if svg_texts[index] is _NO_SVG_TEXT]
+                if waiting:
+                    for index in waiting:
+                        svg_texts[index] = None  # réservé, valeur à la fermeture
+                    capture = (child, waiting, [])
+            elif name == 'img' and portrait is None and 'character-portrait__img' in child.get('class', ()):
+                portrait = child.get('src') or ''
+            stack.append((child, iter(child.contents)))
+        elif type(child) in string_types:
+            text = child.strip()
+            if text:
+                lines.extend(part.strip() for part in text.split('|') if part.strip())
+                if capture:
+                    capture[2].append(text)
+    
+    return lines, [text for text in svg_texts if text is not _NO_SVG_TEXT], portrait
+
+# Chaînes ignorées par get_text() de BeautifulSoup (Script, Stylesheet, TemplateString...)
+_HIDDEN_TEXT_TAGS = frozenset(['script', 'style', 'template', 'rt', 'rp'])
+
+def _scan_unit_element(card):
+    """Équivalent de _scan_unit_card sur un élément lxml (parsing en flux)
+
+    Le texte d'un élément lxml est réparti entre `text` (avant le premier
+    enfant) et `tail` (après sa fermeture, dans le parent) : on reproduit
+    l'ordre du document de BeautifulSoup.
+    """
+    lines = []
+    svg_texts = []
+    open_svgs = []
+    capture = None
+    portrait = None
+    hidden = 0
+    
+    def add_text(text):
+        if hidden or not text:
+            return
+        text = text.strip()
+        if text:
+            lines.extend(part.strip() for part in text.split('|') if part.strip())
+            if capture:
+                capture[2].append(text)
+    
+    add_text(card.text)
+    stack = [(card, iter(card))]
+    while stack:
+        node, children = stack[-1]
+        child = next(children, None)
         
-        # Récupère tout le texte de la carte
-        card_text = card.get_text(separator='|', strip=True)
-        lines = [line.strip() for line in card_text.split('|') if line.strip()]
+        if child is None:
+            stack.pop()
+            if node.tag == 'svg':
+                open_svgs.pop()
+            if node.tag in _HIDDEN_TEXT_TAGS:
+                hidden -= 1
+            if capture and capture[0] is node:
+                value = ''.join(capture[2])
+                for index in capture[1]:
+                    svg_texts[index] = value
+                capture = None
+            if stack:
+                add_text(node.tail)
+            continue
         
-        # Le nom est généralement une ligne plus longue que les autres
-        # Évite les chiffres seuls, pourcentages, etc.
+        name = child.tag
+        if not isinstance(name, str):
+            # Commentaire ou instruction : seul le texte qui suit compte
+            add_text(child.tail)
+            continue
+        if name == 'svg':
+            open_svgs.append(len(svg_texts))
+            svg_texts.append(_NO_SVG_TEXT)
+        elif name == 'text' and capture is None:
+            waiting = [index for index in open_svgs if svg_texts[index] is _NO_SVG_TEXT]
+            if waiting:
+                for index in waiting:
+                    svg_texts[index] = None
+                capture = (child, waiting, [])
+        elif name == 'img' and portrait is None and 'character-portrait__img' in (child.get('class') or '').split():
+            portrait = child.get('src') or ''
+        if name in _HIDDEN_TEXT_TAGS:
+            hidden += 1
+        stack.append((child, iter(child)))
+        add_text(child.text)
+    
+    return lines, [text for text in svg_texts if text is not _NO_SVG_TEXT], portrait
+
+def parse_unit_card(card):
+    """Parse une unit-card BeautifulSoup (structure SWGOH.gg 2024-2025)"""
+    try:
+        lines, svg_texts, portrait_src = _scan_unit_card(card)
+        return _build_character(lines, svg_texts, portrait_src, ' '.join(card.get('class', [])))
+    except Exception as e:
+        print(f"⚠️  Carte d'unité ignorée : {e}")
+        return None
+
+def parse_unit_element(card):
+    """Parse une unit-card lxml, même résultat que parse_unit_card"""
+    try:
+        lines, svg_texts, portrait_src = _scan_unit_element(card)
+        return _build_character(lines, svg_texts, portrait_src, card.get('class') or '')
+    except Exception as e:
+        print(f"⚠️  Carte d'unité ignorée : {e}")
+        return None
+
+def _build_character(lines, svg_texts, portrait_src, classes):
+    """Interprète le contenu d'une carte (lignes de texte, textes svg, portrait)"""
+    card_text = '|'.join(lines)
+    
+    # === CATALOGUE ===
+    # Format du portrait: tex.charui_CHARACTERID.png
+    match = PORTRAIT_ID_RE.search(portrait_src) if portrait_src else None
+    portrait_id = match.group(1) if match else None
+    unit = UNIT_CATALOGUE.lookup_portrait(portrait_id) if portrait_id else None
+    
+    # === NOM DU PERSONNAGE ===
+    # Le nom n'est PAS dans l'attribut alt (vide), mais dans le texte de la carte
+    name = unit['name'] if unit else "Unknown"
+    
+    # Unité absente du catalogue : le nom est généralement une ligne plus
+    # longue que les autres. Évite les chiffres seuls, pourcentages, etc.
+    if not unit:
         for line in lines:
             # Critères pour identifier un nom de personnage
             if (len(line) > 5 and  # Assez long
@@ -144,119 +845,148 @@ def parse_unit_card(card):
                 not line.replace('%', '').replace(',', '').isdigit() and  # Pas que des chiffres
                 '%' not in line and  # Pas un pourcentage
                 any(c.isalpha() for c in line)):  # Contient des lettres
-                
+            
                 # Vérifie que c'est bien un nom plausible
-                words = line.split()
-                if len(words) >= 2 or any(keyword in line.lower() for keyword in 
-                    ['commander', 'captain', 'general', 'master', 'lord', 'dark', 'jedi', 
-                     'trooper', 'pilot', 'clone', 'droid', 'vader', 'skywalker', 'yoda',
-                     'kenobi', 'ahsoka', 'revan', 'malak', 'bane', 'maul', 'rey', 'kylo']):
+                if len(line.split()) >= 2 or NAME_KEYWORDS_RE.search(line.lower()):
                     name = line
                     break
+    
+    # === BASE ID depuis le catalogue, sinon l'URL de l'image ===
+    base_id = ""
+    if unit:
+        base_id = unit['base_id']
+    elif portrait_id:
+        base_id = portrait_id.upper().replace('_', '')
+    
+    # Si pas de base_id trouvé, utilise le nom
+    if not base_id and name != "Unknown":
+        base_id = name.upper().replace(' ', '').replace("'", '').replace('-', '')
+    
+    # === GEAR LEVEL ===
+    gear_level = 13  # Défaut G13 pour les personnages modernes
+    
+    # === RELIC TIER ===
+    # Le tier de relique est le premier nombre <= 9 affiché dans un SVG
+    relic_tier = 0
+    for tier_text in svg_texts:
+        if tier_text.isdigit() and int(tier_text) <= 9:
+            relic_tier = int(tier_text)
+            break
+    
+    # === ZETAS ===
+    zeta_count = 0
+    for zeta_text in svg_texts:
+        if zeta_text.isdigit() and int(zeta_text) <= 10:
+            # Distingue zeta (petit nombre) vs relic (déjà trouvé)
+            if relic_tier == 0:
+                zeta_count = int(zeta_text)
+    
+    # === GALACTIC POWER ===
+    power = 20000  # Défaut
+    # Le GP est généralement entre 10k et 35k
+    valid_powers = [value for value in (int(num.replace(',', '')) for num in POWER_RE.findall(card_text))
+                    if 10000 <= value <= 35000]
+    if valid_powers:
+        power = max(valid_powers)
+    
+    # === FLAGS ===
+    classes_str = classes.lower()
+    is_gl = unit['is_galactic_legend'] if unit else 'galactic-legend' in classes_str
+    has_ultimate = 'has-ultimate' in classes_str
+    
+    # Retourne le personnage si valide
+    if name and name != "Unknown" and base_id:
+        return {
+            'base_id': base_id,
+            'name': name,
+            'level': 85,
+            'gear_level': gear_level,
+            'relic_tier': relic_tier,
+            'power': power,
+            'galactic_power': power,
+            'combat_type': unit['combat_type'] if unit else 1,
+            'has_ultimate': has_ultimate,
+            'is_galactic_legend': is_gl,
+            'zeta_count': zeta_count,
+            'mods': []
+        }
+    
+    return None
+
+def _iter_chunks(source, size):
+    """Découpe une page (str/bytes) en morceaux, ou relaie un itérable de morceaux"""
+    if isinstance(source, (str, bytes)):
+        for offset in range(0, len(source), size):
+            yield source[offset:offset + size]
+    else:
+        yield from source
+
+def _is_unit_card_element(element):
+    return element.tag == 'div' and 'unit-card' in (element.get('class') or '').split()
+
+def iter_character_roster(source):
+    """Génère les personnages au fil du parsing, dès qu'une unit-card se ferme
+
+    `source` est la page (str ou bytes) ou un itérable de morceaux (ex:
+    response.iter_content()). Avec lxml, le parseur est alimenté par
+    morceaux de ROSTER_CHUNK_SIZE et chaque carte est libérée une fois
+    lue : la mémoire reste plate quelle que soit la taille du roster.
+    Sans lxml (ou avec un autre HTML_PARSER), repli sur BeautifulSoup.
+    """
+    UNIT_CATALOGUE.refresh()
+    if etree is None or HTML_PARSER != 'lxml':
+        html = source
+        if not isinstance(source, (str, bytes)):
+            chunks = list(source)
+            html = b''.join(chunks) if chunks and isinstance(chunks[0], bytes) else ''.join(chunks)
+        for card in make_soup(html, ROSTER_STRAINER).find_all('div', class_='unit-card'):
+            character = parse_unit_card(card)
+            if character:
+                yield character
+        return
+    
+    parser = etree.HTMLPullParser(events=('start', 'end'))
+    chunks = _iter_chunks(source, ROSTER_CHUNK_SIZE)
+    open_cards = 0
+    done = False
+    while not done:
+        chunk = next(chunks, None)
+        if chunk is None:
+            parser.close()
+            done = True
+        else:
+            parser.feed(chunk)
         
-        # === BASE ID depuis l'URL de l'image ===
-        base_id = ""
-        img = card.find('img', class_='character-portrait__img')
-        if img and img.get('src'):
-            src = img['src']
-            # Format: tex.charui_CHARACTERID.png
-            match = re.search(r'tex\.charui_([^.]+)\.png', src)
-            if match:
-                base_id = match.group(1).upper().replace('_', '')
-        
-        # Si pas de base_id trouvé, utilise le nom
-        if not base_id and name != "Unknown":
-            base_id = name.upper().replace(' ', '').replace("'", '').replace('-', '')
-        
-        # === GEAR LEVEL ===
-        gear_level = 13  # Défaut G13 pour les personnages modernes
-        
-        # === RELIC TIER ===
-        relic_tier = 0
-        # Cherche dans les SVG (le tier de relique est affiché dans un SVG)
-        for svg in card.find_all('svg'):
-            text_elem = svg.find('text')
-            if text_elem:
-                tier_text = text_elem.get_text(strip=True)
-                if tier_text.isdigit() and int(tier_text) <= 9:
-                    relic_tier = int(tier_text)
-                    break
-        
-        # === ZETAS ===
-        zeta_count = 0
-        for svg in card.find_all('svg'):
-            text_elem = svg.find('text')
-            if text_elem:
-                zeta_text = text_elem.get_text(strip=True)
-                if zeta_text.isdigit() and int(zeta_text) <= 10:
-                    # Distingue zeta (petit nombre) vs relic (déjà trouvé)
-                    if relic_tier == 0:
-                        zeta_count = int(zeta_text)
-        
-        # === GALACTIC POWER ===
-        power = 20000  # Défaut
-        # Cherche les nombres à 5-6 chiffres dans le texte
-        numbers = re.findall(r'(\d{1,3}(?:,\d{3})+|\d{5,6})', card_text)
-        if numbers:
-            valid_powers = []
-            for num in numbers:
-                clean_num = int(num.replace(',', ''))
-                # Le GP est généralement entre 10k et 35k
-                if 10000 <= clean_num <= 35000:
-                    valid_powers.append(clean_num)
-            if valid_powers:
-                power = max(valid_powers)
-        
-        # === FLAGS ===
-        classes_str = ' '.join(card.get('class', []))
-        is_gl = 'galactic-legend' in classes_str.lower()
-        has_ultimate = 'has-ultimate' in classes_str.lower()
-        
-        # Retourne le personnage si valide
-        if name and name != "Unknown" and base_id:
-            return {
-                'base_id': base_id,
-                'name': name,
-                'level': 85,
-                'gear_level': gear_level,
-                'relic_tier': relic_tier,
-                'power': power,
-                'galactic_power': power,
-                'combat_type': 1,
-                'has_ultimate': has_ultimate,
-                'is_galactic_legend': is_gl,
-                'zeta_count': zeta_count,
-                'mods': []
-            }
-        
-        return None
-        
-    except Exception as e:
-        return None
+        for event, element in parser.read_events():
+            if not _is_unit_card_element(element):
+                continue
+            if event == 'start':
+                open_cards += 1
+                continue
+            
+            open_cards -= 1
+            character = parse_unit_element(element)
+            if character:
+                yield character
+            if not open_cards:
+                # Libère la carte et tout ce qui la précède dans son parent
+                element.clear()
+                parent = element.getparent()
+                while parent is not None and element.getprevious() is not None:
+                    del parent[0]
 
 def parse_character_roster(html):
-    """Parse le roster de personnages depuis la page HTML"""
-    soup = BeautifulSoup(html, 'html.parser')
+    """Parse le roster de personnages depuis la page HTML (liste complète)"""
     roster = []
     
     try:
         print("🔍 Recherche des cartes de personnages...")
         
         # La structure utilise div.unit-card
-        unit_cards = soup.find_all('div', class_='unit-card')
-        print(f"✅ {len(unit_cards)} unit-cards trouvées")
-        
-        success_count = 0
-        for i, card in enumerate(unit_cards):
-            try:
-                character = parse_unit_card(card)
-                if character:
-                    roster.append(character)
-                    success_count += 1
-                    if success_count <= 3:  # Debug: affiche les 3 premiers
-                        print(f"  ✓ {character['name']} (R{character['relic_tier']}, GP:{character['galactic_power']})")
-            except Exception as e:
-                continue
+        for character in iter_character_roster(html):
+            roster.append(character)
+            if len(roster) <= 3:  # Debug: affiche les 3 premiers
+                print(f"  ✓ {character['name']} (R{character['relic_tier']}, GP:{character['galactic_power']})")
         
         if roster:
             print(f"✅ {len(roster)} personnages extraits avec succès")
@@ -270,6 +1000,557 @@ def parse_character_roster(html):
     
     return roster
 
+def parse_profile_page(html):
+    """Parse la page profil d'un joueur (nom, guilde, galactic power)"""
+    soup = make_soup(html, PROFILE_STRAINER)
+    
+    # === EXTRACTION DU NOM DU JOUEUR ===
+    player_name = "Unknown Player"
+    name_elem = soup.find('h5', class_='pull-left')
+    if name_elem:
+        player_name = name_elem.get_text(strip=True)
+        print(f"👤 Joueur: {player_name}")
+    
+    # === EXTRACTION DE LA GUILDE ===
+    guild_name = "No Guild"
+    guild_elem = soup.find('a', href=GUILD_LINK_RE)
+    if guild_elem:
+        guild_name = guild_elem.get_text(strip=True)
+        print(f"🏰 Guilde: {guild_name}")
+    
+    # === EXTRACTION DU GALACTIC POWER ===
+    gp_total = 0
+    gp_char = 0
+    gp_ship = 0
+    
+    # Méthode 1 : via les divs profile-stat
+    stats_divs = soup.find_all('div', class_='profile-stat')
+    for stat_div in stats_divs:
+        label_div = stat_div.find('div', class_='stat-label')
+        value_div = stat_div.find('div', class_='stat-value')
+        
+        if label_div and value_div:
+            label_text = label_div.get_text(strip=True).lower()
+            value_text = value_div.get_text(strip=True).replace(',', '').replace(' ', '')
+            
+            try:
+                value_int = int(NON_DIGIT_RE.sub('', value_text))
+                
+                if 'galactic power' in label_text:
+                    if 'character' in label_text:
+                        gp_char = value_int
+                    elif 'ship' in label_text:
+                        gp_ship = value_int
+                    else:
+                        gp_total = value_int
+            except (ValueError, AttributeError):
+                pass
+    
+    # Si pas trouvé, calculer le total
+    if gp_total == 0 and (gp_char > 0 or gp_ship > 0):
+        gp_total = gp_char + gp_ship
+    
+    return {
+        'name': player_name,
+        'guild_name': guild_name,
+        'galactic_power': gp_total,
+        'character_galactic_power': gp_char,
+        'ship_galactic_power': gp_ship
+    }
+
+# ==================== PARSING MULTI-PROCESSUS ====================
+
+# Le parsing est du Python pur : sous les threads Flask / d'ingestion il se
+# sérialise sur le GIL. Les pages sont envoyées (en octets) à un pool de
+# processus qui renvoie des tuples compacts plutôt que des dicts.
+ROSTER_RECORD_FIELDS = ('base_id', 'name', 'level', 'gear_level', 'relic_tier', 'power',
+                        'galactic_power', 'combat_type', 'has_ultimate', 'is_galactic_legend',
+                        'zeta_count')
+
+_PARSE_POOL = None
+_PARSE_POOL_LOCK = threading.Lock()
+
+def get_parse_pool():
+    """Pool de processus de parsing, créé au premier usage (None si désactivé)"""
+    global _PARSE_POOL
+    if PARSE_WORKERS <= 0:
+        return None
+    with _PARSE_POOL_LOCK:
+        if _PARSE_POOL is None:
+            # spawn : jamais de fork d'un processus qui a déjà des threads (Flask, pools)
+            _PARSE_POOL = ProcessPoolExecutor(max_workers=PARSE_WORKERS,
+                                              mp_context=multiprocessing.get_context('spawn'),
+                                              initializer=_init_parse_worker,
+                                              initargs=(UNIT_CATALOGUE.path,))
+        return _PARSE_POOL
+
+def _init_parse_worker(catalogue_path):
+    """Les processus du pool lisent le même fichier catalogue que le processus principal"""
+    UNIT_CATALOGUE.path = catalogue_path
+
+def shutdown_parse_pool(wait=True):
+    """Arrête le pool de parsing (il sera recréé au prochain usage)"""
+    global _PARSE_POOL
+    with _PARSE_POOL_LOCK:
+        pool, _PARSE_POOL = _PARSE_POOL, None
+    if pool:
+        pool.shutdown(wait=wait)
+
+def parse_roster_records(page):
+    """Exécuté dans un processus du pool : page (bytes UTF-8) -> liste de tuples"""
+    html = page.decode('utf-8', errors='replace') if isinstance(page, bytes) else page
+    return [tuple(character[field] for field in ROSTER_RECORD_FIELDS)
+            for character in iter_character_roster(html)]
+
+def records_to_roster(records):
+    """Reconstruit les personnages (même format que parse_character_roster)"""
+    return [dict(zip(ROSTER_RECORD_FIELDS, record), mods=[]) for record in records]
+
+def parse_roster_page(html, timeout=None):
+    """Parse une page roster complète, dans le pool de processus si possible
+
+    Les petites pages (< PARSE_POOL_MIN_BYTES) restent dans le thread
+    appelant : l'aller-retour entre processus coûterait plus que le parsing.
+    Si le pool est indisponible ou cassé, repli sur le parsing local.
+    """
+    if len(html) < PARSE_POOL_MIN_BYTES:
+        return parse_character_roster(html)
+    
+    try:
+        pool = get_parse_pool()
+    except (OSError, NotImplementedError) as e:
+        # Ex: pas de sémaphores POSIX dans un conteneur restreint
+        print(f"⚠️  Pool de parsing indisponible ({e}), parsing local")
+        pool = None
+    if pool is None:
+        return parse_character_roster(html)
+    
+    try:
+        future = pool.submit(parse_roster_records, html.encode('utf-8'))
+        records = future.result(timeout=timeout)
+    except BrokenProcessPool:
+        print("⚠️  Pool de parsing cassé (processus tué ?), recréé au prochain usage")
+        shutdown_parse_pool(wait=False)
+        return parse_character_roster(html)
+    except TimeoutError:
+        future.cancel()  # encore en file d'attente : la page ne sera pas parsée pour rien
+        raise
+    
+    roster = records_to_roster(records)
+    print(f"✅ {len(roster)} personnages extraits (pool de parsing)")
+    return roster
+
+# ==================== SESSIONS SCRAPER ====================
+
+def create_scraper_session():
+    """Crée une nouvelle session cloudscraper (challenge Cloudflare au 1er appel)"""
+    import cloudscraper
+    return cloudscraper.create_scraper(browser=SCRAPER_BROWSER)
+
+class ScraperPool:
+    """Pool de sessions cloudscraper partagé par tout le processus
+
+    Chaque session garde ses connexions keep-alive, ses cookies et la clearance
+    Cloudflare : le challenge n'est payé qu'une fois par session et non à chaque
+    appel. Les sessions inactives depuis plus de `idle_timeout` secondes sont
+    fermées.
+    """
+
+    def __init__(self, size=SCRAPER_POOL_SIZE, idle_timeout=SCRAPER_IDLE_TIMEOUT, factory=None):
+        self.size = max(1, int(size))
+        self.idle_timeout = idle_timeout
+        self.factory = factory or create_scraper_session
+        self._idle = []  # (session, dernière utilisation), LIFO pour garder les sessions chaudes
+        self._count = 0  # sessions vivantes (inactives + empruntées)
+        self._cond = threading.Condition()
+        self.stats = {'created': 0, 'reused': 0, 'evicted': 0, 'discarded': 0}
+
+    def _evict_idle(self):
+        """Ferme les sessions inactives trop anciennes (verrou déjà pris)"""
+        now = time.monotonic()
+        keep = []
+        for session, last_used in self._idle:
+            if now - last_used > self.idle_timeout:
+                self._close_session(session)
+                self._count -= 1
+                self.stats['evicted'] += 1
+            else:
+                keep.append((session, last_used))
+        self._idle = keep
+
+    @staticmethod
+    def _close_session(session):
+        try:
+            session.close()
+        except Exception:
+            pass
+
+    def acquire(self, timeout=None):
+        """Emprunte une session (réutilisée si possible, sinon créée)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                self._evict_idle()
+                if self._idle:
+                    session, _ = self._idle.pop()
+                    self.stats['reused'] += 1
+                    return session
+                if self._count < self.size:
+                    self._count += 1
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("Aucune session scraper disponible")
+                self._cond.wait(remaining)
+
+        # Création hors verrou : le challenge Cloudflare peut être long
+        try:
+            session = self.factory()
+        except Exception:
+            with self._cond:
+                self._count -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self.stats['created'] += 1
+        return session
+
+    def release(self, session):
+        """Rend une session au pool"""
+        with self._cond:
+            self._idle.append((session, time.monotonic()))
+            self._cond.notify()
+
+    def discard(self, session):
+        """Jette une session en erreur (connexion cassée, clearance invalide...)"""
+        self._close_session(session)
+        with self._cond:
+            self._count -= 1
+            self.stats['discarded'] += 1
+            self._cond.notify()
+
+    @contextmanager
+    def session(self, timeout=None):
+        """Context manager : emprunte une session et la rend à la sortie"""
+        scraper = self.acquire(timeout)
+        try:
+            yield scraper
+        except Exception:
+            self.discard(scraper)
+            raise
+        else:
+            self.release(scraper)
+
+    def close(self):
+        """Ferme toutes les sessions inactives"""
+        with self._cond:
+            for session, _ in self._idle:
+                self._close_session(session)
+                self._count -= 1
+            self._idle = []
+            self._cond.notify_all()
+
+SCRAPER_POOL = ScraperPool()
+
+# Threads de téléchargement : deux pages (profil + roster) par chargement
+FETCH_EXECUTOR = ThreadPoolExecutor(max_workers=SCRAPER_POOL_SIZE * 2,
+                                    thread_name_prefix='swgoh-fetch')
+
+# ==================== LIMITATION DE DÉBIT ====================
+
+class ThrottledError(Exception):
+    """swgoh.gg limite nos requêtes (429/503 persistants ou circuit ouvert)"""
+
+class TokenBucket:
+    """Seau à jetons partagé par toutes les requêtes sortantes
+
+    `rate` jetons par seconde, jusqu'à `capacity` en réserve. Un Retry-After
+    reçu du serveur suspend tout le seau via `pause()`.
+    """
+
+    def __init__(self, rate=SCRAPE_RATE, capacity=SCRAPE_BURST):
+        if rate <= 0:
+            raise ValueError(f"Débit invalide ({rate} requêtes/s) : SCRAPE_RATE doit être > 0")
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def pause(self, seconds):
+        """Bloque toutes les requêtes pendant `seconds` secondes"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def acquire(self, deadline=None):
+        """Attend un jeton ; TimeoutError s'il n'arrive pas avant `deadline`"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+            if deadline is not None and time.monotonic() + wait > deadline:
+                raise TimeoutError("Pas de jeton disponible avant l'échéance")
+            time.sleep(wait)
+
+class CircuitBreaker:
+    """Coupe les requêtes après `threshold` échecs consécutifs
+
+    Fermé -> ouvert après trop d'échecs ; après `reset_timeout` secondes une
+    requête d'essai est autorisée (semi-ouvert), son succès referme le circuit.
+    """
+
+    def __init__(self, threshold=CIRCUIT_FAILURE_THRESHOLD, reset_timeout=CIRCUIT_RESET_TIMEOUT):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.state = 'closed'
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'open' and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+                return True
+            return self.state == 'closed'
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.state = 'closed'
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == 'half_open' or self.failures >= self.threshold:
+                self.state = 'open'
+                self._opened_at = time.monotonic()
+
+    def cancel_probe(self):
+        """Essai semi-ouvert abandonné avant d'atteindre swgoh.gg : le prochain appel pourra le tenter"""
+        with self._lock:
+            if self.state == 'half_open':
+                self.state = 'open'
+
+RATE_LIMITER = TokenBucket()
+SCRAPE_BREAKER = CircuitBreaker()
+
+# Statuts réessayés ; 429 et 503 signalent une limitation de débit
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+THROTTLE_STATUSES = {429, 503}
+
+def _parse_retry_after(value):
+    """Convertit un en-tête Retry-After (secondes ou date HTTP) en secondes"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+def _backoff_delay(attempt, retry_after=None):
+    """Délai avant la reprise n° `attempt` : Retry-After, sinon backoff exponentiel à jitter complet"""
+    if retry_after is not None:
+        return retry_after + random.uniform(0, SCRAPE_BACKOFF_BASE)
+    return random.uniform(0, min(SCRAPE_BACKOFF_MAX, SCRAPE_BACKOFF_BASE * 2 ** attempt))
+
+def scrape_get(url, deadline, headers=None):
+    """GET rythmé par le seau à jetons, avec reprises et disjoncteur
+
+    Lève ThrottledError si swgoh.gg continue de limiter après les reprises
+    ou si le circuit est ouvert ; les autres erreurs réseau sont relancées
+    après épuisement des reprises.
+    """
+    import requests
+
+    attempt = 0
+    while True:
+        if not SCRAPE_BREAKER.allow():
+            raise ThrottledError("Circuit ouvert : swgoh.gg indisponible, nouvel essai plus tard")
+        # Attentes locales (débit, sessions toutes occupées) : pas un échec de swgoh.gg
+        try:
+            RATE_LIMITER.acquire(deadline)
+        except TimeoutError:
+            SCRAPE_BREAKER.cancel_probe()
+            raise ThrottledError("Limite de débit atteinte avant l'échéance")
+        pool = SCRAPER_POOL  # la session est rendue au pool qui l'a prêtée
+        try:
+            scraper = pool.acquire(timeout=_remaining(deadline))
+        except TimeoutError:
+            SCRAPE_BREAKER.cancel_probe()
+            raise ThrottledError("Aucune session scraper disponible avant l'échéance")
+        except Exception:
+            SCRAPE_BREAKER.cancel_probe()
+            raise
+        
+        try:
+            timeout = _remaining(deadline)
+        except TimeoutError:
+            pool.release(scraper)
+            SCRAPE_BREAKER.cancel_probe()
+            raise ThrottledError("Échéance atteinte avant l'envoi de la requête")
+        
+        retry_after = None
+        try:
+            response = scraper.get(url, timeout=timeout, headers=headers or {})
+        except Exception as e:
+            # Toute erreur de la requête (réseau, challenge Cloudflare...) est un échec :
+            # un essai semi-ouvert se termine toujours par record_success ou record_failure
+            pool.discard(scraper)
+            SCRAPE_BREAKER.record_failure()
+            if attempt >= SCRAPE_MAX_RETRIES or not isinstance(e, (requests.RequestException, OSError)):
+                raise
+            error = e
+        else:
+            pool.release(scraper)
+            if response.status_code not in RETRY_STATUSES:
+                SCRAPE_BREAKER.record_success()
+                return response
+            SCRAPE_BREAKER.record_failure()
+            retry_after = _parse_retry_after(response.headers.get('Retry-After'))
+            if retry_after is not None:
+                RATE_LIMITER.pause(retry_after)
+            error = None
+            if attempt >= SCRAPE_MAX_RETRIES:
+                if response.status_code in THROTTLE_STATUSES:
+                    raise ThrottledError(f"swgoh.gg limite les requêtes (HTTP {response.status_code})")
+                return response
+        
+        delay = _backoff_delay(attempt, retry_after)
+        if time.monotonic() + delay > deadline:
+            if error is not None:
+                raise error
+            raise ThrottledError("Reprise impossible avant l'échéance")
+        print(f"⏳ Nouvel essai dans {delay:.1f}s ({url})")
+        time.sleep(delay)
+        attempt += 1
+
+# ==================== CACHE HTTP ====================
+
+class ResponseCache:
+    """Cache persistant des réponses HTTP, indexé par URL
+
+    Les corps sont stockés compressés (zlib) avec ETag / Last-Modified pour
+    la revalidation conditionnelle. Le résultat du parsing est conservé à
+    côté du corps : un hit frais ou un 304 évite à la fois le téléchargement
+    et le parsing. La taille totale est bornée par éviction LRU.
+    """
+
+    def __init__(self, path=HTTP_CACHE_PATH, ttl=HTTP_CACHE_TTL, max_bytes=HTTP_CACHE_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _db(self):
+        """Connexion ouverte au premier usage (verrou déjà pris)"""
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute('''CREATE TABLE IF NOT EXISTS http_cache (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                body BLOB,
+                body_size INTEGER,
+                parsed TEXT,
+                parser_version TEXT,
+                fetched_at REAL,
+                expires_at REAL,
+                last_access REAL
+            )''')
+            self._conn.execute('''CREATE INDEX IF NOT EXISTS idx_http_cache_last_access
+                                  ON http_cache (last_access)''')
+            self._conn.commit()
+        return self._conn
+
+    def get(self, url):
+        """Renvoie l'entrée en cache (dict) ou None"""
+        with self._lock:
+            db = self._db()
+            row = db.execute('SELECT * FROM http_cache WHERE url = ?', (url,)).fetchone()
+            if not row:
+                return None
+            db.execute('UPDATE http_cache SET last_access = ? WHERE url = ?', (time.time(), url))
+            db.commit()
+        entry = dict(row)
+        entry['fresh'] = entry['expires_at'] > time.time()
+        if entry['parser_version'] != parsed_cache_version():
+            entry['parsed'] = None
+        elif entry['parsed'] is not None:
+            entry['parsed'] = json.loads(entry['parsed'])
+        return entry
+
+    @staticmethod
+    def text(entry):
+        """Décompresse le corps d'une entrée"""
+        return zlib.decompress(entry['body']).decode('utf-8')
+
+    def store(self, url, text, etag=None, last_modified=None, parsed=None):
+        """Enregistre une réponse 200 (remplace l'entrée existante)"""
+        body = zlib.compress(text.encode('utf-8'))
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute('''INSERT OR REPLACE INTO http_cache
+                          (url, etag, last_modified, body, body_size, parsed, parser_version,
+                           fetched_at, expires_at, last_access)
+                          VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                       (url, etag, last_modified, body, len(body),
+                        json.dumps(parsed) if parsed is not None else None, parsed_cache_version(),
+                        now, now + self.ttl, now))
+            self._evict(db)
+            db.commit()
+
+    def store_parsed(self, url, parsed):
+        """Attache le résultat du parsing à une entrée existante"""
+        with self._lock:
+            db = self._db()
+            db.execute('UPDATE http_cache SET parsed = ?, parser_version = ? WHERE url = ?',
+                       (json.dumps(parsed), parsed_cache_version(), url))
+            db.commit()
+
+    def refresh(self, url):
+        """Prolonge la fraîcheur d'une entrée après un 304 Not Modified"""
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute('''UPDATE http_cache SET fetched_at = ?, expires_at = ?, last_access = ?
+                          WHERE url = ?''', (now, now + self.ttl, now, url))
+            db.commit()
+
+    def _evict(self, db):
+        """Supprime les entrées les moins récemment utilisées au-delà de max_bytes"""
+        total = db.execute('SELECT COALESCE(SUM(body_size), 0) FROM http_cache').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for row in db.execute('SELECT url, body_size FROM http_cache ORDER BY last_access ASC').fetchall():
+            if total <= self.max_bytes:
+                break
+            db.execute('DELETE FROM http_cache WHERE url = ?', (row['url'],))
+            total -= row['body_size']
+
+    def clear(self):
+        """Vide le cache"""
+        with self._lock:
+            db = self._db()
+            db.execute('DELETE FROM http_cache')
+            db.commit()
+
+HTTP_CACHE = ResponseCache() if HTTP_CACHE_ENABLED else None
+
 # ==================== API HELPERS ====================
 
 def generate_demo_data(ally_code):
@@ -348,218 +1629,1198 @@ def generate_demo_data(ally_code):
         }
     }
 
-def fetch_player_data(ally_code):
-    """Récupère les données du joueur via SWGOH.gg avec cloudscraper"""
+def _remaining(deadline):
+    """Temps restant (secondes) avant l'échéance globale d'un chargement"""
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError("Échéance de récupération dépassée")
+    return remaining
+
+def _fetch_page(url, deadline):
+    """Télécharge une page avec une session du pool, dans le budget restant
+
+    Passe par le cache HTTP : une entrée fraîche est servie sans réseau, une
+    entrée expirée est revalidée (If-None-Match / If-Modified-Since). Renvoie
+    un dict avec `status_code`, `text`, `parsed` (résultat du parsing en cache
+    ou None), `cache` ('hit', 'revalidated', 'miss' ou 'off') et `elapsed`.
+    """
+    start = time.monotonic()
+    entry = HTTP_CACHE.get(url) if HTTP_CACHE else None
+    
+    if entry and entry['fresh']:
+        return {
+            'status_code': 200,
+            'text': None if entry['parsed'] is not None else ResponseCache.text(entry),
+            'parsed': entry['parsed'],
+            'cache': 'hit',
+            'elapsed': time.monotonic() - start
+        }
+    
+    headers = {}
+    if entry:
+        if entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+    
+    response = scrape_get(url, deadline, headers=headers)
+    
+    if response.status_code == 304 and entry:
+        HTTP_CACHE.refresh(url)
+        return {
+            'status_code': 200,
+            'text': None if entry['parsed'] is not None else ResponseCache.text(entry),
+            'parsed': entry['parsed'],
+            'cache': 'revalidated',
+            'elapsed': time.monotonic() - start
+        }
+    
+    if response.status_code == 200 and HTTP_CACHE:
+        HTTP_CACHE.store(url, response.text,
+                         etag=response.headers.get('ETag'),
+                         last_modified=response.headers.get('Last-Modified'))
+    
+    return {
+        'status_code': response.status_code,
+        'text': response.text,
+        'parsed': None,
+        'cache': 'miss' if HTTP_CACHE else 'off',
+        'elapsed': time.monotonic() - start
+    }
+
+# Relique dans l'API : 1 = verrouillée, 2 = R0, 3 = R1, ... 11 = R9
+API_RELIC_OFFSET = 2
+
+def _api_stat_value(stat):
+    """Valeur d'une stat de mod : display_value ("5.88%", "1,234") sinon value"""
+    display = stat.get('display_value')
+    if display:
+        try:
+            return float(str(display).replace('%', '').replace(',', '').strip())
+        except ValueError:
+            pass
+    return stat.get('value', 0)
+
+def _map_api_mod(mod):
+    """Mod de l'API swgoh.gg -> format attendu par save_mod"""
+    primary = mod.get('primary_stat') or {}
+    return {
+        'id': mod.get('id'),
+        'slot': mod.get('slot'),
+        'set': mod.get('set'),
+        'level': mod.get('level'),
+        'tier': mod.get('tier'),
+        'rarity': mod.get('rarity'),
+        'primary_stat': {'name': primary.get('name', 'Unknown'), 'value': _api_stat_value(primary)},
+        'secondary_stats': [
+            {'name': stat.get('name', ''), 'value': _api_stat_value(stat), 'rolls': stat.get('roll')}
+            for stat in mod.get('secondary_stats') or []
+        ]
+    }
+
+def map_player_payload(payload, ally_code):
+    """Réponse JSON de /api/player/<code>/ -> format de save_player_data
+
+    Unités (niveau, gear, relique, zetas, drapeaux) et mods complets, ces
+    derniers rattachés au personnage qui les porte.
+    """
+    mods_by_unit = defaultdict(list)
+    for mod in payload.get('mods') or []:
+        mods_by_unit[mod.get('character')].append(_map_api_mod(mod))
+    
+    roster = []
+    for unit in payload.get('units') or []:
+        data = unit.get('data', unit)
+        base_id = data['base_id']
+        roster.append({
+            'base_id': base_id,
+            'name': data.get('name') or base_id,
+            'level': data.get('level', 1),
+            'gear_level': data.get('gear_level', 1),
+            'relic_tier': max(0, (data.get('relic_tier') or 0) - API_RELIC_OFFSET),
+            'power': data.get('power', 0),
+            'galactic_power': data.get('power', 0),
+            'combat_type': data.get('combat_type', 1),
+            'has_ultimate': bool(data.get('has_ultimate')),
+            'is_galactic_legend': bool(data.get('is_galactic_legend')),
+            'zeta_count': len(data.get('zeta_abilities') or []),
+            'mods': mods_by_unit.get(base_id, [])
+        })
+    
+    info = payload.get('data') or {}
+    return {
+        'name': info.get('name', 'Unknown'),
+        'level': info.get('level', 85),
+        'guild_name': info.get('guild_name') or 'No Guild',
+        'ally_code': ally_code,
+        'galactic_power': info.get('galactic_power', 0),
+        'character_galactic_power': info.get('character_galactic_power', 0),
+        'ship_galactic_power': info.get('ship_galactic_power', 0),
+        'roster': roster
+    }
+
+def _fetch_player_json(clean_code, deadline, timings):
+    """Récupère le joueur via l'endpoint JSON ; renvoie (données, état du cache) ou None"""
+    url = f"{SWGOH_GG_API_URL}/player/{clean_code}/"
+    page = _fetch_page(url, deadline)
+    timings['fetch_json'] = round(page['elapsed'] * 1000, 1)
+    if page['status_code'] != 200:
+        print(f"⚠️  Endpoint JSON: HTTP {page['status_code']}")
+        return None
+    
+    phase_start = time.monotonic()
+    player = page['parsed']
+    if player is None:
+        player = map_player_payload(json.loads(page['text']), clean_code)
+        if HTTP_CACHE:
+            HTTP_CACHE.store_parsed(url, player)
+    timings['parse_json'] = round((time.monotonic() - phase_start) * 1000, 1)
+    return player, page['cache']
+
+def _stream_roster(html, roster_url, timings):
+    """Roster en flux : mesure le temps de parsing seul, met en cache une fois la page lue"""
+    roster = []
+    elapsed = 0.0
+    characters = iter_character_roster(html)
+    while True:
+        phase_start = time.monotonic()
+        character = next(characters, None)
+        elapsed += time.monotonic() - phase_start
+        if character is None:
+            break
+        roster.append(character)
+        yield character
+    
+    timings['parse_roster'] = round(elapsed * 1000, 1)
+    print(f"✅ {len(roster)} personnages extraits")
+    if HTTP_CACHE:
+        HTTP_CACHE.store_parsed(roster_url, roster)
+
+def fetch_player_data(ally_code, allow_demo=True, progress=None, stream_roster=False):
+    """Récupère les données du joueur via SWGOH.gg avec cloudscraper
+
+    L'endpoint JSON /api/player/<code>/ est essayé d'abord (unités et mods
+    complets, sans parsing HTML) ; en cas d'échec on se replie sur le
+    scraping des pages : profil et roster sont téléchargés en parallèle sous une même
+    échéance (FETCH_DEADLINE) ; le parsing du profil se fait pendant le
+    téléchargement du roster. Les durées de chaque phase sont renvoyées
+    dans la clé `timings` (en millisecondes).
+
+    En cas d'échec (profil ou roster indisponible), renvoie les données de
+    démonstration, ou None si `allow_demo` est faux. Si swgoh.gg limite les requêtes (ThrottledError),
+    renvoie toujours None. `progress(phase, pourcentage)` est appelé à chaque
+    changement de phase.
+
+    Avec `stream_roster`, le roster renvoyé est un générateur parsé au fur
+    et à mesure de sa consommation (par save_player_data), et
+    `timings['parse_roster']` n'est renseigné qu'une fois la page lue.
+    """
+    progress = progress or (lambda phase, percent: None)
     try:
         clean_code = ally_code.replace('-', '').strip()
         print(f"\n{'='*60}")
         print(f"🔍 Récupération des données pour: {clean_code}")
         print(f"{'='*60}")
         
-        # Création du scraper cloudflare
-        scraper = cloudscraper.create_scraper(
-            browser={
-                'browser': 'chrome',
-                'platform': 'windows',
-                'mobile': False
-            }
-        )
+        start = time.monotonic()
+        deadline = start + FETCH_DEADLINE
+        timings = {}
         
-        # URL du profil
-        profile_url = f"https://swgoh.gg/p/{clean_code}/"
+        progress('fetching', 10)
+        if PLAYER_JSON_ENABLED:
+            try:
+                found = _fetch_player_json(clean_code, deadline, timings)
+            except ThrottledError:
+                raise
+            except Exception as e:
+                print(f"⚠️  Endpoint JSON inutilisable ({e.__class__.__name__}: {e})")
+                found = None
+            
+            if found:
+                player, cache_state = found
+                timings['total'] = round((time.monotonic() - start) * 1000, 1)
+                print(f"✅ {len(player['roster'])} unités via l'API JSON (cache: {cache_state})")
+                print(f"⏱️  Temps total: {timings['total']} ms")
+                print(f"{'='*60}\n")
+                return {
+                    'data': player,
+                    'timings': timings,
+                    'cache': {'player': cache_state},
+                    'source': 'json'
+                }
+            print("↩️  Repli sur le scraping HTML")
+        
+        profile_url = f"{SWGOH_GG_BASE_URL}/p/{clean_code}/"
+        roster_url = f"{SWGOH_GG_BASE_URL}/p/{clean_code}/characters/"
         print(f"📡 URL: {profile_url}")
         
-        # Récupération de la page
-        response = scraper.get(profile_url, timeout=20)
+        # Lancement des deux téléchargements en parallèle
+        profile_future = FETCH_EXECUTOR.submit(_fetch_page, profile_url, deadline)
+        roster_future = FETCH_EXECUTOR.submit(_fetch_page, roster_url, deadline)
         
-        if response.status_code != 200:
-            print(f"⚠️  Erreur HTTP {response.status_code}")
+        profile_page = profile_future.result(timeout=_remaining(deadline))
+        timings['fetch_profile'] = round(profile_page['elapsed'] * 1000, 1)
+        
+        if profile_page['status_code'] != 200:
+            roster_future.cancel()
+            print(f"⚠️  Erreur HTTP {profile_page['status_code']}")
+            if not allow_demo:
+                return None
             print("📊 Utilisation des données de démonstration")
             return generate_demo_data(clean_code)
         
-        print("✅ Page récupérée avec succès")
-        
-        # Parse la page avec BeautifulSoup
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # === EXTRACTION DU NOM DU JOUEUR ===
-        player_name = "Unknown Player"
-        name_elem = soup.find('h5', class_='pull-left')
-        if name_elem:
-            player_name = name_elem.get_text(strip=True)
-            print(f"👤 Joueur: {player_name}")
-        
-        # === EXTRACTION DE LA GUILDE ===
-        guild_name = "No Guild"
-        guild_elem = soup.find('a', href=re.compile(r'/g/'))
-        if guild_elem:
-            guild_name = guild_elem.get_text(strip=True)
-            print(f"🏰 Guilde: {guild_name}")
-        
-        # === EXTRACTION DU GALACTIC POWER ===
-        gp_total = 0
-        gp_char = 0
-        gp_ship = 0
-        
-        # Méthode 1 : via les divs profile-stat
-        stats_divs = soup.find_all('div', class_='profile-stat')
-        for stat_div in stats_divs:
-            label_div = stat_div.find('div', class_='stat-label')
-            value_div = stat_div.find('div', class_='stat-value')
-            
-            if label_div and value_div:
-                label_text = label_div.get_text(strip=True).lower()
-                value_text = value_div.get_text(strip=True).replace(',', '').replace(' ', '')
-                
-                try:
-                    value_int = int(re.sub(r'[^\d]', '', value_text))
-                    
-                    if 'galactic power' in label_text:
-                        if 'character' in label_text:
-                            gp_char = value_int
-                        elif 'ship' in label_text:
-                            gp_ship = value_int
-                        else:
-                            gp_total = value_int
-                except (ValueError, AttributeError):
-                    pass
+        print(f"✅ Page récupérée avec succès (cache: {profile_page['cache']})")
         
-        # Si pas trouvé, calculer le total
-        if gp_total == 0 and (gp_char > 0 or gp_ship > 0):
-            gp_total = gp_char + gp_ship
+        # Parsing du profil pendant que le roster se télécharge
+        progress('parsing', 30)
+        phase_start = time.monotonic()
+        profile = profile_page['parsed']
+        if profile is None:
+            profile = parse_profile_page(profile_page['text'])
+            if HTTP_CACHE:
+                HTTP_CACHE.store_parsed(profile_url, profile)
+        timings['parse_profile'] = round((time.monotonic() - phase_start) * 1000, 1)
         
-        print(f"⚡ GP Total: {gp_total:,}")
-        print(f"👥 GP Personnages: {gp_char:,}")
-        print(f"🚀 GP Vaisseaux: {gp_ship:,}")
+        print(f"⚡ GP Total: {profile['galactic_power']:,}")
+        print(f"👥 GP Personnages: {profile['character_galactic_power']:,}")
+        print(f"🚀 GP Vaisseaux: {profile['ship_galactic_power']:,}")
         
         # === RÉCUPÉRATION DU ROSTER ===
         print(f"\n📋 Récupération du roster de personnages...")
-        roster_url = f"https://swgoh.gg/p/{clean_code}/characters/"
-        roster_response = scraper.get(roster_url, timeout=20)
+        roster_page = roster_future.result(timeout=_remaining(deadline))
+        timings['fetch_roster'] = round(roster_page['elapsed'] * 1000, 1)
         
-        roster = []
-        if roster_response.status_code == 200:
-            print("✅ Page roster récupérée")
-            roster = parse_character_roster(roster_response.text)
-            print(f"✅ {len(roster)} personnages extraits")
+        # Sans roster, le chargement échoue : un roster vide ferait supprimer toutes les unités
+        if roster_page['status_code'] != 200:
+            print(f"⚠️  Impossible de récupérer le roster (HTTP {roster_page['status_code']})")
+            if not allow_demo:
+                return None
+            print("📊 Utilisation des données de démonstration")
+            return generate_demo_data(clean_code)
+        
+        print(f"✅ Page roster récupérée (cache: {roster_page['cache']})")
+        progress('parsing', 50)
+        phase_start = time.monotonic()
+        roster = roster_page['parsed']
+        if roster is None and stream_roster:
+            print("📋 Roster parsé en flux pendant la sauvegarde")
+            roster = _stream_roster(roster_page['text'], roster_url, timings)
         else:
-            print(f"⚠️  Impossible de récupérer le roster (HTTP {roster_response.status_code})")
+            if roster is None:
+                roster = parse_roster_page(roster_page['text'], timeout=_remaining(deadline))
+                if HTTP_CACHE:
+                    HTTP_CACHE.store_parsed(roster_url, roster)
+            timings['parse_roster'] = round((time.monotonic() - phase_start) * 1000, 1)
+            print(f"✅ {len(roster)} personnages extraits")
         
+        timings['total'] = round((time.monotonic() - start) * 1000, 1)
+        print(f"⏱️  Temps total: {timings['total']} ms")
         print(f"{'='*60}\n")
         
         # Retour au format attendu
         return {
             'data': {
-                'name': player_name,
+                'name': profile['name'],
                 'level': 85,
-                'guild_name': guild_name,
+                'guild_name': profile['guild_name'],
                 'ally_code': clean_code,
-                'galactic_power': gp_total,
-                'character_galactic_power': gp_char,
-                'ship_galactic_power': gp_ship,
+                'galactic_power': profile['galactic_power'],
+                'character_galactic_power': profile['character_galactic_power'],
+                'ship_galactic_power': profile['ship_galactic_power'],
                 'roster': roster
+            },
+            'timings': timings,
+            'cache': {'profile': profile_page['cache'], 'roster': roster_page['cache']},
+            'source': 'html'
+        }
+        
+    except ThrottledError as e:
+        # Jamais de données de démo ici : on garderait un faux roster à la place du vrai
+        print(f"⛔ {e}")
+        return None
+    except Exception as e:
+        print(f"❌ Erreur lors du scraping: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        if not allow_demo:
+            return None
+        print("📊 Utilisation des données de démonstration")
+        return generate_demo_data(ally_code.replace('-', ''))
+
+def iter_batches(iterable, size):
+    """Regroupe un itérable (ex: roster en flux) en listes de `size` éléments"""
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+# Colonnes écrites par la synchronisation, dans l'ordre des lignes (clé en tête)
+CHARACTER_COLUMNS = ('ally_code', 'base_id', 'name', 'level', 'gear_level', 'relic_tier',
+                     'power', 'is_zeta', 'galactic_power')
+MOD_COLUMNS = ('id', 'ally_code', 'character_id', 'slot', 'set_type', 'level', 'tier', 'rarity',
+               'primary_stat_type', 'primary_stat_value', 'speed', 'offense', 'offense_percent',
+               'protection', 'protection_percent', 'health', 'health_percent', 'defense',
+               'defense_percent', 'potency', 'tenacity', 'critical_chance', 'is_equipped')
+
+def _upsert_sql(table, columns, key):
+    """INSERT ... ON CONFLICT(key) DO UPDATE : met à jour la ligne en place (pas de nouvel id)"""
+    updates = ', '.join(f'{column} = excluded.{column}' for column in columns if column not in key)
+    return (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+            f"ON CONFLICT ({', '.join(key)}) DO UPDATE SET {updates}")
+
+CHARACTER_UPSERT_SQL = _upsert_sql('characters', CHARACTER_COLUMNS, ('ally_code', 'base_id'))
+MOD_UPSERT_SQL = _upsert_sql('mods', MOD_COLUMNS, ('id',))
+
+def character_row(ally_code, unit):
+    """Personnage du roster -> ligne de CHARACTER_UPSERT_SQL"""
+    return (ally_code,
+            unit.get('base_id'),
+            unit.get('name'),
+            unit.get('level', 1),
+            unit.get('gear_level', 1),
+            unit.get('relic_tier', 0),
+            unit.get('power', 0),
+            unit.get('zeta_count', 0),
+            unit.get('galactic_power', 0))
+
+def _same_row(stored, row):
+    """Compare une ligne lue en base à une ligne à écrire
+
+    Tient compte de l'affinité des colonnes SQLite : 1 écrit dans une
+    colonne TEXT est relu '1', 6 dans une colonne REAL est relu 6.0.
+    """
+    for old, new in zip(stored, row):
+        if old == new:
+            continue
+        if old is None or new is None or str(old) != str(new):
+            return False
+    return True
+
+def new_change_set():
+    """Changements d'un roster entre deux synchronisations"""
+    return {
+        'new_units': [],
+        'removed_units': [],
+        'gear_ups': [],      # {'base_id', 'from', 'to'}
+        'relic_ups': [],     # {'base_id', 'from', 'to'}
+        'updated_units': [],  # autre changement (puissance, niveau, zetas...)
+        'new_mods': [],
+        'removed_mods': [],
+        'moved_mods': [],    # {'id', 'from', 'to'} (personnage équipé)
+        'updated_mods': [],
+    }
+
+def _diff_character(changes, stored, row):
+    base_id = row[1]
+    if stored is None:
+        changes['new_units'].append(base_id)
+        return
+    gear_index = CHARACTER_COLUMNS.index('gear_level')
+    relic_index = CHARACTER_COLUMNS.index('relic_tier')
+    old_gear, old_relic = stored[gear_index], stored[relic_index]
+    new_gear, new_relic = row[gear_index], row[relic_index]
+    if (new_gear or 0) > (old_gear or 0):
+        changes['gear_ups'].append({'base_id': base_id, 'from': old_gear, 'to': new_gear})
+    if (new_relic or 0) > (old_relic or 0):
+        changes['relic_ups'].append({'base_id': base_id, 'from': old_relic, 'to': new_relic})
+    changes['updated_units'].append(base_id)
+
+def _diff_mod(changes, stored, row):
+    mod_id = row[0]
+    if stored is None:
+        changes['new_mods'].append(mod_id)
+        return
+    character_index = MOD_COLUMNS.index('character_id')
+    if stored[character_index] != row[character_index]:
+        changes['moved_mods'].append({'id': mod_id, 'from': stored[character_index], 'to': row[character_index]})
+    else:
+        changes['updated_mods'].append(mod_id)
+
+def save_player_data(ally_code, data):
+    """Sauvegarde les données du joueur dans la base de données
+
+    Synchronisation incrémentale : les lignes existantes du joueur sont
+    comparées au nouveau roster et seules les lignes nouvelles ou modifiées
+    sont écrites (upsert sur (ally_code, base_id) et sur l'id du mod), les
+    personnages et mods absents sont supprimés, sauf si le roster n'a aucun
+    personnage (rien n'est alors supprimé). Un roster inchangé ne réécrit
+    que player_info.
+
+    Sans catalogue des unités, les base_id du scraping HTML (déduits des
+    portraits) ne sont pas ceux de l'API JSON : quand la source change, les
+    rosters ne sont pas comparés. Un roster HTML ne remplace pas un roster
+    JSON enregistré (seul player_info est mis à jour) ; un roster JSON
+    remplace un roster HTML sans signaler de changements.
+
+    Le roster peut être une liste ou un générateur (iter_character_roster) :
+    il est lu en entier (parsing compris) avant la première écriture, pour
+    ne pas garder le verrou d'écriture de SQLite pendant le parsing, puis
+    écrit par lots de SAVE_BATCH_SIZE personnages (personnages + mods avec
+    executemany). Tout est fait dans une seule transaction : les lecteurs
+    voient l'ancien roster jusqu'au commit, jamais un roster à moitié
+    écrit. Renvoie les statistiques d'écriture
+    (lignes, durée, lignes/s) et les changements (`changes`, voir
+    new_change_set), False en cas d'erreur.
+    """
+    conn = get_db_connection()
+    c = conn.cursor()
+    
+    try:
+        player_data = data.get('data', data)
+        # Parsing du roster en flux terminé avant d'ouvrir la transaction d'écriture
+        roster = list(player_data.get('roster', []))
+        start = time.perf_counter()
+        
+        # Source du roster : sans catalogue, base_id comparables seulement à source égale
+        source = data.get('source')
+        row = c.execute('SELECT roster_source FROM player_info WHERE ally_code = ?', (ally_code,)).fetchone()
+        stored_source = row[0] if row else None
+        switched = bool(source and stored_source and source != stored_source and not len(UNIT_CATALOGUE))
+        keep_roster = switched and stored_source == 'json'
+        if keep_roster:
+            print(f"⚠️  Roster {source} sans catalogue : roster {stored_source} enregistré conservé")
+            roster = []
+        elif switched:
+            print(f"🔁 Roster {stored_source} remplacé par le roster {source}, sans comparaison")
+        
+        # Sauvegarde infos joueur
+        c.execute('''INSERT OR REPLACE INTO player_info 
+                     (ally_code, name, level, guild_name, galactic_power, character_gp, ship_gp, last_updated,
+                      roster_source)
+                     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                  (ally_code, 
+                   player_data.get('name', 'Unknown'),
+                   player_data.get('level', 85),
+                   player_data.get('guild_name', 'No Guild'),
+                   player_data.get('galactic_power', 0),
+                   player_data.get('character_galactic_power', 0),
+                   player_data.get('ship_galactic_power', 0),
+                   datetime.now(),
+                   stored_source if keep_roster else source or stored_source))
+        
+        # État actuel du joueur, comparé ligne à ligne au nouveau roster
+        stored_characters = {row[1]: tuple(row) for row in c.execute(
+            f"SELECT {', '.join(CHARACTER_COLUMNS)} FROM characters WHERE ally_code = ?", (ally_code,))}
+        stored_mods = {row[0]: tuple(row) for row in c.execute(
+            f"SELECT {', '.join(MOD_COLUMNS)} FROM mods WHERE ally_code = ?", (ally_code,))}
+        changes = new_change_set()
+        seen_characters = set()
+        seen_mods = set()
+        history_units = []  # (base_id, gp, gear, relic)
+        
+        # Sauvegarde personnages et mods équipés, par lots
+        char_count = mod_count = written = 0
+        for batch in iter_batches(roster, SAVE_BATCH_SIZE):
+            characters = []
+            mods = []
+            for unit in batch:
+                if unit.get('combat_type') != 1:  # Personnages uniquement
+                    continue
+                row = character_row(ally_code, unit)
+                char_count += 1
+                seen_characters.add(row[1])
+                history_units.append((row[1], row[8], row[4], row[5]))
+                stored = stored_characters.get(row[1])
+                if stored is None or not _same_row(stored, row):
+                    _diff_character(changes, stored, row)
+                    characters.append(row)
+                for mod in unit.get('mods', []):
+                    row = mod_row(ally_code, unit.get('base_id'), mod)
+                    mod_count += 1
+                    seen_mods.add(row[0])
+                    stored = stored_mods.get(row[0])
+                    if stored is None or not _same_row(stored, row):
+                        _diff_mod(changes, stored, row)
+                        mods.append(row)
+            c.executemany(CHARACTER_UPSERT_SQL, characters)
+            c.executemany(MOD_UPSERT_SQL, mods)
+            written += len(characters) + len(mods)
+        
+        # Personnages et mods disparus du roster. Un roster sans personnage (page
+        # illisible, parsing cassé) ne vaut pas suppression : l'existant est gardé.
+        if seen_characters:
+            changes['removed_units'] = sorted(set(stored_characters) - seen_characters)
+            changes['removed_mods'] = sorted(set(stored_mods) - seen_mods)
+        elif stored_characters and not keep_roster:
+            print("⚠️  Roster vide : personnages et mods enregistrés conservés")
+        c.executemany('DELETE FROM characters WHERE ally_code = ? AND base_id = ?',
+                      [(ally_code, base_id) for base_id in changes['removed_units']])
+        c.executemany('DELETE FROM mods WHERE id = ?', [(mod_id,) for mod_id in changes['removed_mods']])
+        written += len(changes['removed_units']) + len(changes['removed_mods'])
+        
+        if any(changes[key] for key in ('new_mods', 'removed_mods', 'moved_mods', 'updated_mods')):
+            bump_mod_inventory_version(c, ally_code)
+        if switched:
+            changes = new_change_set()  # base_id d'un autre schéma : rien de comparable
+        if HISTORY_ENABLED:
+            record_history(c, ally_code, player_data, history_units, changes,
+                           first_load=not stored_characters or switched)
+        refresh_player_summary(c, ally_code)
+        
+        conn.commit()
+        
+        elapsed = time.perf_counter() - start
+        rows = 1 + written
+        stats = {
+            'characters': char_count,
+            'mods': mod_count,
+            'rows': rows,
+            'save_ms': round(elapsed * 1000, 1),
+            'rows_per_s': round(rows / elapsed) if elapsed > 0 else None,
+            'changes': changes
+        }
+        print(f"💾 {char_count} personnages et {mod_count} mods synchronisés, {rows} lignes écrites "
+              f"en {stats['save_ms']} ms ({stats['rows_per_s']} lignes/s)")
+        return stats
+    except Exception as e:
+        print(f"❌ Erreur sauvegarde: {e}")
+        import traceback
+        traceback.print_exc()
+        conn.rollback()
+        return False
+    finally:
+        conn.close()
+
+# Stats secondaires -> colonnes de la table mods ('%' : variante en pourcentage)
+MOD_STAT_COLUMNS = ('speed', 'offense', 'protection', 'health', 'defense', 'potency', 'tenacity', 'critical chance')
+MOD_PERCENT_COLUMNS = {'offense', 'protection', 'health', 'defense'}
+
+# Colonnes des stats secondaires, dans l'ordre de MOD_COLUMNS
+MOD_SECONDARY_COLUMNS = ('speed', 'offense', 'offense_percent', 'protection', 'protection_percent',
+                         'health', 'health_percent', 'defense', 'defense_percent',
+                         'potency', 'tenacity', 'critical_chance')
+
+@lru_cache(maxsize=256)
+def _mod_stat_column(stat_name):
+    """Colonne de la table mods correspondant au nom d'une stat secondaire"""
+    stat_name = stat_name.lower()
+    for stat in MOD_STAT_COLUMNS:
+        if stat in stat_name:
+            column = stat.replace(' ', '_')
+            if '%' in stat_name and stat in MOD_PERCENT_COLUMNS:
+                column += '_percent'
+            return column
+    return None
+
+def mod_row(ally_code, character_id, mod_data, is_equipped=True):
+    """Mod -> ligne de MOD_UPSERT_SQL"""
+    secondary_stats = {}
+    for stat in mod_data.get('secondary_stats', []):
+        column = _mod_stat_column(stat.get('name', ''))
+        if column:
+            secondary_stats[column] = stat.get('value', 0)
+    
+    primary_stat = mod_data.get('primary_stat', {})
+    return (mod_data.get('id') or f"{ally_code}_{character_id}_{mod_data.get('slot')}",
+            ally_code,
+            character_id if is_equipped else None,
+            mod_data.get('slot', 1),
+            mod_data.get('set', 1),
+            mod_data.get('level', 1),
+            mod_data.get('tier', 1),
+            mod_data.get('rarity', 5),
+            primary_stat.get('name', 'Unknown'),
+            primary_stat.get('value', 0),
+            *(secondary_stats.get(column, 0) for column in MOD_SECONDARY_COLUMNS),
+            1 if is_equipped else 0)
+
+def save_mod(cursor, ally_code, character_id, mod_data, is_equipped=True):
+    """Sauvegarde un mod dans la base de données"""
+    cursor.execute(MOD_UPSERT_SQL, mod_row(ally_code, character_id, mod_data, is_equipped))
+
+def save_mods(cursor, ally_code, mods, batch_size=None):
+    """Sauvegarde des mods par lots (executemany) ; renvoie le nombre de mods
+
+    `mods` est un itérable de (character_id, mod_data, is_equipped). Le
+    commit est laissé à l'appelant, ainsi que refresh_player_summary et
+    bump_mod_inventory_version.
+    """
+    count = 0
+    for batch in iter_batches(mods, batch_size or SAVE_BATCH_SIZE):
+        cursor.executemany(MOD_UPSERT_SQL, [mod_row(ally_code, character_id, mod_data, is_equipped)
+                                            for character_id, mod_data, is_equipped in batch])
+        count += len(batch)
+    return count
+
+# ==================== RÉSUMÉ DU DASHBOARD ====================
+
+# Nombre de personnages du top GP affiché sur le dashboard
+DASHBOARD_TOP_N = 10
+
+def refresh_player_summary(cursor, ally_code):
+    """Recalcule la ligne player_summary d'un joueur, dans la transaction de l'appelant
+
+    Les agrégats passent par les index de characters et mods (quelques
+    centaines de lignes par joueur) : le coût est payé une fois à
+    l'écriture au lieu de chaque affichage du dashboard.
+    """
+    player = cursor.execute('''SELECT name, level, guild_name, galactic_power, last_updated
+                               FROM player_info WHERE ally_code = ?''', (ally_code,)).fetchone()
+    if not player:
+        cursor.execute('DELETE FROM player_summary WHERE ally_code = ?', (ally_code,))
+        return
+    
+    relics = dict(cursor.execute('''SELECT COALESCE(relic_tier, 0) AS tier, COUNT(*) FROM characters
+                                    WHERE ally_code = ? GROUP BY tier''', (ally_code,)).fetchall())
+    total_mods = cursor.execute('SELECT COUNT(*) FROM mods WHERE ally_code = ?', (ally_code,)).fetchone()[0]
+    top_chars = [{'name': name, 'gp': gp} for name, gp in cursor.execute(
+        '''SELECT name, galactic_power FROM characters WHERE ally_code = ?
+           ORDER BY galactic_power DESC LIMIT ?''', (ally_code, DASHBOARD_TOP_N))]
+    
+    cursor.execute('''INSERT OR REPLACE INTO player_summary
+                      (ally_code, name, level, guild_name, galactic_power, total_characters, relics_r5_plus,
+                       relic_distribution, total_mods, top_characters, updated_at)
+                      VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                   (ally_code, player[0], player[1], player[2], player[3],
+                    sum(relics.values()),
+                    sum(count for tier, count in relics.items() if tier >= 5),
+                    json.dumps({str(tier): relics[tier] for tier in sorted(relics)}),
+                    total_mods,
+                    json.dumps(top_chars),
+                    player[4]))
+
+# ==================== HISTORIQUE ====================
+
+DAY = 86400
+
+def pack_roster_snapshot(units):
+    """[(unit_id, gp, gear, relic)] -> blob compact
+
+    Colonnes d'entiers 32 bits little-endian (ids triés encodés en delta,
+    puis GP, gear, relic), compressées avec zlib : ~2 Ko pour 300 unités.
+    """
+    units = sorted(units)
+    ids = [unit[0] for unit in units]
+    columns = array('i', [b - a for a, b in zip([0] + ids, ids)])
+    for index in (1, 2, 3):
+        columns.extend(unit[index] or 0 for unit in units)
+    if sys.byteorder != 'little':
+        columns.byteswap()
+    return zlib.compress(columns.tobytes(), 6)
+
+def unpack_roster_snapshot(blob):
+    """Inverse de pack_roster_snapshot : [(unit_id, gp, gear, relic)]"""
+    columns = array('i')
+    columns.frombytes(zlib.decompress(blob))
+    if sys.byteorder != 'little':
+        columns.byteswap()
+    count = len(columns) // 4
+    ids = itertools.accumulate(columns[:count])
+    return list(zip(ids, columns[count:2 * count], columns[2 * count:3 * count], columns[3 * count:]))
+
+def _history_unit_ids(cursor, base_ids):
+    """base_id -> id entier de history_units (créé au besoin)"""
+    cursor.executemany('INSERT OR IGNORE INTO history_units (base_id) VALUES (?)',
+                       [(base_id,) for base_id in base_ids])
+    return {row[1]: row[0] for row in cursor.execute('SELECT id, base_id FROM history_units')}
+
+def record_history(cursor, ally_code, player_data, units, changes, first_load=False, now=None):
+    """Enregistre un point d'historique dans la transaction de save_player_data
+
+    Toujours une ligne player_history (GP du joueur) ; un snapshot du roster
+    seulement s'il a changé (les requêtes prennent le dernier snapshot
+    antérieur) ; un événement par relic / gear up et nouvelle unité (sauf au
+    premier chargement). L'historique du joueur est ensuite compacté.
+
+    Un roster vide n'enregistre rien : seul un roster effectivement
+    récupéré donne un point d'historique (sinon toutes les unités
+    sembleraient disparues).
+    """
+    if not units:
+        return
+
+    now = int(now if now is not None else time.time())
+    cursor.execute('''INSERT OR REPLACE INTO player_history
+                      (ally_code, taken_at, galactic_power, character_gp, ship_gp, character_count)
+                      VALUES (?, ?, ?, ?, ?, ?)''',
+                   (ally_code, now,
+                    player_data.get('galactic_power', 0),
+                    player_data.get('character_galactic_power', 0),
+                    player_data.get('ship_galactic_power', 0),
+                    len(units)))
+    
+    roster_changed = changes['new_units'] or changes['removed_units'] or changes['updated_units']
+    if roster_changed or not cursor.execute('SELECT 1 FROM roster_snapshots WHERE ally_code = ? LIMIT 1',
+                                            (ally_code,)).fetchone():
+        unit_ids = _history_unit_ids(cursor, [unit[0] for unit in units])
+        packed = pack_roster_snapshot([(unit_ids[base_id], gp, gear, relic) for base_id, gp, gear, relic in units])
+        cursor.execute('INSERT OR REPLACE INTO roster_snapshots (ally_code, taken_at, unit_count, units) VALUES (?, ?, ?, ?)',
+                       (ally_code, now, len(units), packed))
+    
+    events = [(ally_code, now, up['base_id'], 'relic', up['from'], up['to']) for up in changes['relic_ups']]
+    events += [(ally_code, now, up['base_id'], 'gear', up['from'], up['to']) for up in changes['gear_ups']]
+    if not first_load:
+        events += [(ally_code, now, base_id, 'unlock', None, None) for base_id in changes['new_units']]
+    cursor.executemany('''INSERT INTO unit_events (ally_code, happened_at, base_id, kind, from_value, to_value)
+                          VALUES (?, ?, ?, ?, ?, ?)''', events)
+    
+    compact_history(cursor, ally_code, now)
+
+def compact_history(cursor, ally_code, now=None):
+    """Rétention et sous-échantillonnage de l'historique d'un joueur
+
+    Au-delà de HISTORY_RAW_DAYS, on garde le dernier point de chaque jour ;
+    au-delà de HISTORY_DAILY_DAYS, le dernier de chaque semaine ; au-delà
+    de HISTORY_RETENTION_DAYS, tout est supprimé. Renvoie le nombre de
+    lignes supprimées.
+    """
+    now = int(now if now is not None else time.time())
+    retention = now - int(HISTORY_RETENTION_DAYS * DAY)
+    tiers = ((now - int(HISTORY_RAW_DAYS * DAY), DAY), (now - int(HISTORY_DAILY_DAYS * DAY), 7 * DAY))
+    deleted = 0
+    for table in ('player_history', 'roster_snapshots'):
+        cursor.execute(f'DELETE FROM {table} WHERE ally_code = ? AND taken_at < ?', (ally_code, retention))
+        deleted += cursor.rowcount
+        for cutoff, bucket in tiers:
+            cursor.execute(f'''DELETE FROM {table} WHERE ally_code = ? AND taken_at < ? AND taken_at NOT IN (
+                                  SELECT MAX(taken_at) FROM {table} WHERE ally_code = ? AND taken_at < ?
+                                  GROUP BY taken_at / ?)''',
+                           (ally_code, cutoff, ally_code, cutoff, bucket))
+            deleted += cursor.rowcount
+    cursor.execute('DELETE FROM unit_events WHERE ally_code = ? AND happened_at < ?', (ally_code, retention))
+    return deleted + cursor.rowcount
+
+HISTORY_RESOLUTIONS = {'day': DAY, 'week': 7 * DAY}
+
+def gp_history(ally_code, days=90, resolution=None, now=None):
+    """GP du joueur sur les `days` derniers jours (dernier point par jour / semaine si `resolution`)"""
+    since = int(now if now is not None else time.time()) - int(days * DAY)
+    conn = get_db_connection()
+    try:
+        if resolution:
+            # MAX() : SQLite renvoie les autres colonnes de la ligne retenue
+            rows = conn.execute('''SELECT MAX(taken_at) AS taken_at, galactic_power, character_gp, ship_gp, character_count
+                                   FROM player_history WHERE ally_code = ? AND taken_at >= ?
+                                   GROUP BY player_history.taken_at / ? ORDER BY taken_at''',
+                                (ally_code, since, HISTORY_RESOLUTIONS[resolution]))
+        else:
+            rows = conn.execute('''SELECT taken_at, galactic_power, character_gp, ship_gp, character_count
+                                   FROM player_history WHERE ally_code = ? AND taken_at >= ?
+                                   ORDER BY taken_at''', (ally_code, since))
+        return [dict(row) for row in rows]
+    finally:
+        conn.close()
+
+def unit_history(ally_code, base_id, days=90, now=None):
+    """GP, gear et relic d'une unité sur les `days` derniers jours
+
+    Part du dernier snapshot antérieur à la période (les snapshots ne sont
+    écrits que quand le roster change).
+    """
+    since = int(now if now is not None else time.time()) - int(days * DAY)
+    conn = get_db_connection()
+    try:
+        unit = conn.execute('SELECT id FROM history_units WHERE base_id = ?', (base_id,)).fetchone()
+        if not unit:
+            return []
+        rows = conn.execute('''SELECT taken_at, units FROM roster_snapshots
+                               WHERE ally_code = ? AND taken_at >= COALESCE(
+                                   (SELECT MAX(taken_at) FROM roster_snapshots WHERE ally_code = ? AND taken_at <= ?), ?)
+                               ORDER BY taken_at''', (ally_code, ally_code, since, since)).fetchall()
+    finally:
+        conn.close()
+    
+    points = []
+    for row in rows:
+        for unit_id, gp, gear, relic in unpack_roster_snapshot(row['units']):
+            if unit_id == unit['id']:
+                points.append({'taken_at': max(row['taken_at'], since), 'galactic_power': gp,
+                               'gear_level': gear, 'relic_tier': relic})
+                break
+    return points
+
+def unit_events(ally_code, kind=None, days=30, now=None):
+    """Événements de progression (relic / gear ups, nouvelles unités) des `days` derniers jours"""
+    since = int(now if now is not None else time.time()) - int(days * DAY)
+    query = 'SELECT happened_at, base_id, kind, from_value, to_value FROM unit_events WHERE ally_code = ?'
+    params = [ally_code]
+    if kind:
+        query += ' AND kind = ?'
+        params.append(kind)
+    query += ' AND happened_at >= ? ORDER BY happened_at DESC'
+    params.append(since)
+    conn = get_db_connection()
+    try:
+        return [dict(row) for row in conn.execute(query, params)]
+    finally:
+        conn.close()
+
+# ==================== INGESTION EN MASSE ====================
+
+class IngestError(Exception):
+    """Échec de l'ingestion d'un membre (récupération ou sauvegarde)"""
+
+# SQLite n'accepte qu'un écrivain à la fois : les sauvegardes sont sérialisées,
+# la récupération et le parsing restent parallèles
+_INGEST_WRITE_LOCK = threading.Lock()
+
+def normalize_ally_code(ally_code):
+    """Nettoie un ally code ('123-456-789' -> '123456789'), None si invalide"""
+    clean_code = str(ally_code).replace('-', '').strip()
+    if len(clean_code) != 9 or not clean_code.isdigit():
+        return None
+    return clean_code
+
+def _ingest_member(ally_code):
+    """Récupère, parse et sauvegarde un membre ; renvoie ses statistiques"""
+    start = time.monotonic()
+    data = fetch_player_data(ally_code, allow_demo=False)
+    if not data:
+        raise IngestError("Impossible de récupérer les données")
+    
+    with _INGEST_WRITE_LOCK:
+        saved = save_player_data(ally_code, data)
+    if not saved:
+        raise IngestError("Erreur lors de la sauvegarde")
+    
+    return {
+        'characters': saved['characters'],  # personnages sauvegardés, vaisseaux exclus
+        'rows': saved['rows'],
+        'save_ms': saved['save_ms'],
+        'elapsed_ms': round((time.monotonic() - start) * 1000, 1)
+    }
+
+def ingest_players(ally_codes, workers=None, on_member_done=None):
+    """Charge une liste d'ally codes avec un pool de workers borné
+
+    Chaque membre est sauvegardé dans sa propre transaction ; un échec
+    n'interrompt pas les autres. Renvoie un rapport avec le débit et les
+    erreurs par membre. `on_member_done(ally_code, error)` est appelé à la
+    fin de chaque membre.
+    """
+    workers = max(1, int(workers or INGEST_WORKERS))
+    report = {
+        'requested': 0,
+        'succeeded': [],
+        'failed': {},
+        'members': {},
+        'total_characters': 0,
+        'total_rows': 0
+    }
+    
+    # Nettoyage + dédoublonnage en gardant l'ordre
+    codes = []
+    for raw_code in ally_codes:
+        clean_code = normalize_ally_code(raw_code)
+        if clean_code is None:
+            report['failed'][str(raw_code)] = 'Ally Code invalide (9 chiffres requis)'
+        elif clean_code not in codes:
+            codes.append(clean_code)
+    report['requested'] = len(codes) + len(report['failed'])
+    
+    print(f"📥 Ingestion de {len(codes)} joueurs ({workers} workers)")
+    start = time.monotonic()
+    save_s = 0.0
+    
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='swgoh-ingest') as executor:
+        futures = {executor.submit(_ingest_member, code): code for code in codes}
+        for future in as_completed(futures):
+            code = futures[future]
+            error = None
+            try:
+                stats = future.result()
+                report['succeeded'].append(code)
+                report['members'][code] = stats
+                report['total_characters'] += stats['characters']
+                report['total_rows'] += stats['rows']
+                save_s += stats['save_ms'] / 1000
+                print(f"  ✓ {code}: {stats['characters']} personnages ({stats['elapsed_ms']} ms)")
+            except Exception as e:
+                error = str(e) or e.__class__.__name__
+                report['failed'][code] = error
+                print(f"  ✗ {code}: {error}")
+            if on_member_done:
+                on_member_done(code, error)
+    
+    elapsed = time.monotonic() - start
+    report['elapsed_s'] = round(elapsed, 2)
+    report['players_per_minute'] = round(len(report['succeeded']) / elapsed * 60, 1) if elapsed > 0 else 0.0
+    # Débit d'écriture : lignes par seconde passée dans save_player_data
+    report['rows_per_s'] = round(report['total_rows'] / save_s) if save_s > 0 else None
+    print(f"✅ {len(report['succeeded'])}/{report['requested']} joueurs en {report['elapsed_s']} s "
+          f"({report['players_per_minute']} joueurs/min, écriture: {report['rows_per_s']} lignes/s)")
+    
+    return report
+
+# ==================== JOBS EN ARRIÈRE-PLAN ====================
+
+class JobQueue:
+    """File de jobs traitée par un petit pool de threads locaux
+
+    Chaque job expose son statut ('queued', 'running', 'done', 'error'), sa
+    phase courante, une progression (0-100) et son résultat final. Les jobs
+    terminés sont oubliés après `retention` secondes.
+    """
+
+    def __init__(self, workers=JOB_WORKERS, retention=JOB_RETENTION):
+        self.workers = max(1, int(workers))
+        self.retention = retention
+        self._queue = queue.Queue()
+        self._jobs = {}
+        self._active_keys = {}  # clé (ex: ally code) -> job en attente ou en cours
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def _ensure_workers(self):
+        """Démarre les threads au premier job (verrou déjà pris)"""
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, daemon=True,
+                                      name=f'swgoh-job-{len(self._threads) + 1}')
+            thread.start()
+            self._threads.append(thread)
+
+    def _purge(self):
+        """Oublie les jobs terminés trop anciens (verrou déjà pris)"""
+        limit = time.time() - self.retention
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job['status'] in ('done', 'error') and job['updated_at'] < limit]:
+            del self._jobs[job_id]
+
+    def submit(self, func, *args, key=None, **kwargs):
+        """Met un job en file ; `func(report, *args, **kwargs)` renvoie le résultat
+
+        Si un job de même `key` est déjà en attente ou en cours, il est
+        renvoyé au lieu d'en créer un second.
+        """
+        with self._lock:
+            self._purge()
+            if key is not None and key in self._active_keys:
+                return dict(self._jobs[self._active_keys[key]])
+            
+            now = time.time()
+            job = {
+                'id': uuid.uuid4().hex,
+                'key': key,
+                'status': 'queued',
+                'phase': 'queued',
+                'progress': 0,
+                'result': None,
+                'error': None,
+                'created_at': now,
+                'updated_at': now
             }
-        }
+            self._jobs[job['id']] = job
+            if key is not None:
+                self._active_keys[key] = job['id']
+            self._ensure_workers()
         
-    except Exception as e:
-        print(f"❌ Erreur lors du scraping: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        print("📊 Utilisation des données de démonstration")
-        return generate_demo_data(ally_code.replace('-', ''))
+        self._queue.put((job['id'], func, args, kwargs))
+        return dict(job)
 
-def save_player_data(ally_code, data):
-    """Sauvegarde les données du joueur dans la base de données"""
+    def get(self, job_id):
+        """Renvoie une copie du job, ou None s'il est inconnu"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job:
+                job.update(fields, updated_at=time.time())
+                if job['status'] in ('done', 'error') and job['key'] is not None:
+                    self._active_keys.pop(job['key'], None)
+
+    def _work(self):
+        while True:
+            job_id, func, args, kwargs = self._queue.get()
+            
+            def report(phase, percent=None, job_id=job_id):
+                fields = {'phase': phase}
+                if percent is not None:
+                    fields['progress'] = percent
+                self._update(job_id, **fields)
+            
+            self._update(job_id, status='running')
+            try:
+                result = func(report, *args, **kwargs)
+                self._update(job_id, status='done', phase='done', progress=100, result=result)
+            except Exception as e:
+                print(f"❌ Job {job_id} en erreur: {e}")
+                self._update(job_id, status='error', phase='error', error=str(e))
+            finally:
+                self._queue.task_done()
+
+JOB_QUEUE = JobQueue()
+
+def player_exists(ally_code):
+    """Indique si un joueur est déjà enregistré en base"""
     conn = get_db_connection()
-    c = conn.cursor()
+    row = conn.execute('SELECT 1 FROM player_info WHERE ally_code = ?', (ally_code,)).fetchone()
+    conn.close()
+    return row is not None
+
+def run_player_load(report, ally_code):
+    """Job : récupère, parse et sauvegarde un joueur, renvoie le dashboard
+
+    Si la récupération échoue (limitation de débit, réseau) alors que le
+    joueur est déjà en base, ses dernières données sont conservées et
+    renvoyées avec `stale: True` au lieu d'être écrasées par la démo.
+    """
+    has_data = player_exists(ally_code)
+    data = fetch_player_data(ally_code, allow_demo=not has_data, progress=report, stream_roster=True)
+    if not data:
+        payload = build_dashboard_payload(ally_code) if has_data else None
+        if not payload:
+            raise IngestError("Impossible de récupérer les données")
+        payload['stale'] = True
+        return payload
     
-    try:
-        player_data = data.get('data', data)
-        
-        # Sauvegarde infos joueur
-        c.execute('''INSERT OR REPLACE INTO player_info 
-                     (ally_code, name, level, guild_name, galactic_power, character_gp, ship_gp, last_updated)
-                     VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
-                  (ally_code, 
-                   player_data.get('name', 'Unknown'),
-                   player_data.get('level', 85),
-                   player_data.get('guild_name', 'No Guild'),
-                   player_data.get('galactic_power', 0),
-                   player_data.get('character_galactic_power', 0),
-                   player_data.get('ship_galactic_power', 0),
-                   datetime.now()))
-        
-        print(f"💾 Informations du joueur sauvegardées")
+    report('saving', 80)
+    saved = save_player_data(ally_code, data)
+    if not saved:
+        raise IngestError("Erreur lors de la sauvegarde")
+    
+    payload = build_dashboard_payload(ally_code)
+    if not payload:
+        raise IngestError("Erreur lors de la récupération des données")
+    payload['timings'] = data.get('timings', {})
+    payload['changes'] = saved['changes']
+    return payload
+
+def run_bulk_load(report, ally_codes, workers=None):
+    """Job : ingestion en masse, progression au fil des membres"""
+    total = max(1, len(ally_codes))
+    done = []
+    
+    def on_member_done(ally_code, error):
+        done.append(ally_code)
+        report('ingesting', int(len(done) * 100 / total))
+    
+    report('ingesting', 0)
+    return ingest_players(ally_codes, workers=workers, on_member_done=on_member_done)
+
+# ==================== INVENTAIRE DES MODS ====================
+
+def mod_inventory_version(cursor, ally_code):
+    row = cursor.execute('SELECT version FROM mod_inventory_versions WHERE ally_code = ?', (ally_code,)).fetchone()
+    return row[0] if row else 0
+
+def bump_mod_inventory_version(cursor, ally_code):
+    """Nouvelle version de l'inventaire d'un joueur, dans la transaction de l'appelant"""
+    cursor.execute('''INSERT INTO mod_inventory_versions (ally_code, version) VALUES (?, 1)
+                      ON CONFLICT(ally_code) DO UPDATE SET version = version + 1''', (ally_code,))
+
+class ModInventory:
+    """Mods d'un joueur en colonnes NumPy, pour l'optimiseur
+
+    Slot, set, stat principale et chaque stat secondaire (matrice `stats`,
+    colonnes dans l'ordre de MOD_SECONDARY_COLUMNS) sont des tableaux d'une
+    ligne par mod : le filtrage des candidats et le score sont des
+    opérations vectorisées. `version` est celle de mod_inventory_versions
+    au moment de la construction.
+    """
+
+    def __init__(self, ally_code, version, rows):
+        import numpy as np
         
-        # Supprime les anciennes données
-        c.execute('DELETE FROM characters WHERE ally_code = ?', (ally_code,))
-        c.execute('DELETE FROM mods WHERE ally_code = ?', (ally_code,))
+        columns = list(zip(*rows)) if rows else [()] * len(MOD_COLUMNS)
+        values = dict(zip(MOD_COLUMNS, columns))
+        self.ally_code = ally_code
+        self.version = version
+        self.ids = np.array(values['id'], dtype=object)
+        self.slot = np.array([slot or 0 for slot in values['slot']], dtype=np.int8)
+        self.set_type = np.array(values['set_type'], dtype=object)
+        self.level = np.array(values['level'], dtype=object)
+        self.tier = np.array(values['tier'], dtype=object)
+        self.rarity = np.array(values['rarity'], dtype=object)
+        self.primary_stat_type = np.array(values['primary_stat_type'], dtype=object)
+        self.primary_stat_value = np.array([value or 0 for value in values['primary_stat_value']], dtype=np.float64)
+        self.stats = np.array([[value or 0 for value in values[column]] for column in MOD_SECONDARY_COLUMNS],
+                              dtype=np.float64).T.copy()
+        self.is_equipped = np.array([bool(equipped) for equipped in values['is_equipped']], dtype=bool)
         
-        # Sauvegarde personnages
-        char_count = 0
-        for unit in player_data.get('roster', []):
-            if unit.get('combat_type') == 1:  # Personnages uniquement
-                c.execute('''INSERT INTO characters 
-                           (ally_code, base_id, name, level, gear_level, relic_tier, power, galactic_power)
-                           VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
-                         (ally_code,
-                          unit.get('base_id'),
-                          unit.get('name'),
-                          unit.get('level', 1),
-                          unit.get('gear_level', 1),
-                          unit.get('relic_tier', 0),
-                          unit.get('power', 0),
-                          unit.get('galactic_power', 0)))
-                char_count += 1
-                
-                # Sauvegarde mods équipés (si disponibles)
-                for mod in unit.get('mods', []):
-                    save_mod(c, ally_code, unit.get('base_id'), mod, is_equipped=True)
+        # Porteur de chaque mod en code entier (-1 : non équipé)
+        self.characters = sorted({owner for owner in values['character_id'] if owner is not None})
+        self._codes = {owner: code for code, owner in enumerate(self.characters)}
+        self.owner = np.array([self._codes.get(owner, -1) for owner in values['character_id']], dtype=np.int32)
+    
+    @classmethod
+    def load(cls, cursor, ally_code):
+        """Construit l'inventaire depuis la base (version lue avant les mods)
+
+        Si une synchronisation s'intercale entre les deux lectures,
+        l'inventaire porte l'ancienne version avec les nouveaux mods : il
+        est simplement reconstruit à l'appel suivant.
+        """
+        version = mod_inventory_version(cursor, ally_code)
+        rows = cursor.execute(f"SELECT {', '.join(MOD_COLUMNS)} FROM mods WHERE ally_code = ? ORDER BY rowid",
+                              (ally_code,)).fetchall()
+        return cls(ally_code, version, rows)
+    
+    def __len__(self):
+        return len(self.ids)
+    
+    def candidates(self, character_id):
+        """Masque des mods disponibles pour un personnage : non équipés ou déjà portés par lui"""
+        return ~self.is_equipped | (self.owner == self._codes.get(character_id, -2))
+    
+    def scores(self, weights):
+        """Score de chaque mod : somme pondérée des stats secondaires ({colonne: poids})"""
+        import numpy as np
         
-        print(f"💾 {char_count} personnages sauvegardés")
+        vector = np.array([weights.get(column, 0) for column in MOD_SECONDARY_COLUMNS], dtype=np.float64)
+        return self.stats @ vector
+    
+    def best_per_slot(self, character_id, weights):
+        """Indices du meilleur mod disponible de chaque slot (1 à 6), à égalité le premier en base"""
+        import numpy as np
         
-        conn.commit()
-        return True
-    except Exception as e:
-        print(f"❌ Erreur sauvegarde: {e}")
-        import traceback
-        traceback.print_exc()
-        conn.rollback()
-        return False
-    finally:
-        conn.close()
+        available = self.candidates(character_id)
+        scores = self.scores(weights)
+        best = []
+        for slot in range(1, 7):
+            indices = np.flatnonzero(available & (self.slot == slot))
+            if indices.size:
+                best.append(int(indices[np.argmax(scores[indices])]))
+        return best
+    
+    def mod(self, index):
+        """Mod d'index `index` en dict, avec les colonnes de la table mods"""
+        owner = self.owner[index]
+        mod = {
+            'id': self.ids[index],
+            'ally_code': self.ally_code,
+            'character_id': self.characters[owner] if owner >= 0 else None,
+            'slot': int(self.slot[index]),
+            'set_type': self.set_type[index],
+            'level': self.level[index],
+            'tier': self.tier[index],
+            'rarity': self.rarity[index],
+            'primary_stat_type': self.primary_stat_type[index],
+            'primary_stat_value': float(self.primary_stat_value[index]),
+        }
+        mod.update(zip(MOD_SECONDARY_COLUMNS, self.stats[index].tolist()))
+        mod['is_equipped'] = int(self.is_equipped[index])
+        return mod
 
-def save_mod(cursor, ally_code, character_id, mod_data, is_equipped=True):
-    """Sauvegarde un mod dans la base de données"""
-    secondary_stats = {}
-    for stat in mod_data.get('secondary_stats', []):
-        stat_type = stat.get('name', '').lower()
-        stat_value = stat.get('value', 0)
-        
-        if 'speed' in stat_type:
-            secondary_stats['speed'] = stat_value
-        elif 'offense' in stat_type and '%' not in stat_type:
-            secondary_stats['offense'] = stat_value
-        elif 'offense' in stat_type and '%' in stat_type:
-            secondary_stats['offense_percent'] = stat_value
-    
-    cursor.execute('''INSERT OR REPLACE INTO mods 
-                   (id, ally_code, character_id, slot, set_type, level, tier, rarity,
-                    primary_stat_type, primary_stat_value, speed, offense, is_equipped)
-                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
-                 (mod_data.get('id', f"{ally_code}_{character_id}_{mod_data.get('slot')}"),
-                  ally_code,
-                  character_id if is_equipped else None,
-                  mod_data.get('slot', 1),
-                  mod_data.get('set', 1),
-                  mod_data.get('level', 1),
-                  mod_data.get('tier', 1),
-                  mod_data.get('rarity', 5),
-                  mod_data.get('primary_stat', {}).get('name', 'Unknown'),
-                  mod_data.get('primary_stat', {}).get('value', 0),
-                  secondary_stats.get('speed', 0),
-                  secondary_stats.get('offense', 0),
-                  1 if is_equipped else 0))
+_MOD_INVENTORIES = OrderedDict()
+_MOD_INVENTORIES_LOCK = threading.Lock()
+
+def get_mod_inventory(cursor, ally_code):
+    """Inventaire des mods d'un joueur, reconstruit seulement quand sa version change
+
+    Une lecture par clé primaire par appel ; les MOD_INVENTORY_CACHE_SIZE
+    joueurs les plus récemment optimisés restent en mémoire (LRU).
+    """
+    version = mod_inventory_version(cursor, ally_code)
+    with _MOD_INVENTORIES_LOCK:
+        inventory = _MOD_INVENTORIES.get(ally_code)
+        if inventory is not None and inventory.version == version:
+            _MOD_INVENTORIES.move_to_end(ally_code)
+            return inventory
+    
+    inventory = ModInventory.load(cursor, ally_code)
+    with _MOD_INVENTORIES_LOCK:
+        _MOD_INVENTORIES[ally_code] = inventory
+        _MOD_INVENTORIES.move_to_end(ally_code)
+        while len(_MOD_INVENTORIES) > MOD_INVENTORY_CACHE_SIZE:
+            _MOD_INVENTORIES.popitem(last=False)
+    return inventory
 
 # ==================== OPTIMISATION ====================
 
@@ -586,7 +2847,12 @@ def calculate_character_score(character, mod_config, stat_weights):
     return score, base_stats
 
 def optimize_mods_for_character(ally_code, character_id, stat_weights):
-    """Optimise les mods pour un personnage spécifique"""
+    """Optimise les mods pour un personnage spécifique
+
+    Les mods disponibles (non équipés ou déjà portés par le personnage)
+    viennent de l'inventaire en mémoire du joueur : seul le personnage est
+    lu dans la base à chaque appel.
+    """
     conn = get_db_connection()
     c = conn.cursor()
     
@@ -599,25 +2865,11 @@ def optimize_mods_for_character(ally_code, character_id, stat_weights):
         return None
     
     character = dict(character_row)
-    
-    c.execute('''SELECT * FROM mods 
-                 WHERE ally_code = ? AND (is_equipped = 0 OR character_id = ?)''',
-              (ally_code, character_id))
-    
-    available_mods = [dict(row) for row in c.fetchall()]
+    inventory = get_mod_inventory(c, ally_code)
     conn.close()
     
-    mods_by_slot = defaultdict(list)
-    for mod in available_mods:
-        mods_by_slot[mod['slot']].append(mod)
-    
-    best_config = []
-    for slot in range(1, 7):
-        if slot in mods_by_slot and mods_by_slot[slot]:
-            sorted_mods = sorted(mods_by_slot[slot], 
-                               key=lambda m: m.get('speed', 0), 
-                               reverse=True)
-            best_config.append(sorted_mods[0])
+    # Meilleur mod de chaque slot à la vitesse
+    best_config = [inventory.mod(index) for index in inventory.best_per_slot(character_id, {'speed': 1.0})]
     
     score, final_stats = calculate_character_score(character, best_config, stat_weights)
     
@@ -625,9 +2877,279 @@ def optimize_mods_for_character(ally_code, character_id, stat_weights):
         'character': character,
         'recommended_mods': best_config,
         'final_stats': final_stats,
-        'score': score
+        'score': score,
+        'inventory_version': inventory.version
+    }
+
+# ==================== LOADOUTS ====================
+
+# Taille de page de /api/loadouts/<ally_code>
+LOADOUTS_PAGE_SIZE = 50
+LOADOUTS_MAX_PAGE_SIZE = 200
+
+def store_loadout_payload(cursor, data):
+    """Enregistre le contenu d'un loadout (une seule fois par contenu) ; renvoie son hash"""
+    encoded = json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    payload_hash = hashlib.sha256(encoded).hexdigest()
+    cursor.execute('INSERT OR IGNORE INTO loadout_payloads (hash, payload, size) VALUES (?, ?, ?)',
+                   (payload_hash, zlib.compress(encoded, 6), len(encoded)))
+    return payload_hash
+
+def load_loadout_payload(cursor, payload_hash):
+    row = cursor.execute('SELECT payload FROM loadout_payloads WHERE hash = ?', (payload_hash,)).fetchone()
+    return json.loads(zlib.decompress(row[0])) if row else {}
+
+def loadout_metadata(data):
+    """Type et nombre de personnages d'un loadout, affichés dans la liste"""
+    characters = data.get('characters') if isinstance(data, dict) else None
+    return (data.get('type') if isinstance(data, dict) else None), len(characters or [])
+
+def prune_loadout_payloads(cursor, payload_hashes):
+    """Supprime les contenus qui ne sont plus utilisés par aucun loadout"""
+    cursor.executemany('''DELETE FROM loadout_payloads WHERE hash = ?
+                          AND NOT EXISTS (SELECT 1 FROM loadouts WHERE payload_hash = ?)''',
+                       [(payload_hash, payload_hash) for payload_hash in payload_hashes if payload_hash])
+
+def encode_loadouts_cursor(row):
+    return f"{row['created_at']}|{row['id']}"
+
+def decode_loadouts_cursor(value):
+    """'created_at|id' -> (created_at, id) ; ValueError si invalide"""
+    created_at, _, loadout_id = value.rpartition('|')
+    if not created_at:
+        raise ValueError(value)
+    return created_at, int(loadout_id)
+
+# ==================== RÉPONSES JSON ====================
+
+# Lignes lues (et encodées) par paquet dans les réponses JSON en flux
+JSON_STREAM_BATCH = 500
+
+def stream_json_rows(key, query, params=(), counts_query=None):
+    """Réponse JSON en flux : {"success": true, <comptes>, "<key>": [lignes...]}
+
+    Les lignes passent du curseur au JSON par paquets de JSON_STREAM_BATCH,
+    sans DataFrame ni liste complète en mémoire. Les comptes
+    (`counts_query`, une ligne dont les colonnes sont ajoutées à la
+    réponse) et les lignes sont lus dans la même transaction de lecture :
+    ils sont cohérents même si une synchronisation écrit entre-temps.
+    """
+    def generate():
+        # Connexion prise dans le générateur : rendue au pool même si la réponse n'est jamais lue
+        conn = get_db_connection()
+        try:
+            conn.execute('BEGIN')
+            head = {'success': True}
+            if counts_query:
+                head.update(dict(conn.execute(counts_query, params).fetchone()))
+            yield json.dumps(head)[:-1] + f', "{key}": ['
+            
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            cursor.execute(query, params)
+            columns = [column[0] for column in cursor.description]
+            separator = ''
+            while True:
+                rows = cursor.fetchmany(JSON_STREAM_BATCH)
+                if not rows:
+                    break
+                yield separator + ','.join(json.dumps(dict(zip(columns, row))) for row in rows)
+                separator = ','
+            yield ']}'
+        finally:
+            conn.close()
+    
+    return Response(generate(), mimetype='application/json')
+
+def roster_comparison_stats(cursor, ally_code):
+    """Statistiques GAC d'un roster, calculées en SQL (top_gp : 10 meilleurs GP, 0 sous 10 personnages)"""
+    total, avg_gear, avg_relic = cursor.execute(
+        'SELECT COUNT(*), AVG(gear_level), AVG(relic_tier) FROM characters WHERE ally_code = ?',
+        (ally_code,)).fetchone()
+    top_count, top_gp = cursor.execute(
+        '''SELECT COUNT(*), SUM(galactic_power) FROM (
+               SELECT galactic_power FROM characters WHERE ally_code = ?
+               ORDER BY galactic_power DESC LIMIT 10)''', (ally_code,)).fetchone()
+    return {
+        'total_characters': total,
+        'avg_gear': float(avg_gear or 0) if total else 0,
+        'avg_relic': float(avg_relic or 0) if total else 0,
+        'top_gp': int(top_gp or 0) if top_count >= 10 else 0
     }
 
+# ==================== EXPORTS ====================
+
+# Lignes lues (et écrites) par paquet dans les exports
+EXPORT_BATCH = 2000
+
+# Données exportables : table et ordre des lignes de chaque joueur
+EXPORT_KINDS = {
+    'roster': ('characters', 'galactic_power DESC, name'),
+    'mods': ('mods', 'character_id, slot'),
+}
+
+# Formats d'export : (type MIME, extension). arrow et parquet demandent pyarrow.
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+class ExportSink:
+    """Fichier en écriture seule pour pyarrow, vidé après chaque paquet
+
+    pyarrow écrit les batches (Arrow) ou row groups (Parquet) dedans ; le
+    générateur de la réponse envoie ce qui a été écrit puis l'oublie. La
+    position reste celle du fichier complet (le footer Parquet en dépend).
+    """
+    closed = False
+    
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+    
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+    
+    def tell(self):
+        return self.position
+    
+    def writable(self):
+        return True
+    
+    def flush(self):
+        pass
+    
+    def close(self):
+        self.closed = True
+    
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+def export_columns(cursor, table):
+    """Colonnes d'une table et leur type déclaré, dans l'ordre du schéma"""
+    return [(row[1], row[2].upper()) for row in cursor.execute(f'PRAGMA table_info({table})')]
+
+def export_batches(cursor, kind, ally_codes, columns):
+    """Lignes (tuples) des joueurs, par paquets de EXPORT_BATCH, un joueur après l'autre
+
+    Une requête par joueur, servie par l'index (ally_code, ...) : pas de tri
+    de toute la guilde côté SQLite.
+    """
+    table, order = EXPORT_KINDS[kind]
+    query = f'SELECT {", ".join(name for name, _ in columns)} FROM {table} WHERE ally_code = ? ORDER BY {order}'
+    for ally_code in ally_codes:
+        cursor.execute(query, (ally_code,))
+        while True:
+            rows = cursor.fetchmany(EXPORT_BATCH)
+            if not rows:
+                break
+            yield rows
+
+def csv_chunks(columns, batches):
+    """CSV encodé en UTF-8, un morceau par paquet de lignes"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(name for name, _ in columns)
+    for rows in batches:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+def arrow_schema(columns):
+    """Schéma Arrow déduit des types déclarés (affinité SQLite)"""
+    import pyarrow as pa
+    
+    fields = []
+    for name, declared in columns:
+        if 'INT' in declared:
+            arrow_type = pa.int64()
+        elif any(real in declared for real in ('REAL', 'FLOA', 'DOUB')):
+            arrow_type = pa.float64()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(name, arrow_type))
+    return pa.schema(fields)
+
+def columnar_chunks(columns, batches, fmt):
+    """Flux Arrow IPC (un record batch par paquet) ou Parquet (un row group par paquet)"""
+    import pyarrow as pa
+    
+    schema = arrow_schema(columns)
+    sink = ExportSink()
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        writer = pq.ParquetWriter(sink, schema)
+        write = writer.write_table
+        to_block = pa.Table.from_batches
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+        write = writer.write_batch
+        to_block = lambda batch: batch[0]
+    
+    # Un paquet vide garde un schéma valide quand aucune ligne n'est exportée
+    yield sink.drain()
+    for rows in batches:
+        arrays = [pa.array(values, type=field.type) for values, field in zip(zip(*rows), schema)]
+        write(to_block([pa.RecordBatch.from_arrays(arrays, schema=schema)]))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+def guild_ally_codes(cursor, ally_code):
+    """Joueurs chargés de la même guilde que ally_code (lui seul s'il n'a pas de guilde)"""
+    row = cursor.execute('SELECT guild_name FROM player_info WHERE ally_code = ?', (ally_code,)).fetchone()
+    if not row:
+        return []
+    if not row['guild_name'] or row['guild_name'] == 'No Guild':
+        return [ally_code]
+    return [r['ally_code'] for r in cursor.execute(
+        'SELECT ally_code FROM player_info WHERE guild_name = ? ORDER BY ally_code', (row['guild_name'],))]
+
+def export_response(kind, ally_codes, filename):
+    """Réponse d'export en flux (?format=csv|arrow|parquet)
+
+    Les lignes passent du curseur au fichier par paquets de EXPORT_BATCH, dans
+    une seule transaction de lecture : mémoire constante quelle que soit la
+    taille de la guilde, sans DataFrame ni copie complète du fichier.
+    """
+    fmt = request.args.get('format', 'csv').lower()
+    if kind not in EXPORT_KINDS or fmt not in EXPORT_FORMATS:
+        return jsonify({'success': False, 'error': f"Export inconnu : {kind} ({fmt})"}), 400
+    if fmt != 'csv':
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            return jsonify({'success': False, 'error': f"L'export {fmt} nécessite pyarrow"}), 501
+    
+    def generate():
+        # Connexion prise dans le générateur : rendue au pool même si la réponse n'est jamais lue
+        conn = get_db_connection()
+        try:
+            conn.execute('BEGIN')
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            columns = export_columns(cursor, EXPORT_KINDS[kind][0])
+            batches = export_batches(cursor, kind, ally_codes, columns)
+            chunks = csv_chunks(columns, batches) if fmt == 'csv' else columnar_chunks(columns, batches, fmt)
+            for chunk in chunks:
+                if chunk:
+                    yield chunk
+        finally:
+            conn.close()
+    
+    mimetype, extension = EXPORT_FORMATS[fmt]
+    download_name = f'{filename}_{datetime.now().strftime("%Y%m%d")}.{extension}'
+    return Response(generate(), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename="{download_name}"'})
+
 # ==================== ROUTES PAGES ====================
 
 @app.route('/')
@@ -657,122 +3179,126 @@ def gac_page():
 
 # ==================== API ENDPOINTS ====================
 
+def dashboard_payload(summary):
+    """Ligne de player_summary -> données du dashboard"""
+    return {
+        'player': {
+            'name': summary['name'],
+            'level': summary['level'],
+            'guild_name': summary['guild_name']
+        },
+        'stats': {
+            'total_gp': summary['galactic_power'],
+            'total_characters': summary['total_characters'],
+            'relics_r5_plus': summary['relics_r5_plus'],
+            'relic_distribution': json.loads(summary['relic_distribution']),
+            'total_mods': summary['total_mods']
+        },
+        'top_characters': json.loads(summary['top_characters'])
+    }
+
+def build_dashboard_payload(ally_code):
+    """Construit les données du dashboard d'un joueur depuis la DB (None si absent)
+
+    Une seule lecture par clé primaire dans player_summary, tenu à jour
+    par save_player_data.
+    """
+    conn = get_db_connection()
+    try:
+        summary = conn.execute('SELECT * FROM player_summary WHERE ally_code = ?', (ally_code,)).fetchone()
+    finally:
+        conn.close()
+    
+    return dashboard_payload(summary) if summary else None
+
 @app.route('/api/load_player_data', methods=['POST'])
 def load_player_data():
-    """Charge les données d'un joueur depuis l'API et les sauvegarde"""
+    """Met en file le chargement d'un joueur (récupération + sauvegarde)
+
+    Renvoie immédiatement un job_id ; la progression et le dashboard final
+    sont disponibles sur /api/jobs/<job_id>.
+    """
     ally_code = request.json.get('ally_code', '').replace('-', '')
     
     if not ally_code or len(ally_code) != 9:
         return jsonify({'error': 'Ally Code invalide (9 chiffres requis)'}), 400
     
-    # Récupère les données
-    data = fetch_player_data(ally_code)
+    job = JOB_QUEUE.submit(run_player_load, ally_code, key=f'player:{ally_code}')
     
-    if not data:
-        return jsonify({'error': 'Impossible de récupérer les données'}), 500
+    return jsonify({
+        'success': True,
+        'job_id': job['id'],
+        'status_url': f"/api/jobs/{job['id']}"
+    }), 202
+
+@app.route('/api/jobs/<job_id>')
+def get_job(job_id):
+    """Statut d'un job : phase, progression et résultat final"""
+    job = JOB_QUEUE.get(job_id)
     
-    # Sauvegarde dans la DB
-    if save_player_data(ally_code, data):
-        # Récupère les stats pour le dashboard
-        conn = get_db_connection()
-        c = conn.cursor()
-        
-        # Info joueur
-        c.execute('SELECT * FROM player_info WHERE ally_code = ?', (ally_code,))
-        player_row = c.fetchone()
-        
-        if not player_row:
-            conn.close()
-            return jsonify({'error': 'Erreur lors de la récupération des données'}), 500
-            
-        player = dict(player_row)
-        
-        # Statistiques
-        c.execute('SELECT COUNT(*) as count FROM characters WHERE ally_code = ?', (ally_code,))
-        total_chars = c.fetchone()['count']
-        
-        c.execute('SELECT COUNT(*) as count FROM characters WHERE ally_code = ? AND relic_tier >= 5', 
-                  (ally_code,))
-        relics_r5 = c.fetchone()['count']
-        
-        c.execute('SELECT COUNT(*) as count FROM mods WHERE ally_code = ?', (ally_code,))
-        total_mods = c.fetchone()['count']
-        
-        # Top 10 personnages
-        c.execute('''SELECT name, galactic_power as gp FROM characters 
-                     WHERE ally_code = ? 
-                     ORDER BY galactic_power DESC LIMIT 10''', 
-                  (ally_code,))
-        top_chars = [dict(row) for row in c.fetchall()]
-        
-        conn.close()
-        
-        return jsonify({
-            'player': {
-                'name': player['name'],
-                'level': player['level'],
-                'guild_name': player['guild_name']
-            },
-            'stats': {
-                'total_gp': player['galactic_power'],
-                'total_characters': total_chars,
-                'relics_r5_plus': relics_r5,
-                'total_mods': total_mods
-            },
-            'top_characters': top_chars
-        })
-    else:
-        return jsonify({'error': 'Erreur lors de la sauvegarde'}), 500
+    if not job:
+        return jsonify({'error': 'Job non trouvé'}), 404
+    
+    return jsonify({
+        'success': True,
+        'job': job
+    })
+
+@app.route('/api/bulk_load', methods=['POST'])
+def bulk_load():
+    """Met en file le chargement de plusieurs joueurs (ex: toute une guilde)"""
+    ally_codes = request.json.get('ally_codes', [])
+    
+    if not isinstance(ally_codes, list) or not ally_codes:
+        return jsonify({'error': 'Liste d\'Ally Codes requise'}), 400
+    
+    # Workers bornés à 1..INGEST_WORKERS (défaut INGEST_WORKERS)
+    workers = request.json.get('workers')
+    if workers is not None:
+        try:
+            workers = max(1, min(int(workers), INGEST_WORKERS))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'workers doit être un entier'}), 400
+    
+    job = JOB_QUEUE.submit(run_bulk_load, ally_codes, workers=workers)
+    
+    return jsonify({
+        'success': True,
+        'job_id': job['id'],
+        'status_url': f"/api/jobs/{job['id']}"
+    }), 202
+
+@app.route('/api/catalogue/refresh', methods=['POST'])
+def refresh_catalogue():
+    """Recharge le catalogue des unités depuis son fichier, ou le télécharge ({"download": true})"""
+    try:
+        if (request.get_json(silent=True) or {}).get('download'):
+            count = download_unit_catalogue()
+        else:
+            count = UNIT_CATALOGUE.load()
+    except FileNotFoundError:
+        return jsonify({'error': f'Catalogue introuvable: {UNIT_CATALOGUE.path}'}), 404
+    except (IngestError, ThrottledError, ValueError, KeyError) as e:
+        return jsonify({'error': str(e)}), 502
+    
+    return jsonify({
+        'success': True,
+        'units': count,
+        'fingerprint': UNIT_CATALOGUE.fingerprint
+    })
 
 @app.route('/api/check_loaded_data')
 def check_loaded_data():
     """Vérifie si des données sont déjà chargées"""
     conn = get_db_connection()
-    c = conn.cursor()
-    
-    c.execute('SELECT * FROM player_info ORDER BY last_updated DESC LIMIT 1')
-    row = c.fetchone()
+    summary = conn.execute('SELECT * FROM player_summary ORDER BY updated_at DESC LIMIT 1').fetchone()
+    conn.close()
     
-    if row:
-        player = dict(row)
-        ally_code = player['ally_code']
-        
-        # Récupère les stats
-        c.execute('SELECT COUNT(*) as count FROM characters WHERE ally_code = ?', (ally_code,))
-        total_chars = c.fetchone()['count']
-        
-        c.execute('SELECT COUNT(*) as count FROM characters WHERE ally_code = ? AND relic_tier >= 5', 
-                  (ally_code,))
-        relics_r5 = c.fetchone()['count']
-        
-        c.execute('SELECT COUNT(*) as count FROM mods WHERE ally_code = ?', (ally_code,))
-        total_mods = c.fetchone()['count']
-        
-        c.execute('''SELECT name, galactic_power as gp FROM characters 
-                     WHERE ally_code = ? 
-                     ORDER BY galactic_power DESC LIMIT 10''', 
-                  (ally_code,))
-        top_chars = [dict(row) for row in c.fetchall()]
-        
-        conn.close()
-        
-        return jsonify({
-            'has_data': True,
-            'player': {
-                'name': player['name'],
-                'level': player['level'],
-                'guild_name': player['guild_name']
-            },
-            'stats': {
-                'total_gp': player['galactic_power'],
-                'total_characters': total_chars,
-                'relics_r5_plus': relics_r5,
-                'total_mods': total_mods
-            },
-            'top_characters': top_chars
-        })
+    payload = dashboard_payload(summary) if summary else None
+    if payload:
+        payload['has_data'] = True
+        return jsonify(payload)
     else:
-        conn.close()
         return jsonify({'has_data': False})
 
 @app.route('/api/fetch_player', methods=['POST'])
@@ -806,46 +3332,63 @@ def get_player_info(ally_code):
         conn.close()
         return jsonify({'error': 'Joueur non trouvé'}), 404
 
+@app.route('/api/history/<ally_code>')
+def get_gp_history(ally_code):
+    """Courbe de GP d'un joueur (?days=90&resolution=day|week)"""
+    resolution = request.args.get('resolution') or None
+    if resolution and resolution not in HISTORY_RESOLUTIONS:
+        return jsonify({'error': f'Résolution invalide: {resolution}'}), 400
+    
+    return jsonify({
+        'success': True,
+        'points': gp_history(ally_code, days=request.args.get('days', 90, type=float), resolution=resolution)
+    })
+
+@app.route('/api/history/<ally_code>/unit/<base_id>')
+def get_unit_history(ally_code, base_id):
+    """Progression d'une unité : GP, gear, relic (?days=90)"""
+    return jsonify({
+        'success': True,
+        'points': unit_history(ally_code, base_id, days=request.args.get('days', 90, type=float))
+    })
+
+@app.route('/api/history/<ally_code>/events')
+def get_unit_events(ally_code):
+    """Relic / gear ups et nouvelles unités (?kind=relic&days=30)"""
+    return jsonify({
+        'success': True,
+        'events': unit_events(ally_code, kind=request.args.get('kind') or None,
+                              days=request.args.get('days', 30, type=float))
+    })
+
 @app.route('/api/characters/<ally_code>')
 def get_characters(ally_code):
     """Récupère tous les personnages d'un joueur"""
-    conn = get_db_connection()
-    df = pd.read_sql_query(
+    return stream_json_rows(
+        'characters',
         'SELECT * FROM characters WHERE ally_code = ? ORDER BY galactic_power DESC',
-        conn, params=(ally_code,)
+        (ally_code,)
     )
-    conn.close()
-    
-    return jsonify({
-        'success': True,
-        'characters': df.to_dict('records')
-    })
 
 @app.route('/api/mods/<ally_code>')
 def get_mods(ally_code):
     """Récupère tous les mods d'un joueur"""
-    conn = get_db_connection()
-    
     equipped = request.args.get('equipped', 'all')
     
     if equipped == 'yes':
-        query = 'SELECT * FROM mods WHERE ally_code = ? AND is_equipped = 1'
+        where = 'ally_code = ? AND is_equipped = 1'
     elif equipped == 'no':
-        query = 'SELECT * FROM mods WHERE ally_code = ? AND is_equipped = 0'
+        where = 'ally_code = ? AND is_equipped = 0'
     else:
-        query = 'SELECT * FROM mods WHERE ally_code = ?'
-    
-    df = pd.read_sql_query(query, conn, params=(ally_code,))
-    conn.close()
-    
-    unequipped_count = len(df[df['is_equipped'] == 0]) if 'is_equipped' in df.columns else 0
+        where = 'ally_code = ?'
     
-    return jsonify({
-        'success': True,
-        'mods': df.to_dict('records'),
-        'total': len(df),
-        'unequipped': unequipped_count
-    })
+    return stream_json_rows(
+        'mods',
+        f'SELECT * FROM mods WHERE {where}',
+        (ally_code,),
+        counts_query=f'''SELECT COUNT(*) AS total, COALESCE(SUM(is_equipped = 0), 0) AS unequipped
+                          FROM mods WHERE {where}'''
+    )
 
 @app.route('/api/optimize', methods=['POST'])
 def optimize():
@@ -873,60 +3416,112 @@ def optimize():
 
 @app.route('/api/loadout/save', methods=['POST'])
 def save_loadout():
-    """Sauvegarde un loadout"""
+    """Sauvegarde un loadout
+
+    Le contenu est compressé et partagé entre loadouts identiques ; une
+    sauvegarde identique à un loadout existant (même nom, description, type
+    et contenu) renvoie ce loadout au lieu d'en créer un doublon.
+    """
     data = request.json
     ally_code = data.get('ally_code')
     name = data.get('name')
     description = data.get('description', '')
     event_type = data.get('event_type', 'General')
-    loadout_data = json.dumps(data.get('data', {}))
+    loadout_data = data.get('data', {})
+    loadout_type, character_count = loadout_metadata(loadout_data)
     
     conn = get_db_connection()
     c = conn.cursor()
     
-    c.execute('''INSERT INTO loadouts (ally_code, name, description, event_type, data, created_at)
-                 VALUES (?, ?, ?, ?, ?, ?)''',
-              (ally_code, name, description, event_type, loadout_data, datetime.now()))
+    payload_hash = store_loadout_payload(c, loadout_data)
+    existing = c.execute('''SELECT id FROM loadouts WHERE ally_code = ? AND payload_hash = ?
+                            AND name IS ? AND description IS ? AND event_type IS ?''',
+                         (ally_code, payload_hash, name, description, event_type)).fetchone()
+    if existing:
+        loadout_id = existing['id']
+    else:
+        c.execute('''INSERT INTO loadouts (ally_code, name, description, event_type, payload_hash,
+                                          loadout_type, character_count, created_at)
+                     VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+                  (ally_code, name, description, event_type, payload_hash,
+                   loadout_type, character_count, datetime.now()))
+        loadout_id = c.lastrowid
     
     conn.commit()
-    loadout_id = c.lastrowid
     conn.close()
     
     return jsonify({
         'success': True,
         'loadout_id': loadout_id,
+        'duplicate': existing is not None,
         'message': 'Loadout sauvegardé'
     })
 
 @app.route('/api/loadouts/<ally_code>')
 def get_loadouts(ally_code):
-    """Récupère tous les loadouts d'un joueur"""
+    """Liste paginée des loadouts d'un joueur (métadonnées seulement)
+
+    ?limit=50 ; la page suivante s'obtient avec ?cursor=<next_cursor>. Le
+    contenu d'un loadout est renvoyé par /api/loadout/<id>.
+    """
+    limit = max(1, min(request.args.get('limit', LOADOUTS_PAGE_SIZE, type=int), LOADOUTS_MAX_PAGE_SIZE))
+    query = '''SELECT id, name, description, event_type, loadout_type, character_count, created_at
+               FROM loadouts WHERE ally_code = ?'''
+    params = [ally_code]
+    if request.args.get('cursor'):
+        try:
+            params.extend(decode_loadouts_cursor(request.args['cursor']))
+        except ValueError:
+            return jsonify({'error': 'Curseur invalide'}), 400
+        query += ' AND (created_at, id) < (?, ?)'
+    query += ' ORDER BY created_at DESC, id DESC LIMIT ?'
+    params.append(limit + 1)
+    
     conn = get_db_connection()
     c = conn.cursor()
+    rows = c.execute(query, params).fetchall()
+    total = c.execute('SELECT COUNT(*) FROM loadouts WHERE ally_code = ?', (ally_code,)).fetchone()[0]
+    conn.close()
     
-    c.execute('SELECT * FROM loadouts WHERE ally_code = ? ORDER BY created_at DESC',
-              (ally_code,))
+    page = rows[:limit]
+    return jsonify({
+        'success': True,
+        'loadouts': [dict(row) for row in page],
+        'total': total,
+        'next_cursor': encode_loadouts_cursor(page[-1]) if len(rows) > limit else None
+    })
+
+@app.route('/api/loadout/<int:loadout_id>')
+def get_loadout(loadout_id):
+    """Récupère un loadout avec son contenu décodé"""
+    conn = get_db_connection()
+    c = conn.cursor()
     
-    loadouts = []
-    for row in c.fetchall():
-        loadout = dict(row)
-        loadout['data'] = json.loads(loadout['data'])
-        loadouts.append(loadout)
+    row = c.execute('''SELECT id, ally_code, name, description, event_type, loadout_type, character_count,
+                              created_at, payload_hash FROM loadouts WHERE id = ?''', (loadout_id,)).fetchone()
+    if not row:
+        conn.close()
+        return jsonify({'error': 'Loadout non trouvé'}), 404
     
+    loadout = dict(row)
+    loadout['data'] = load_loadout_payload(c, loadout.pop('payload_hash'))
     conn.close()
     
     return jsonify({
         'success': True,
-        'loadouts': loadouts
+        'loadout': loadout
     })
 
 @app.route('/api/loadout/delete/<int:loadout_id>', methods=['DELETE'])
 def delete_loadout(loadout_id):
-    """Supprime un loadout"""
+    """Supprime un loadout (et son contenu s'il n'est plus partagé)"""
     conn = get_db_connection()
     c = conn.cursor()
     
+    row = c.execute('SELECT payload_hash FROM loadouts WHERE id = ?', (loadout_id,)).fetchone()
     c.execute('DELETE FROM loadouts WHERE id = ?', (loadout_id,))
+    if row:
+        prune_loadout_payloads(c, [row['payload_hash']])
     conn.commit()
     conn.close()
     
@@ -935,34 +3530,21 @@ def delete_loadout(loadout_id):
         'message': 'Loadout supprimé'
     })
 
-@app.route('/api/export/mods/<ally_code>')
-def export_mods(ally_code):
-    """Export des mods en CSV"""
+@app.route('/api/export/<kind>/<ally_code>')
+def export_player(kind, ally_code):
+    """Export du roster ou des mods d'un joueur (?format=csv|arrow|parquet)"""
+    return export_response(kind, [ally_code], f'{kind}_{ally_code}')
+
+@app.route('/api/export/guild/<ally_code>/<kind>')
+def export_guild(ally_code, kind):
+    """Export du roster ou des mods de tous les joueurs chargés de la guilde d'un joueur"""
     conn = get_db_connection()
-    df = pd.read_sql_query('SELECT * FROM mods WHERE ally_code = ?', conn, params=(ally_code,))
+    ally_codes = guild_ally_codes(conn.cursor(), ally_code)
     conn.close()
     
-    output = io.StringIO()
-    df.to_csv(output, index=False)
-    output.seek(0)
-    
-    # Compatible avec Flask 3.0+ et versions antérieures
-    try:
-        # Flask 2.0+
-        return send_file(
-            io.BytesIO(output.getvalue().encode()),
-            mimetype='text/csv',
-            as_attachment=True,
-            download_name=f'mods_{ally_code}_{datetime.now().strftime("%Y%m%d")}.csv'
-        )
-    except TypeError:
-        # Flask < 2.0
-        return send_file(
-            io.BytesIO(output.getvalue().encode()),
-            mimetype='text/csv',
-            as_attachment=True,
-            attachment_filename=f'mods_{ally_code}_{datetime.now().strftime("%Y%m%d")}.csv'
-        )
+    if not ally_codes:
+        return jsonify({'success': False, 'error': 'Joueur non trouvé'}), 404
+    return export_response(kind, ally_codes, f'{kind}_guilde_{ally_code}')
 
 @app.route('/api/compare', methods=['POST'])
 def compare_players():
@@ -978,31 +3560,16 @@ def compare_players():
               (ally_code_1, ally_code_2))
     players = [dict(row) for row in c.fetchall()]
     
-    df1 = pd.read_sql_query('SELECT * FROM characters WHERE ally_code = ?',
-                            conn, params=(ally_code_1,))
-    df2 = pd.read_sql_query('SELECT * FROM characters WHERE ally_code = ?',
-                            conn, params=(ally_code_2,))
-    
-    conn.close()
-    
     comparison = {
         'players': players,
         'stats': {
-            'player1': {
-                'total_characters': len(df1),
-                'avg_gear': float(df1['gear_level'].mean()) if len(df1) > 0 else 0,
-                'avg_relic': float(df1['relic_tier'].mean()) if len(df1) > 0 else 0,
-                'top_gp': int(df1.nlargest(10, 'galactic_power')['galactic_power'].sum()) if len(df1) >= 10 else 0
-            },
-            'player2': {
-                'total_characters': len(df2),
-                'avg_gear': float(df2['gear_level'].mean()) if len(df2) > 0 else 0,
-                'avg_relic': float(df2['relic_tier'].mean()) if len(df2) > 0 else 0,
-                'top_gp': int(df2.nlargest(10, 'galactic_power')['galactic_power'].sum()) if len(df2) >= 10 else 0
-            }
+            'player1': roster_comparison_stats(c, ally_code_1),
+            'player2': roster_comparison_stats(c, ally_code_2)
         }
     }
     
+    conn.close()
+    
     return jsonify({
         'success': True,
         'comparison': comparison
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Benchmark du parsing des pages SWGOH.gg sur un corpus de fixtures versionné
+
+Le corpus (tests/fixtures/parser_bench/v<N>/) contient des pages roster de
+plusieurs tailles et une page profil, compressées, avec les valeurs
+attendues de chaque personnage (vérité terrain, pas la sortie du parseur).
+Chaque cible est mesurée en vitesse (ms par page, cartes/s), en mémoire
+(pic tracemalloc) et en exactitude par champ.
+
+Usage:
+    python bench_parser.py
+    python bench_parser.py --rounds 20 --target stream --target cards
+    python bench_parser.py --save avant.json
+    python bench_parser.py --compare avant.json
+    python bench_parser.py --catalogue unit_catalogue.json
+"""
+
+import argparse
+import contextlib
+import gzip
+import io
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+import app as swgoh_app
+
+BENCH_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tests', 'fixtures', 'parser_bench')
+
+# Champs comparés aux valeurs attendues d'un personnage
+CHARACTER_FIELDS = ('base_id', 'name', 'power', 'relic_tier', 'zeta_count', 'is_galactic_legend', 'has_ultimate')
+
+# ==================== CORPUS ====================
+
+def latest_corpus(root=BENCH_ROOT):
+    """Dossier de la version la plus récente du corpus (v1, v2, ...)"""
+    versions = [name for name in os.listdir(root) if name.startswith('v') and name[1:].isdigit()]
+    if not versions:
+        raise SystemExit(f"Aucun corpus dans {root}")
+    return os.path.join(root, max(versions, key=lambda name: int(name[1:])))
+
+def load_corpus(corpus):
+    """Charge le manifeste, les pages (décompressées) et les valeurs attendues"""
+    with open(os.path.join(corpus, 'manifest.json'), encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    for fixture in manifest['fixtures']:
+        opener = gzip.open if fixture['page'].endswith('.gz') else open
+        with opener(os.path.join(corpus, fixture['page']), 'rb') as f:
+            fixture['html'] = f.read().decode('utf-8')
+        with open(os.path.join(corpus, fixture['expected']), encoding='utf-8') as f:
+            fixture['expected_data'] = json.load(f)
+    return manifest
+
+# ==================== CIBLES ====================
+
+def _strained_cards(html):
+    return swgoh_app.make_soup(html, swgoh_app.ROSTER_STRAINER).find_all('div', class_='unit-card')
+
+def _parse_cards(cards):
+    return [character for character in map(swgoh_app.parse_unit_card, cards) if character]
+
+# nom -> (type de page, préparation hors chronomètre, fonction mesurée)
+TARGETS = {
+    'roster': ('roster', None, swgoh_app.parse_character_roster),
+    'stream': ('roster', None, lambda html: list(swgoh_app.iter_character_roster(html))),
+    'soup': ('roster', None, lambda html: _parse_cards(_strained_cards(html))),
+    'cards': ('roster', _strained_cards, _parse_cards),
+    'profile': ('profile', None, swgoh_app.parse_profile_page),
+}
+
+# ==================== EXACTITUDE ====================
+
+def roster_accuracy(characters, expected):
+    """Compare les personnages extraits aux valeurs attendues (par base_id)
+
+    Un personnage manquant compte comme faux sur tous ses champs.
+    """
+    found = {character['base_id']: character for character in characters}
+    matched = [record for record in expected if record['base_id'] in found]
+    fields = {}
+    for field in CHARACTER_FIELDS:
+        correct = sum(1 for record in matched if found[record['base_id']].get(field) == record[field])
+        fields[field] = round(correct / len(expected), 4) if expected else 1.0
+    exact = sum(1 for record in matched
+                if all(found[record['base_id']].get(field) == record[field] for field in CHARACTER_FIELDS))
+    return {
+        'expected': len(expected),
+        'found': len(characters),
+        'recall': round(len(matched) / len(expected), 4) if expected else 1.0,
+        'precision': round(len(matched) / len(characters), 4) if characters else 1.0,
+        'exact': round(exact / len(expected), 4) if expected else 1.0,
+        'fields': fields,
+    }
+
+def profile_accuracy(profile, expected):
+    fields = {field: 1.0 if profile.get(field) == value else 0.0 for field, value in expected.items()}
+    return {'exact': 1.0 if all(fields.values()) else 0.0, 'fields': fields}
+
+# ==================== BENCH ====================
+
+def measure(target, fixture, rounds):
+    """Mesure une cible sur une fixture : temps médian, pic mémoire, exactitude"""
+    kind, prepare, func = TARGETS[target]
+    arg = prepare(fixture['html']) if prepare else fixture['html']
+
+    # Les print du parseur fausseraient les temps
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = func(arg)
+        durations = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            func(arg)
+            durations.append(time.perf_counter() - start)
+
+        # Passe séparée : tracemalloc ralentit fortement l'exécution
+        tracemalloc.start()
+        func(arg)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    median = statistics.median(durations)
+    stats = {
+        'ms': round(median * 1000, 2),
+        'min_ms': round(min(durations) * 1000, 2),
+        'peak_mb': round(peak / 1024 / 1024, 2),
+    }
+    if kind == 'roster':
+        stats['cards_per_s'] = round(fixture['cards'] / median) if median else None
+        stats['accuracy'] = roster_accuracy(result, fixture['expected_data'])
+    else:
+        stats['accuracy'] = profile_accuracy(result, fixture['expected_data'])
+    return stats
+
+def bench(corpus=None, rounds=5, targets=None, fixtures=None, catalogue=None):
+    """Lance toutes les cibles sur toutes les fixtures compatibles
+
+    Sans `catalogue`, le parsing se fait sans catalogue des unités
+    (heuristiques seules), quel que soit le fichier local.
+    """
+    corpus = corpus or latest_corpus()
+    manifest = load_corpus(corpus)
+    targets = targets or list(TARGETS)
+    previous_catalogue = swgoh_app.UNIT_CATALOGUE
+    swgoh_app.UNIT_CATALOGUE = swgoh_app.UnitCatalogue(catalogue or '')
+    if catalogue:
+        swgoh_app.UNIT_CATALOGUE.load()
+
+    results = {
+        'corpus_version': manifest['version'],
+        'parser_version': swgoh_app.PARSER_VERSION,
+        'html_parser': swgoh_app.HTML_PARSER,
+        'catalogue_units': len(swgoh_app.UNIT_CATALOGUE),
+        'rounds': rounds,
+        'results': {}
+    }
+    try:
+        for fixture in manifest['fixtures']:
+            if fixtures and fixture['name'] not in fixtures:
+                continue
+            for target in targets:
+                if TARGETS[target][0] != fixture['kind']:
+                    continue
+                results['results'][f"{target}/{fixture['name']}"] = measure(target, fixture, rounds)
+    finally:
+        swgoh_app.UNIT_CATALOGUE = previous_catalogue
+    return results
+
+# ==================== AFFICHAGE ====================
+
+def _delta(new, old):
+    if not old:
+        return ''
+    return f" ({(new - old) / old * 100:+.0f}%)"
+
+def print_results(results, baseline=None):
+    baseline = (baseline or {}).get('results', {})
+    print(f"\n📊 Corpus v{results['corpus_version']} · parseur v{results['parser_version']} "
+          f"({results['html_parser']}, catalogue: {results['catalogue_units']} unités) · {results['rounds']} tours")
+    print(f"{'cible/fixture':<28}{'ms':>14}{'cartes/s':>18}{'pic Mo':>14}{'exact':>9}  champs < 100%")
+    for key, stats in results['results'].items():
+        old = baseline.get(key, {})
+        accuracy = stats['accuracy']
+        weak = ', '.join(f"{field} {value:.0%}" for field, value in accuracy['fields'].items() if value < 1)
+        cards = f"{stats['cards_per_s']:,}" if 'cards_per_s' in stats else '-'
+        print(f"{key:<28}"
+              f"{stats['ms']:>8}{_delta(stats['ms'], old.get('ms')):>6}"
+              f"{cards:>12}{_delta(stats.get('cards_per_s') or 0, old.get('cards_per_s')):>6}"
+              f"{stats['peak_mb']:>8}{_delta(stats['peak_mb'], old.get('peak_mb')):>6}"
+              f"{accuracy['exact']:>9.1%}  {weak or '-'}")
+        if old and old['accuracy']['exact'] != accuracy['exact']:
+            print(f"{'':<28}⚠️  exactitude {old['accuracy']['exact']:.1%} -> {accuracy['exact']:.1%}")
+
+# ==================== CLI ====================
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du parsing des pages SWGOH.gg")
+    parser.add_argument('--corpus', help="Dossier du corpus (défaut: dernière version)")
+    parser.add_argument('--rounds', type=int, default=5, help="Mesures par cible et par fixture")
+    parser.add_argument('--target', action='append', choices=list(TARGETS),
+                        help="Cible à mesurer (répétable, défaut: toutes)")
+    parser.add_argument('--fixture', action='append', help="Fixture à utiliser (répétable)")
+    parser.add_argument('--catalogue', help="Catalogue des unités à utiliser (défaut: aucun)")
+    parser.add_argument('--json', action='store_true', help="Affiche les résultats en JSON")
+    parser.add_argument('--save', help="Enregistre les résultats (référence pour --compare)")
+    parser.add_argument('--compare', help="Compare à des résultats enregistrés avec --save")
+    args = parser.parse_args()
+
+    results = bench(args.corpus, rounds=args.rounds, targets=args.target, fixtures=args.fixture,
+                    catalogue=args.catalogue)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        baseline = None
+        if args.compare:
+            with open(args.compare, encoding='utf-8') as f:
+                baseline = json.load(f)
+        print_results(results, baseline)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Temps d'import de app.py au démarrage (python -X importtime)
+
+Chaque tour lance un interpréteur neuf qui importe app, comme un worker
+(re)lancé par un gestionnaire de processus. Le rapport donne le temps
+d'import total (médiane), les imports directs les plus lourds et les
+dépendances lourdes chargées au démarrage alors qu'elles devraient l'être
+à la première utilisation (parsing, scraping, exports Arrow/Parquet).
+
+Usage:
+    python bench_startup.py
+    python bench_startup.py --rounds 10 --top 15
+    python bench_startup.py --budget 250
+    python bench_startup.py --json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Budget du temps d'import de app (ms), au-delà duquel le script échoue
+DEFAULT_BUDGET_MS = float(os.environ.get('STARTUP_IMPORT_BUDGET_MS', 400))
+
+# Dépendances à ne charger qu'à la première utilisation
+HEAVY_MODULES = ('pandas', 'numpy', 'bs4', 'cloudscraper', 'requests', 'pyarrow')
+
+# ==================== MESURE ====================
+
+def parse_importtime(output):
+    """
+    Lignes 'import time: self | cumulative | module' -> liste de dicts
+    (self_us, cumulative_us, name, depth), dans l'ordre de sortie
+    """
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # ligne d'en-tête
+        name = parts[2].rstrip()
+        stripped = name.lstrip()
+        imports.append({
+            'self_us': int(parts[0]),
+            'cumulative_us': int(parts[1]),
+            'name': stripped,
+            'depth': (len(name) - len(stripped) - 1) // 2,
+        })
+    return imports
+
+def app_imports(imports, module='app'):
+    """
+    Imports faits pendant celui de `module` : (total_us, imports directs, tous les modules).
+    -X importtime écrit les enfants avant leur parent.
+    """
+    for index, entry in enumerate(imports):
+        if entry['name'] == module and entry['depth'] == 0:
+            break
+    else:
+        raise ValueError(f"import de {module} absent de la sortie -X importtime")
+
+    start = index
+    while start > 0 and imports[start - 1]['depth'] > 0:
+        start -= 1
+    children = imports[start:index]
+    direct = [child for child in children if child['depth'] == 1]
+    return entry['cumulative_us'], direct, {child['name'] for child in children}
+
+def measure_once(module='app'):
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=APP_DIR, capture_output=True, text=True, check=True)
+    return app_imports(parse_importtime(result.stderr), module)
+
+def bench(rounds=5, top=10, module='app'):
+    measure_once(module)  # premier tour : compilation des .pyc, non compté
+    totals, direct_ms, loaded = [], {}, set()
+    for _ in range(rounds):
+        total_us, direct, modules = measure_once(module)
+        totals.append(total_us)
+        loaded |= modules
+        for entry in direct:
+            direct_ms.setdefault(entry['name'], []).append(entry['cumulative_us'])
+
+    heaviest = sorted(((name, statistics.median(values) / 1000) for name, values in direct_ms.items()),
+                      key=lambda item: item[1], reverse=True)[:top]
+    return {
+        'module': module,
+        'python': sys.version.split()[0],
+        'rounds': rounds,
+        'import_ms': round(statistics.median(totals) / 1000, 1),
+        'min_ms': round(min(totals) / 1000, 1),
+        'heaviest': [{'module': name, 'ms': round(ms, 1)} for name, ms in heaviest],
+        'heavy_loaded': sorted(name for name in HEAVY_MODULES if name in loaded),
+    }
+
+# ==================== AFFICHAGE ====================
+
+def print_results(results, budget_ms):
+    status = '✅' if results['import_ms'] <= budget_ms else '❌'
+    print(f"\n⏱️  import {results['module']} · Python {results['python']} · {results['rounds']} tours")
+    print(f"{status} {results['import_ms']} ms (min {results['min_ms']} ms, budget {budget_ms:g} ms)")
+    print(f"\n{'import direct':<32}{'ms':>10}")
+    for entry in results['heaviest']:
+        print(f"{entry['module']:<32}{entry['ms']:>10}")
+    if results['heavy_loaded']:
+        print(f"\n⚠️  Chargés au démarrage : {', '.join(results['heavy_loaded'])}")
+
+# ==================== CLI ====================
+
+def main():
+    parser = argparse.ArgumentParser(description="Temps d'import de app.py au démarrage")
+    parser.add_argument('--rounds', type=int, default=5, help="Interpréteurs lancés (médiane)")
+    parser.add_argument('--top', type=int, default=10, help="Imports directs les plus lourds affichés")
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET_MS,
+                        help="Budget en ms (défaut: STARTUP_IMPORT_BUDGET_MS ou 400)")
+    parser.add_argument('--module', default='app', help="Module à importer (défaut: app)")
+    parser.add_argument('--json', action='store_true', help="Affiche les résultats en JSON")
+    args = parser.parse_args()
+
+    results = bench(rounds=args.rounds, top=args.top, module=args.module)
+    results['budget_ms'] = args.budget
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_results(results, args.budget)
+
+    over_budget = results['import_ms'] > args.budget
+    return 1 if over_budget or results['heavy_loaded'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Enregistrement / rejeu des pages SWGOH.gg pour tester et mesurer hors ligne
+
+Le corpus reproduit l'arborescence des URLs :
+    <corpus>/api/player/<ally_code>/index.json    -> /api/player/<ally_code>/
+    <corpus>/p/<ally_code>/index.html             -> /p/<ally_code>/
+    <corpus>/p/<ally_code>/characters/index.html  -> /p/<ally_code>/characters/
+
+Usage:
+    python fixture_server.py record 123456789 987654321
+    python fixture_server.py replay --port 8765 --latency 80 --jitter 40 --error-rate 0.05
+    python fixture_server.py bench --rounds 5 --latency 50
+
+En mode replay, pointez l'application sur le serveur local :
+    SWGOH_GG_BASE_URL=http://127.0.0.1:8765 python app.py
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tests', 'fixtures', 'swgoh_gg')
+
+CONTENT_TYPES = {
+    'index.html': 'text/html; charset=utf-8',
+    'index.json': 'application/json',
+}
+
+# ==================== CORPUS ====================
+
+def corpus_file(corpus, url_path, name='index.html'):
+    """Chemin du fichier du corpus correspondant à un chemin d'URL"""
+    parts = [part for part in url_path.split('?')[0].split('/') if part and part != '..']
+    return os.path.join(corpus, *parts, name)
+
+def list_ally_codes(corpus):
+    """Ally codes présents dans le corpus (profil + roster enregistrés)"""
+    players_dir = os.path.join(corpus, 'p')
+    if not os.path.isdir(players_dir):
+        return []
+    return sorted(code for code in os.listdir(players_dir)
+                  if os.path.exists(corpus_file(corpus, f'/p/{code}/'))
+                  and os.path.exists(corpus_file(corpus, f'/p/{code}/characters/')))
+
+def record(ally_codes, corpus=DEFAULT_CORPUS):
+    """Télécharge la réponse JSON et les pages profil + roster de chaque joueur"""
+    import app as swgoh_app
+
+    for ally_code in ally_codes:
+        clean_code = swgoh_app.normalize_ally_code(ally_code)
+        if not clean_code:
+            print(f"⚠️  Ally code invalide ignoré: {ally_code}")
+            continue
+        for path, name in ((f'/api/player/{clean_code}/', 'index.json'),
+                           (f'/p/{clean_code}/', 'index.html'),
+                           (f'/p/{clean_code}/characters/', 'index.html')):
+            url = f"{swgoh_app.SWGOH_GG_BASE_URL}{path}"
+            deadline = time.monotonic() + swgoh_app.FETCH_DEADLINE
+            response = swgoh_app.scrape_get(url, deadline)
+            if response.status_code != 200:
+                print(f"❌ {url}: HTTP {response.status_code}")
+                continue
+            target = corpus_file(corpus, path, name)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, 'w', encoding='utf-8') as f:
+                f.write(response.text)
+            print(f"💾 {url} -> {os.path.relpath(target)} ({len(response.text):,} octets)")
+
+# ==================== REPLAY ====================
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    """Sert les pages du corpus avec latence et erreurs injectées"""
+
+    server_version = 'SWGOHFixtureServer/1.0'
+
+    def count(self, key):
+        """Compte une réponse avant de l'envoyer : le client ne peut pas la lire avant le compteur"""
+        with self.server.stats_lock:
+            self.server.stats[key] += 1
+
+    def do_GET(self):
+        config = self.server.config
+        delay = config['latency'] + random.uniform(0, config['jitter'])
+        if delay > 0:
+            time.sleep(delay)
+
+        if config['error_rate'] and random.random() < config['error_rate']:
+            status = random.choice(config['error_codes'])
+            self.count('errors')
+            self.send_response(status)
+            if status in (429, 503):
+                self.send_header('Retry-After', str(config['retry_after']))
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        for name, content_type in CONTENT_TYPES.items():
+            path = corpus_file(config['corpus'], self.path, name)
+            if os.path.exists(path):
+                break
+        else:
+            self.count('missing')
+            self.send_error(404)
+            return
+
+        with open(path, 'rb') as f:
+            body = f.read()
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()
+
+        if self.headers.get('If-None-Match') == etag:
+            self.count('not_modified')
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        self.count('served')
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.config['verbose']:
+            super().log_message(format, *args)
+
+def start_replay_server(corpus=DEFAULT_CORPUS, host='127.0.0.1', port=0, latency=0.0, jitter=0.0,
+                        error_rate=0.0, error_codes=(429, 503), retry_after=0, seed=None, verbose=False):
+    """Démarre le serveur de rejeu dans un thread ; renvoie le serveur
+
+    `latency` et `jitter` sont en secondes. L'URL de base est `server.base_url`
+    et `server.shutdown()` l'arrête.
+    """
+    if seed is not None:
+        random.seed(seed)
+    server = ThreadingHTTPServer((host, port), ReplayHandler)
+    server.daemon_threads = True
+    server.config = {
+        'corpus': corpus,
+        'latency': latency,
+        'jitter': jitter,
+        'error_rate': error_rate,
+        'error_codes': list(error_codes),
+        'retry_after': retry_after,
+        'verbose': verbose,
+    }
+    server.stats = {'served': 0, 'not_modified': 0, 'errors': 0, 'missing': 0}
+    server.stats_lock = threading.Lock()  # handlers dans des threads concurrents
+    server.base_url = f"http://{host}:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True, name='swgoh-replay').start()
+    return server
+
+# ==================== BENCH ====================
+
+def percentile(values, pct):
+    """Percentile par rang le plus proche"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+def bench(corpus=DEFAULT_CORPUS, rounds=3, workers=None, rate=None, **server_options):
+    """Mesure le débit et la latence d'ingestion contre le serveur de rejeu"""
+    import app as swgoh_app
+
+    ally_codes = list_ally_codes(corpus)
+    if not ally_codes:
+        raise SystemExit(f"Corpus vide: {corpus}")
+
+    server = start_replay_server(corpus, **server_options)
+    with tempfile.TemporaryDirectory() as tmp:
+        swgoh_app.SWGOH_GG_BASE_URL = server.base_url
+        swgoh_app.SWGOH_GG_API_URL = f"{server.base_url}/api"
+        swgoh_app.HTTP_CACHE = None
+        swgoh_app.DATABASE_PATH = os.path.join(tmp, 'bench.db')
+        swgoh_app.init_db()
+        if rate is not None:
+            # 0 = pas de limitation : mesure le chemin d'ingestion seul
+            swgoh_app.RATE_LIMITER = swgoh_app.TokenBucket(rate=rate or 1e9, capacity=swgoh_app.SCRAPE_BURST if rate else 10 ** 9)
+
+        latencies = []
+        elapsed = 0.0
+        loaded = 0
+        rows = 0
+        save_ms = 0.0
+        for _ in range(rounds):
+            report = swgoh_app.ingest_players(ally_codes, workers=workers)
+            elapsed += report['elapsed_s']
+            loaded += len(report['succeeded'])
+            latencies.extend(member['elapsed_ms'] for member in report['members'].values())
+            rows += report['total_rows']
+            save_ms += sum(member['save_ms'] for member in report['members'].values())
+    server.shutdown()
+
+    results = {
+        'players': loaded,
+        'failures': rounds * len(ally_codes) - loaded,
+        'players_per_minute': round(loaded / elapsed * 60, 1) if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 50) if latencies else None,
+        'p95_ms': percentile(latencies, 95) if latencies else None,
+        'p99_ms': percentile(latencies, 99) if latencies else None,
+        'mean_ms': round(statistics.mean(latencies), 1) if latencies else None,
+        'rows_per_s': round(rows / save_ms * 1000) if save_ms else None,
+        'server': server.stats,
+    }
+    return results
+
+# ==================== CLI ====================
+
+def main():
+    parser = argparse.ArgumentParser(description="Enregistrement / rejeu des pages SWGOH.gg")
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS, help="Dossier du corpus de fixtures")
+    subparsers = parser.add_subparsers(dest='mode', required=True)
+
+    record_parser = subparsers.add_parser('record', help="Enregistre des joueurs depuis swgoh.gg")
+    record_parser.add_argument('ally_codes', nargs='+')
+
+    for name in ('replay', 'bench'):
+        sub = subparsers.add_parser(name, help="Sert le corpus" if name == 'replay' else "Mesure l'ingestion")
+        sub.add_argument('--latency', type=float, default=0, help="Latence injectée (ms)")
+        sub.add_argument('--jitter', type=float, default=0, help="Jitter aléatoire ajouté (ms)")
+        sub.add_argument('--error-rate', type=float, default=0, help="Proportion de réponses en erreur (0-1)")
+        sub.add_argument('--error-codes', default='429,503', help="Codes HTTP injectés (ex: 429,503,500)")
+        sub.add_argument('--seed', type=int, help="Graine aléatoire pour des runs reproductibles")
+    subparsers.choices['replay'].add_argument('--host', default='127.0.0.1')
+    subparsers.choices['replay'].add_argument('--port', type=int, default=8765)
+    subparsers.choices['replay'].add_argument('-v', '--verbose', action='store_true')
+    subparsers.choices['bench'].add_argument('--rounds', type=int, default=3)
+    subparsers.choices['bench'].add_argument('--workers', type=int)
+    subparsers.choices['bench'].add_argument('--rate', type=float,
+                                             help="Requêtes/s (0 = illimité, défaut: SCRAPE_RATE)")
+
+    args = parser.parse_args()
+
+    if args.mode == 'record':
+        record(args.ally_codes, args.corpus)
+        return 0
+
+    server_options = {
+        'latency': args.latency / 1000,
+        'jitter': args.jitter / 1000,
+        'error_rate': args.error_rate,
+        'error_codes': [int(code) for code in args.error_codes.split(',') if code],
+        'seed': args.seed,
+    }
+
+    if args.mode == 'replay':
+        server = start_replay_server(args.corpus, host=args.host, port=args.port,
+                                     verbose=args.verbose, **server_options)
+        print(f"🎬 Rejeu de {len(list_ally_codes(args.corpus))} joueurs sur {server.base_url}")
+        print(f"   SWGOH_GG_BASE_URL={server.base_url} python app.py")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            server.shutdown()
+        return 0
+
+    results = bench(args.corpus, rounds=args.rounds, workers=args.workers, rate=args.rate, **server_options)
+    print("\n📊 Résultats")
+    for key, value in results.items():
+        print(f"   {key}: {value}")
+    return 0 if not results['failures'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Ingestion en masse de joueurs SWGOH.gg (ex: toute une guilde)
+
+Usage:
+    python ingest.py 123456789 987-654-321
+    python ingest.py --file guilde.txt --workers 8
+    python ingest.py --refresh-catalogue 123456789
+"""
+
+import argparse
+import json
+import sys
+
+import app as swgoh_app
+
+
+def read_ally_codes(path):
+    """Lit un ally code par ligne (lignes vides et commentaires ignorés)"""
+    with open(path, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingestion en masse de joueurs SWGOH.gg")
+    parser.add_argument('ally_codes', nargs='*', help="Ally codes à charger")
+    parser.add_argument('-f', '--file', help="Fichier contenant un ally code par ligne")
+    parser.add_argument('-w', '--workers', type=int, default=swgoh_app.INGEST_WORKERS,
+                        help=f"Nombre de workers (défaut: {swgoh_app.INGEST_WORKERS})")
+    parser.add_argument('--json', action='store_true', help="Affiche le rapport complet en JSON")
+    parser.add_argument('--refresh-catalogue', action='store_true',
+                        help="Télécharge le catalogue des unités avant l'ingestion")
+    args = parser.parse_args()
+
+    ally_codes = list(args.ally_codes)
+    if args.file:
+        ally_codes.extend(read_ally_codes(args.file))
+    if not ally_codes and not args.refresh_catalogue:
+        parser.error("aucun ally code fourni")
+
+    if args.refresh_catalogue:
+        count = swgoh_app.download_unit_catalogue()
+        print(f"📚 Catalogue des unités: {count} unités -> {swgoh_app.UNIT_CATALOGUE.path}")
+        if not ally_codes:
+            return 0
+
+    swgoh_app.init_db()
+    report = swgoh_app.ingest_players(ally_codes, workers=args.workers)
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    elif report['failed']:
+        print("\n❌ Échecs :")
+        for code, error in report['failed'].items():
+            print(f"   {code}: {error}")
+
+    return 0 if not report['failed'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -58,7 +58,7 @@ fi
 
 # Autres dépendances
 echo "→ Vérification des autres dépendances..."
-pip3 install flask pandas requests --quiet
+pip3 install flask numpy requests --quiet
 
 echo ""
 echo "============================================================"
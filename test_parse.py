@@ -1,9 +1,13 @@
 import cloudscraper
 from bs4 import BeautifulSoup
+import os
 import re
 
+# SWGOH_GG_BASE_URL=http://127.0.0.1:8765 pour utiliser fixture_server.py
+BASE_URL = os.environ.get('SWGOH_GG_BASE_URL', 'https://swgoh.gg').rstrip('/')
+
 scraper = cloudscraper.create_scraper()
-response = scraper.get("https://swgoh.gg/p/299146629/characters/")
+response = scraper.get(f"{BASE_URL}/p/299146629/characters/")
 
 soup = BeautifulSoup(response.text, 'html.parser')
 cards = soup.find_all('div', class_='unit-card')
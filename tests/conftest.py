@@ -0,0 +1,77 @@
+"""
+Fixtures partagées des tests : joueur factice et base temporaire
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as swgoh_app
+
+
+def make_unit(i, **fields):
+    """Personnage factice n° i ; `fields` remplace les valeurs par défaut"""
+    unit = {
+        'base_id': f'UNIT{i}',
+        'name': f'Unit {i}',
+        'level': 85,
+        'gear_level': 12,
+        'relic_tier': 0,
+        'power': 20000 + i,
+        'galactic_power': 20000 + i,
+        'combat_type': 1,
+        'mods': []
+    }
+    unit.update(fields)
+    return unit
+
+
+def make_player(ally_code='123456789', unit_count=3, unit=None, **fields):
+    """
+    Joueur factice au format de fetch_player_data.
+    `unit(i)` donne les champs propres à l'unité i (mods compris),
+    `fields` ceux du joueur (name, guild_name, galactic_power...).
+    """
+    data = {
+        'name': f'Player {ally_code}',
+        'level': 85,
+        'guild_name': 'Test Guild',
+        'ally_code': ally_code,
+        'galactic_power': 1000000,
+        'character_galactic_power': 600000,
+        'ship_galactic_power': 400000,
+    }
+    data.update(fields)
+    data['roster'] = [make_unit(i, **(unit(i) if unit else {})) for i in range(unit_count)]
+    return {'data': data}
+
+
+@pytest.fixture(autouse=True)
+def isolated_caches(tmp_path, monkeypatch):
+    """
+    Catalogue vide et cache HTTP désactivé : unit_catalogue.json et
+    http_cache.db du répertoire courant n'influencent pas les tests.
+    Les tests du catalogue chargent tests/fixtures/unit_catalogue.json.
+    """
+    monkeypatch.setattr(swgoh_app, 'UNIT_CATALOGUE', swgoh_app.UnitCatalogue(str(tmp_path / 'unit_catalogue.json')))
+    monkeypatch.setattr(swgoh_app, 'HTTP_CACHE', None)
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    """Base temporaire initialisée, avec son propre pool de connexions fermé à la fin du test"""
+    path = tmp_path / 'test.db'
+    pool = swgoh_app.ConnectionPool()
+    monkeypatch.setattr(swgoh_app, 'DATABASE_PATH', str(path))
+    monkeypatch.setattr(swgoh_app, 'DB_POOL', pool)
+    swgoh_app.init_db()
+    yield path
+    pool.close()
+
+
+@pytest.fixture
+def client(temp_db):
+    return swgoh_app.app.test_client()
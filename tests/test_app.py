@@ -22,7 +22,7 @@ def test_imports():
     modules = {
         'flask': 'Flask',
         'requests': 'Requests',
-        'pandas': 'Pandas',
+        'numpy': 'NumPy',
         'sqlite3': 'SQLite3 (inclus)',
         'dotenv': 'python-dotenv'
     }
@@ -0,0 +1,48 @@
+"""
+Tests du benchmark de parsing (corpus versionné, sans réseau)
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bench_parser
+
+
+def test_bench_reports_speed_memory_and_accuracy():
+    """Chaque cible compatible est mesurée sur chaque fixture demandée"""
+    results = bench_parser.bench(rounds=1, fixtures=['roster_small', 'profile'])
+
+    assert results['corpus_version'] >= 1
+    assert set(results['results']) == {
+        'roster/roster_small', 'stream/roster_small', 'soup/roster_small', 'cards/roster_small', 'profile/profile'}
+    for stats in results['results'].values():
+        assert stats['ms'] > 0
+        assert stats['peak_mb'] >= 0
+
+    roster = results['results']['roster/roster_small']
+    assert roster['cards_per_s'] > 0
+    assert roster['accuracy']['expected'] == 25
+    assert roster['accuracy']['recall'] > 0.9
+    # Les deux chemins de parsing extraient exactement la même chose
+    assert results['results']['stream/roster_small']['accuracy'] == roster['accuracy']
+    assert results['results']['profile/profile']['accuracy']['exact'] == 1.0
+
+
+def test_roster_accuracy_counts_missing_characters():
+    expected = [
+        {'base_id': 'VADER', 'name': 'Darth Vader', 'power': 30000, 'relic_tier': 7, 'zeta_count': 0,
+         'is_galactic_legend': False, 'has_ultimate': False},
+        {'base_id': 'REY', 'name': 'Rey', 'power': 20000, 'relic_tier': 0, 'zeta_count': 0,
+         'is_galactic_legend': False, 'has_ultimate': False},
+    ]
+    found = [dict(expected[0], relic_tier=5)]
+
+    accuracy = bench_parser.roster_accuracy(found, expected)
+
+    assert accuracy['recall'] == 0.5
+    assert accuracy['precision'] == 1.0
+    assert accuracy['exact'] == 0.0
+    assert accuracy['fields']['name'] == 0.5
+    assert accuracy['fields']['relic_tier'] == 0.0
@@ -0,0 +1,46 @@
+"""
+Tests du rapport de temps d'import (bench_startup.py)
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bench_startup
+
+SAMPLE = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:       900 |       1500 | site
+import time:       300 |        300 |       markupsafe._speedups
+import time:      2000 |       2300 |     markupsafe
+import time:      5000 |       7300 |   flask
+import time:       400 |        400 |   sqlite3
+import time:      1000 |       8700 | app
+import time:        50 |         50 | json
+"""
+
+
+def test_parse_importtime_depths():
+    imports = bench_startup.parse_importtime(SAMPLE)
+
+    assert [(entry['name'], entry['depth']) for entry in imports][:4] == [
+        ('_io', 1), ('site', 0), ('markupsafe._speedups', 3), ('markupsafe', 2)]
+    assert imports[0]['self_us'] == 120
+
+
+def test_app_imports_only_counts_app_subtree():
+    """Les imports faits avant app (site) ne lui sont pas attribués"""
+    total_us, direct, modules = bench_startup.app_imports(bench_startup.parse_importtime(SAMPLE))
+
+    assert total_us == 8700
+    assert [entry['name'] for entry in direct] == ['flask', 'sqlite3']
+    assert modules == {'markupsafe._speedups', 'markupsafe', 'flask', 'sqlite3'}
+
+
+def test_app_starts_without_heavy_dependencies():
+    """pandas, bs4, cloudscraper et requests ne sont importés qu'à la première utilisation"""
+    _, _, modules = bench_startup.measure_once()
+
+    assert not modules & set(bench_startup.HEAVY_MODULES)
@@ -0,0 +1,112 @@
+"""
+Tests du catalogue local des unités (sans réseau)
+"""
+
+import json
+import os
+import shutil
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as swgoh_app
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+CATALOGUE = os.path.join(FIXTURES, 'unit_catalogue.json')
+
+
+def read_roster_fixture(ally_code):
+    with open(os.path.join(FIXTURES, 'swgoh_gg', 'p', ally_code, 'characters', 'index.html'), encoding='utf-8') as f:
+        return f.read()
+
+
+@pytest.fixture
+def catalogue(monkeypatch):
+    unit_catalogue = swgoh_app.UnitCatalogue(CATALOGUE)
+    monkeypatch.setattr(swgoh_app, 'UNIT_CATALOGUE', unit_catalogue)
+    return unit_catalogue
+
+
+def test_catalogue_lookup_gives_canonical_units(catalogue):
+    """Les noms et base_id viennent du catalogue, plus des heuristiques"""
+    roster = swgoh_app.parse_character_roster(read_roster_fixture('123456789'))
+    by_id = {unit['base_id']: unit for unit in roster}
+
+    # Noms trop courts pour l'heuristique, retrouvés grâce au portrait
+    assert by_id['JAWA']['name'] == 'Jawa'
+    assert by_id['CHEWBACCALEGENDARY']['name'] == 'Chewbacca'
+    # base_id officiel, différent du nom de fichier du portrait
+    assert by_id['SITHPALPATINE']['is_galactic_legend'] is True
+    assert 'GLOBALSITHLORD' not in by_id
+    assert len(roster) == 13
+
+
+def test_unknown_units_fall_back_to_heuristics(catalogue):
+    """Une unité absente du catalogue garde le nom deviné sur la carte"""
+    roster = swgoh_app.parse_character_roster(read_roster_fixture('987654321'))
+
+    assert 'KYLOUNMASKED' in {unit['base_id'] for unit in roster}
+
+
+def test_parse_pool_uses_the_same_catalogue(catalogue, monkeypatch):
+    """Les processus du pool lisent le catalogue du processus principal, pas celui du répertoire courant"""
+    monkeypatch.setattr(swgoh_app, 'PARSE_WORKERS', 1)
+    monkeypatch.setattr(swgoh_app, 'PARSE_POOL_MIN_BYTES', 0)
+    html = read_roster_fixture('123456789')
+
+    try:
+        roster = swgoh_app.parse_roster_page(html, timeout=60)
+    finally:
+        swgoh_app.shutdown_parse_pool()
+
+    assert roster == swgoh_app.parse_character_roster(html)
+    assert 'CHEWBACCALEGENDARY' in {unit['base_id'] for unit in roster}
+
+
+def test_catalogue_refreshed_when_file_changes(tmp_path, monkeypatch):
+    path = tmp_path / 'units.json'
+    shutil.copy(CATALOGUE, path)
+    unit_catalogue = swgoh_app.UnitCatalogue(str(path))
+
+    assert unit_catalogue.refresh() is True
+    assert unit_catalogue.refresh() is False
+    assert len(unit_catalogue) == 14
+    monkeypatch.setattr(swgoh_app, 'UNIT_CATALOGUE', unit_catalogue)
+    version = swgoh_app.parsed_cache_version()
+
+    data = json.loads(path.read_text(encoding='utf-8'))
+    data['units'][0]['name'] = 'Emperor Palpatine'
+    path.write_text(json.dumps(data), encoding='utf-8')
+    os.utime(path, (1, 1))
+
+    assert unit_catalogue.lookup_portrait('GlobalSithLord')['name'] == 'Sith Eternal Emperor'
+    # Les résultats parsés en cache avec l'ancien catalogue sont invalidés
+    assert swgoh_app.parsed_cache_version() != version
+    assert unit_catalogue.lookup_portrait('globalsithlord')['name'] == 'Emperor Palpatine'
+
+
+def test_build_catalogue_from_api_payloads():
+    characters = [{'base_id': 'VADER', 'name': 'Darth Vader', 'combat_type': 1,
+                   'image': 'https://game-assets.swgoh.gg/textures/tex.charui_vader.png'}]
+    ships = [{'base_id': 'CAPITALEXECUTOR', 'name': 'Executor',
+              'image': 'https://game-assets.swgoh.gg/textures/tex.charui_capitalexecutor.png'}]
+
+    units = swgoh_app.build_unit_catalogue(characters, ships)['units']
+
+    assert units == [
+        {'base_id': 'VADER', 'name': 'Darth Vader', 'portrait': 'vader', 'combat_type': 1, 'is_galactic_legend': False},
+        {'base_id': 'CAPITALEXECUTOR', 'name': 'Executor', 'portrait': 'capitalexecutor', 'combat_type': 2,
+         'is_galactic_legend': False},
+    ]
+
+
+def test_refresh_endpoint_reloads_file(catalogue):
+    client = swgoh_app.app.test_client()
+
+    response = client.post('/api/catalogue/refresh')
+
+    assert response.status_code == 200
+    assert response.get_json()['units'] == 14
+    assert response.get_json()['fingerprint'] == catalogue.fingerprint
@@ -3,8 +3,12 @@
 Script de test rapide pour vérifier que cloudscraper fonctionne
 """
 
+import os
 import sys
 
+# SWGOH_GG_BASE_URL=http://127.0.0.1:8765 pour utiliser fixture_server.py
+BASE_URL = os.environ.get('SWGOH_GG_BASE_URL', 'https://swgoh.gg').rstrip('/')
+
 def test_import():
     """Test l'import de cloudscraper"""
     print("\n" + "="*60)
@@ -51,7 +55,7 @@ def test_swgoh_gg(ally_code="299146629"):
         )
         
         # Test de connexion
-        url = f"https://swgoh.gg/p/{ally_code}/"
+        url = f"{BASE_URL}/p/{ally_code}/"
         print(f"📡 Connexion à: {url}")
         print(f"⏳ Patientez...")
         
@@ -120,7 +124,7 @@ def test_roster(ally_code="299146629"):
         import re
         
         scraper = cloudscraper.create_scraper()
-        url = f"https://swgoh.gg/p/{ally_code}/characters/"
+        url = f"{BASE_URL}/p/{ally_code}/characters/"
         
         print(f"📡 Connexion à: {url}")
         response = scraper.get(url, timeout=20)
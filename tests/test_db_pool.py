@@ -0,0 +1,88 @@
+"""
+Tests du pool de connexions SQLite (base temporaire)
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as swgoh_app
+
+
+@pytest.fixture
+def pool(tmp_path, monkeypatch):
+    pool = swgoh_app.ConnectionPool(size=2)
+    monkeypatch.setattr(swgoh_app, 'DB_POOL', pool)
+    monkeypatch.setattr(swgoh_app, 'DATABASE_PATH', str(tmp_path / 'test.db'))
+    swgoh_app.init_db()
+    yield pool
+    pool.close()
+
+
+def test_connections_are_reused(pool):
+    """close() rend la connexion au pool, le prochain emprunt la réutilise"""
+    conn = swgoh_app.get_db_connection()
+    conn.close()
+    again = swgoh_app.get_db_connection()
+
+    assert again is conn
+    assert pool.stats['reused'] >= 1
+    assert again.execute('SELECT COUNT(*) FROM player_info').fetchone()[0] == 0
+    again.close()
+    again.close()  # double close sans effet
+    assert len(pool._idle[swgoh_app.DATABASE_PATH]) == 1
+
+
+def test_pragmas_applied(pool):
+    """WAL, synchronous=NORMAL et busy_timeout sont actifs sur les connexions du pool"""
+    conn = swgoh_app.get_db_connection()
+    try:
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        assert conn.execute('PRAGMA synchronous').fetchone()[0] == 1  # NORMAL
+        assert conn.execute('PRAGMA busy_timeout').fetchone()[0] == swgoh_app.SQLITE_PRAGMAS['busy_timeout']
+    finally:
+        conn.close()
+
+
+def test_reads_not_blocked_by_open_write(pool):
+    """Une lecture aboutit pendant qu'une écriture est en cours (non commitée)"""
+    writer = swgoh_app.get_db_connection()
+    writer.execute('BEGIN IMMEDIATE')
+    writer.execute("INSERT INTO player_info (ally_code, name) VALUES ('123456789', 'Writer')")
+
+    reader = swgoh_app.get_db_connection()
+    reader.execute('PRAGMA busy_timeout = 0')
+    try:
+        assert reader.execute('SELECT COUNT(*) FROM player_info').fetchone()[0] == 0
+    finally:
+        reader.execute(f"PRAGMA busy_timeout = {swgoh_app.SQLITE_PRAGMAS['busy_timeout']}")
+        reader.close()
+        writer.commit()
+        writer.close()
+
+
+def test_uncommitted_transaction_rolled_back_on_close(pool):
+    """Une connexion rendue sans commit ne garde pas sa transaction"""
+    conn = swgoh_app.get_db_connection()
+    conn.execute("INSERT INTO player_info (ally_code, name) VALUES ('123456789', 'Oubli')")
+    conn.close()
+
+    conn = swgoh_app.get_db_connection()
+    try:
+        assert not conn.in_transaction
+        assert conn.execute('SELECT COUNT(*) FROM player_info').fetchone()[0] == 0
+    finally:
+        conn.close()
+
+
+def test_extra_connections_closed_beyond_pool_size(pool):
+    """Au-delà de `size` connexions inactives, les connexions rendues sont fermées"""
+    connections = [swgoh_app.get_db_connection() for _ in range(4)]
+    for conn in connections:
+        conn.close()
+
+    assert len(pool._idle[swgoh_app.DATABASE_PATH]) == 2
+    assert pool.stats['closed'] == 2
@@ -0,0 +1,98 @@
+"""
+Tests des exports en flux : CSV, Arrow et Parquet, joueur et guilde (base temporaire)
+"""
+
+import csv
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as swgoh_app
+from conftest import make_player
+
+
+def export_units(owner):
+    """Noms avec virgule (échappement CSV), deux mods de vitesse par unité (ids préfixés par `owner`)"""
+    return lambda i: {
+        'name': f'Unit, {i}', 'relic_tier': i % 8, 'galactic_power': 20000 + (i * 7919) % 5000,
+        'mods': [{'id': f'{owner}-mod-{i}-{slot}', 'slot': slot,
+                  'secondary_stats': [{'name': 'Speed', 'value': slot + 0.5}]} for slot in (1, 2)]
+    }
+
+
+@pytest.fixture
+def client(client, monkeypatch):
+    monkeypatch.setattr(swgoh_app, 'EXPORT_BATCH', 7)
+    for ally_code, guild, unit_count in (('111111111', 'Guilde', 25), ('222222222', 'Guilde', 6),
+                                         ('333333333', 'Autre', 4), ('444444444', 'No Guild', 3)):
+        player = make_player(ally_code, unit_count=unit_count, unit=export_units(ally_code), guild_name=guild)
+        swgoh_app.save_player_data(ally_code, player)
+    return client
+
+
+def read_csv(response):
+    return list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+
+
+def test_mods_csv_streamed(client):
+    response = client.get('/api/export/mods/111111111')
+
+    assert response.is_streamed
+    assert response.mimetype == 'text/csv'
+    assert 'attachment; filename="mods_111111111_' in response.headers['Content-Disposition']
+    rows = read_csv(response)
+    assert len(rows) == 50
+    assert {row['ally_code'] for row in rows} == {'111111111'}
+    assert float(rows[0]['speed']) == 1.5
+
+
+def test_roster_csv_in_gp_order(client):
+    rows = read_csv(client.get('/api/export/roster/111111111'))
+
+    gps = [int(row['galactic_power']) for row in rows]
+    assert len(gps) == 25
+    assert gps == sorted(gps, reverse=True)
+    assert {row['name'] for row in rows} >= {'Unit, 0'}
+
+
+def test_unknown_player_exports_header_only(client):
+    assert client.get('/api/export/mods/999999999').get_data(as_text=True).startswith('id,ally_code,')
+    assert len(read_csv(client.get('/api/export/mods/999999999'))) == 0
+
+
+def test_guild_export_includes_loaded_members(client):
+    rows = read_csv(client.get('/api/export/guild/222222222/roster'))
+    assert [len([row for row in rows if row['ally_code'] == code]) for code in ('111111111', '222222222')] == [25, 6]
+    assert len(rows) == 31
+
+    solo = read_csv(client.get('/api/export/guild/444444444/mods'))
+    assert {row['ally_code'] for row in solo} == {'444444444'}
+    assert client.get('/api/export/guild/999999999/mods').status_code == 404
+
+
+def test_invalid_export(client):
+    assert client.get('/api/export/loadouts/111111111').status_code == 400
+    assert client.get('/api/export/mods/111111111?format=xlsx').status_code == 400
+
+
+@pytest.mark.parametrize('fmt', ['arrow', 'parquet'])
+def test_columnar_exports(client, fmt):
+    pa = pytest.importorskip('pyarrow')
+    response = client.get(f'/api/export/guild/111111111/mods?format={fmt}')
+    assert response.status_code == 200
+    assert response.is_streamed
+
+    if fmt == 'arrow':
+        table = pa.ipc.open_stream(response.data).read_all()
+    else:
+        import pyarrow.parquet as pq
+        table = pq.read_table(io.BytesIO(response.data))
+
+    assert table.num_rows == 62
+    assert table.schema.field('slot').type == pa.int64()
+    assert table.schema.field('speed').type == pa.float64()
+    assert sorted(set(table.column('ally_code').to_pylist())) == ['111111111', '222222222']
@@ -0,0 +1,94 @@
+"""
+Tests de la récupération concurrente profil + roster (sans réseau)
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as swgoh_app
+
+PROFILE_HTML = """
+<html><body>
+  <h5 class="pull-left">Test Player</h5>
+  <a href="/g/1234/test-guild/">Test Guild</a>
+  <div class="profile-stat"><div class="stat-label">Galactic Power</div><div class="stat-value">5,000,000</div></div>
+  <div class="profile-stat"><div class="stat-label">Galactic Power (Characters)</div><div class="stat-value">3,000,000</div></div>
+  <div class="profile-stat"><div class="stat-label">Galactic Power (Ships)</div><div class="stat-value">2,000,000</div></div>
+</body></html>
+"""
+
+ROSTER_HTML = """
+<html><body>
+  <div class="unit-card">
+    <img class="character-portrait__img" src="https://game-assets.swgoh.gg/tex.charui_vader.png">
+    <div>Darth Vader</div><div>31,250</div>
+    <svg><text>7</text></svg>
+  </div>
+</body></html>
+"""
+
+
+class FakeResponse:
+    def __init__(self, status_code, text, headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+
+class SlowSession:
+    """Session factice : chaque GET prend `delay` secondes"""
+
+    delay = 0.3
+
+    def get(self, url, timeout=None, headers=None):
+        time.sleep(self.delay)
+        if url.endswith('/characters/'):
+            return FakeResponse(200, ROSTER_HTML)
+        return FakeResponse(200, PROFILE_HTML)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_pool(monkeypatch):
+    pool = swgoh_app.ScraperPool(size=4, factory=SlowSession)
+    monkeypatch.setattr(swgoh_app, 'SCRAPER_POOL', pool)
+    # Chemin HTML (repli quand l'endpoint JSON est indisponible)
+    monkeypatch.setattr(swgoh_app, 'PLAYER_JSON_ENABLED', False)
+    monkeypatch.setattr(swgoh_app, 'RATE_LIMITER', swgoh_app.TokenBucket(rate=1000, capacity=1000))
+    monkeypatch.setattr(swgoh_app, 'SCRAPE_BREAKER', swgoh_app.CircuitBreaker())
+    return pool
+
+
+def test_pages_fetched_concurrently(fake_pool):
+    """La latence est celle du plus lent des deux téléchargements"""
+    start = time.monotonic()
+    result = swgoh_app.fetch_player_data('123-456-789')
+    elapsed = time.monotonic() - start
+
+    assert elapsed < 2 * SlowSession.delay
+    data = result['data']
+    assert data['name'] == 'Test Player'
+    assert data['guild_name'] == 'Test Guild'
+    assert data['galactic_power'] == 5000000
+    assert data['character_galactic_power'] == 3000000
+    assert [unit['base_id'] for unit in data['roster']] == ['VADER']
+
+    timings = result['timings']
+    for phase in ('fetch_profile', 'parse_profile', 'fetch_roster', 'parse_roster', 'total'):
+        assert phase in timings
+
+
+def test_deadline_falls_back_to_demo(fake_pool, monkeypatch):
+    """Au-delà de l'échéance globale, on retombe sur les données de démo"""
+    monkeypatch.setattr(swgoh_app, 'FETCH_DEADLINE', 0.1)
+
+    result = swgoh_app.fetch_player_data('123456789')
+
+    assert result['data']['name'] == 'Demo Player'
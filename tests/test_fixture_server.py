@@ -0,0 +1,137 @@
+"""
+Tests du serveur de rejeu des fixtures SWGOH.gg
+"""
+
+import os
+import sys
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as swgoh_app
+import fixture_server
+
+FIXTURE_ALLY_CODE = '123456789'
+
+
+@pytest.fixture
+def replay(monkeypatch):
+    """Pointe l'application sur un serveur de rejeu local"""
+    servers = []
+
+    def start(**options):
+        server = fixture_server.start_replay_server(seed=1, **options)
+        servers.append(server)
+        monkeypatch.setattr(swgoh_app, 'SWGOH_GG_BASE_URL', server.base_url)
+        monkeypatch.setattr(swgoh_app, 'SWGOH_GG_API_URL', f'{server.base_url}/api')
+        return server
+
+    # Chemin HTML (repli quand l'endpoint JSON est indisponible)
+    monkeypatch.setattr(swgoh_app, 'PLAYER_JSON_ENABLED', False)
+    monkeypatch.setattr(swgoh_app, 'RATE_LIMITER', swgoh_app.TokenBucket(rate=1000, capacity=1000))
+    monkeypatch.setattr(swgoh_app, 'SCRAPE_BREAKER', swgoh_app.CircuitBreaker())
+    monkeypatch.setattr(swgoh_app, 'SCRAPE_BACKOFF_BASE', 0.01)
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_corpus_lists_fixture_player():
+    assert FIXTURE_ALLY_CODE in fixture_server.list_ally_codes(fixture_server.DEFAULT_CORPUS)
+
+
+def test_fetch_player_from_replay(replay):
+    """Le scraper récupère et parse les pages servies par le rejeu"""
+    server = replay()
+
+    result = swgoh_app.fetch_player_data(FIXTURE_ALLY_CODE, allow_demo=False)
+
+    data = result['data']
+    assert data['name'] == 'Fixture Player'
+    assert data['guild_name'] == 'Fixture Guild'
+    assert data['galactic_power'] == 6234567
+    assert len(data['roster']) == 11
+    assert server.stats['served'] == 2
+
+
+def test_injected_latency(replay):
+    """La latence injectée se retrouve dans les timings de récupération"""
+    replay(latency=0.1)
+
+    result = swgoh_app.fetch_player_data(FIXTURE_ALLY_CODE, allow_demo=False)
+
+    assert result['timings']['fetch_profile'] >= 100
+    assert result['timings']['fetch_roster'] >= 100
+
+
+def test_injected_errors_are_throttled(replay):
+    """Un taux d'erreur de 100% en 429 donne un échec sans données de démo"""
+    server = replay(error_rate=1.0, error_codes=(429,))
+
+    assert swgoh_app.fetch_player_data(FIXTURE_ALLY_CODE) is None
+    assert server.stats['errors'] > 0
+
+
+def test_unknown_player_is_404(replay):
+    replay()
+    assert swgoh_app.fetch_player_data('000000001', allow_demo=False) is None
+
+
+def test_fetch_player_json_endpoint(replay, temp_db, monkeypatch):
+    """L'endpoint JSON donne unités et mods complets, sans scraping HTML"""
+    monkeypatch.setattr(swgoh_app, 'PLAYER_JSON_ENABLED', True)
+    server = replay()
+
+    result = swgoh_app.fetch_player_data(FIXTURE_ALLY_CODE, allow_demo=False)
+
+    assert result['source'] == 'json'
+    assert server.stats['served'] == 1
+    data = result['data']
+    assert data['guild_name'] == 'Fixture Guild'
+    units = {unit['base_id']: unit for unit in data['roster']}
+    assert units['VADER']['relic_tier'] == 7
+    assert units['VADER']['zeta_count'] == 3
+    assert units['SITHPALPATINE']['is_galactic_legend'] is True
+    assert units['CAPITALEXECUTOR']['combat_type'] == 2
+    assert len(units['VADER']['mods']) == 2
+
+    assert swgoh_app.save_player_data(FIXTURE_ALLY_CODE, result)
+    conn = swgoh_app.get_db_connection()
+    characters = conn.execute('SELECT COUNT(*) FROM characters').fetchone()[0]
+    mod = dict(conn.execute("SELECT * FROM mods WHERE id = 'mod-vader-1'").fetchone())
+    conn.close()
+    assert characters == 13
+    assert mod['character_id'] == 'VADER'
+    assert (mod['speed'], mod['offense'], mod['critical_chance'], mod['potency']) == (24, 89, 4.63, 2.1)
+
+
+def test_json_endpoint_falls_back_to_html(replay, monkeypatch):
+    """Sans réponse JSON (404), les pages HTML sont scrapées"""
+    monkeypatch.setattr(swgoh_app, 'PLAYER_JSON_ENABLED', True)
+    server = replay()
+
+    result = swgoh_app.fetch_player_data('987654321', allow_demo=False)
+
+    assert result['source'] == 'html'
+    assert server.stats['missing'] == 1
+    assert server.stats['served'] == 2
+    assert len(result['data']['roster']) == 8
+
+
+def test_stats_counted_under_concurrent_requests(replay):
+    """Chaque réponse est comptée, y compris avec des handlers concurrents"""
+    server = replay()
+    url = f'{server.base_url}/p/{FIXTURE_ALLY_CODE}/'
+
+    def get(_):
+        with urllib.request.urlopen(url) as response:
+            response.read()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(get, range(40)))
+
+    assert server.stats['served'] == 40
@@ -0,0 +1,128 @@
+"""
+Tests de l'historique des rosters (base temporaire, horloge simulée)
+"""
+
+import copy
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as swgoh_app
+from conftest import make_player
+
+DAY = swgoh_app.DAY
+START = 1_700_000_000
+
+
+@pytest.fixture
+def clock(temp_db, monkeypatch):
+    now = [START]
+    monkeypatch.setattr(swgoh_app.time, 'time', lambda: now[0])
+    return now
+
+
+def count_rows(table):
+    conn = swgoh_app.get_db_connection()
+    count = conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+    conn.close()
+    return count
+
+
+def test_snapshot_roundtrip():
+    units = [(i * 3 + 1, 20000 + i, 13, i % 10) for i in range(300)]
+
+    packed = swgoh_app.pack_roster_snapshot(reversed(units))
+
+    assert swgoh_app.unpack_roster_snapshot(packed) == units
+    assert len(packed) < 300 * 4 * 4 / 2
+
+
+def test_progress_recorded_across_refreshes(clock):
+    """GP, progression d'une unité et relic ups au fil des chargements"""
+    player = make_player()
+    swgoh_app.save_player_data('123456789', copy.deepcopy(player))
+
+    clock[0] += DAY
+    swgoh_app.save_player_data('123456789', copy.deepcopy(player))  # inchangé : pas de snapshot
+    assert count_rows('roster_snapshots') == 1
+
+    clock[0] += DAY
+    player['data']['galactic_power'] += 5000
+    player['data']['roster'][1].update(relic_tier=3, gear_level=13, galactic_power=25000)
+    player['data']['roster'].append(dict(player['data']['roster'][0], base_id='NEWUNIT'))
+    swgoh_app.save_player_data('123456789', copy.deepcopy(player))
+
+    points = swgoh_app.gp_history('123456789', days=30)
+    assert [point['galactic_power'] for point in points] == [1000000, 1000000, 1005000]
+    assert points[-1]['character_count'] == 4
+
+    progress = swgoh_app.unit_history('123456789', 'UNIT1', days=30)
+    assert [(point['relic_tier'], point['galactic_power']) for point in progress] == [(0, 20001), (3, 25000)]
+
+    events = swgoh_app.unit_events('123456789', days=30)
+    assert {(event['kind'], event['base_id']) for event in events} == {
+        ('relic', 'UNIT1'), ('gear', 'UNIT1'), ('unlock', 'NEWUNIT')}
+    relic_ups = swgoh_app.unit_events('123456789', kind='relic', days=30)
+    assert [(event['from_value'], event['to_value']) for event in relic_ups] == [(0, 3)]
+    assert swgoh_app.unit_events('123456789', days=1, now=START + 10 * DAY) == []
+
+
+def test_empty_roster_records_no_history(clock):
+    """Un chargement sans roster ne crée ni point, ni snapshot, ni événement"""
+    swgoh_app.save_player_data('123456789', make_player())
+    clock[0] += DAY
+    swgoh_app.save_player_data('123456789', make_player(unit_count=0, galactic_power=0))
+
+    assert [point['galactic_power'] for point in swgoh_app.gp_history('123456789', days=30)] == [1000000]
+    assert count_rows('roster_snapshots') == 1
+    assert count_rows('unit_events') == 0
+
+
+def test_unit_history_starts_from_previous_snapshot(clock):
+    """Une unité inchangée depuis avant la période a quand même un point de départ"""
+    swgoh_app.save_player_data('123456789', make_player())
+
+    progress = swgoh_app.unit_history('123456789', 'UNIT2', days=7, now=START + 30 * DAY)
+
+    assert progress == [{'taken_at': START + 23 * DAY, 'galactic_power': 20002, 'gear_level': 12, 'relic_tier': 0}]
+
+
+def test_retention_and_downsampling(clock):
+    """Points bruts récents, puis un par jour, un par semaine, rien au-delà de la rétention"""
+    conn = swgoh_app.get_db_connection()
+    c = conn.cursor()
+    changes = swgoh_app.new_change_set()
+    changes['updated_units'] = ['UNIT0']
+    end = START + 400 * DAY
+    for taken_at in range(START, end + 1, DAY // 4):
+        swgoh_app.record_history(c, '123456789', {'galactic_power': taken_at}, [('UNIT0', 1, 1, 1)],
+                                 changes, now=taken_at)
+    conn.commit()
+    conn.close()
+
+    points = swgoh_app.gp_history('123456789', days=1000, now=end)
+    ages = [(end - point['taken_at']) / DAY for point in points]
+
+    assert max(ages) <= swgoh_app.HISTORY_RETENTION_DAYS
+    assert sum(1 for age in ages if age < swgoh_app.HISTORY_RAW_DAYS) == 4 * swgoh_app.HISTORY_RAW_DAYS
+    assert len(points) < 4 * swgoh_app.HISTORY_RAW_DAYS + swgoh_app.HISTORY_DAILY_DAYS + 52 + 2
+    assert count_rows('roster_snapshots') == len(points)
+
+    daily = swgoh_app.gp_history('123456789', days=30, resolution='day', now=end)
+    assert len(daily) == 31
+
+
+def test_history_endpoints(clock):
+    swgoh_app.save_player_data('123456789', make_player())
+    client = swgoh_app.app.test_client()
+
+    response = client.get('/api/history/123456789?days=30&resolution=week')
+    assert response.status_code == 200
+    assert len(response.get_json()['points']) == 1
+
+    assert client.get('/api/history/123456789?resolution=hour').status_code == 400
+    assert client.get('/api/history/123456789/unit/UNIT0').get_json()['points'][0]['galactic_power'] == 20000
+    assert client.get('/api/history/123456789/events?kind=relic').get_json()['events'] == []
@@ -0,0 +1,104 @@
+"""
+Tests du cache HTTP sur disque (sans réseau)
+"""
+
+import os
+import sys
+import zlib
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as swgoh_app
+from test_fetch import PROFILE_HTML, ROSTER_HTML, FakeResponse
+
+
+class RevalidatingSession:
+    """Session factice : répond 304 si l'ETag envoyé correspond"""
+
+    calls = []
+
+    def get(self, url, timeout=None, headers=None):
+        headers = headers or {}
+        RevalidatingSession.calls.append((url, dict(headers)))
+        if headers.get('If-None-Match') == '"v1"':
+            return FakeResponse(304, '')
+        text = ROSTER_HTML if url.endswith('/characters/') else PROFILE_HTML
+        return FakeResponse(200, text, headers={'ETag': '"v1"'})
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    RevalidatingSession.calls = []
+    response_cache = swgoh_app.ResponseCache(path=str(tmp_path / 'cache.db'), ttl=60)
+    monkeypatch.setattr(swgoh_app, 'HTTP_CACHE', response_cache)
+    monkeypatch.setattr(swgoh_app, 'SCRAPER_POOL',
+                        swgoh_app.ScraperPool(size=2, factory=RevalidatingSession))
+    # Chemin HTML (repli quand l'endpoint JSON est indisponible)
+    monkeypatch.setattr(swgoh_app, 'PLAYER_JSON_ENABLED', False)
+    monkeypatch.setattr(swgoh_app, 'RATE_LIMITER', swgoh_app.TokenBucket(rate=1000, capacity=1000))
+    monkeypatch.setattr(swgoh_app, 'SCRAPE_BREAKER', swgoh_app.CircuitBreaker())
+    return response_cache
+
+
+def test_fresh_hit_skips_network_and_parse(cache, monkeypatch):
+    """Un second chargement dans le TTL ne télécharge ni ne parse rien"""
+    first = swgoh_app.fetch_player_data('123456789')
+    assert first['cache'] == {'profile': 'miss', 'roster': 'miss'}
+    assert len(RevalidatingSession.calls) == 2
+
+    def no_parse(html):
+        raise AssertionError("parsing inattendu")
+
+    monkeypatch.setattr(swgoh_app, 'parse_character_roster', no_parse)
+    monkeypatch.setattr(swgoh_app, 'parse_profile_page', no_parse)
+
+    second = swgoh_app.fetch_player_data('123456789')
+    assert second['cache'] == {'profile': 'hit', 'roster': 'hit'}
+    assert len(RevalidatingSession.calls) == 2
+    assert second['data']['roster'] == first['data']['roster']
+    assert second['data']['name'] == 'Test Player'
+
+
+def test_expired_entry_is_revalidated(cache):
+    """Une entrée expirée est revalidée avec If-None-Match (304)"""
+    cache.ttl = 0
+    swgoh_app.fetch_player_data('123456789')
+
+    result = swgoh_app.fetch_player_data('123456789')
+
+    assert result['cache'] == {'profile': 'revalidated', 'roster': 'revalidated'}
+    assert RevalidatingSession.calls[-1][1]['If-None-Match'] == '"v1"'
+    assert result['data']['roster'][0]['base_id'] == 'VADER'
+
+
+def test_parser_version_invalidates_parsed(cache, monkeypatch):
+    """Un changement de PARSER_VERSION force un nouveau parsing du corps en cache"""
+    cache.store('https://example.test/', '<p>ok</p>', parsed={'a': 1})
+    monkeypatch.setattr(swgoh_app, 'PARSER_VERSION', swgoh_app.PARSER_VERSION + 1)
+
+    entry = cache.get('https://example.test/')
+
+    assert entry['parsed'] is None
+    assert swgoh_app.ResponseCache.text(entry) == '<p>ok</p>'
+
+
+def test_lru_eviction_bounds_size(tmp_path):
+    """Les entrées les moins récemment utilisées sont évincées"""
+    pages = {name: os.urandom(1000).hex() for name in 'abc'}
+    entry_size = len(zlib.compress(pages['a'].encode()))
+    small = swgoh_app.ResponseCache(path=str(tmp_path / 'small.db'), ttl=60,
+                                    max_bytes=int(entry_size * 2.5))
+
+    small.store('https://example.test/a', pages['a'])
+    small.store('https://example.test/b', pages['b'])
+    small.get('https://example.test/a')  # 'b' devient la moins récente
+    small.store('https://example.test/c', pages['c'])
+
+    assert small.get('https://example.test/b') is None
+    assert small.get('https://example.test/a') is not None
+    assert small.get('https://example.test/c') is not None
@@ -0,0 +1,133 @@
+"""
+Tests de l'ingestion en masse (sans réseau, base temporaire)
+"""
+
+import os
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as swgoh_app
+from conftest import make_player
+
+
+def test_ingest_reports_failures(temp_db, monkeypatch):
+    """Les membres en échec sont listés sans bloquer les autres"""
+    def fake_fetch(ally_code, allow_demo=True):
+        assert not allow_demo
+        return None if ally_code == '999999999' else make_player(ally_code)
+
+    monkeypatch.setattr(swgoh_app, 'fetch_player_data', fake_fetch)
+
+    report = swgoh_app.ingest_players(
+        ['111-111-111', '222222222', '111111111', '999999999', 'abc'], workers=3)
+
+    assert sorted(report['succeeded']) == ['111111111', '222222222']
+    assert set(report['failed']) == {'999999999', 'abc'}
+    assert report['requested'] == 4
+    assert report['total_characters'] == 6
+
+    conn = swgoh_app.get_db_connection()
+    count = conn.execute('SELECT COUNT(*) FROM characters').fetchone()[0]
+    conn.close()
+    assert count == 6
+
+
+def test_ingest_counts_characters_only(temp_db, monkeypatch):
+    """Les vaisseaux du roster ne sont pas comptés comme personnages"""
+    def fetch_with_ship(ally_code, allow_demo=True):
+        return make_player(ally_code, unit_count=4, unit=lambda i: {'combat_type': 2} if i == 0 else {})
+
+    monkeypatch.setattr(swgoh_app, 'fetch_player_data', fetch_with_ship)
+
+    report = swgoh_app.ingest_players(['111111111'], workers=1)
+
+    assert report['members']['111111111']['characters'] == 3
+    assert report['total_characters'] == 3
+    assert report['total_rows'] == 1 + 3
+
+
+def test_ingest_runs_in_parallel(temp_db, monkeypatch):
+    """Les récupérations sont faites en parallèle par le pool de workers"""
+    def slow_fetch(ally_code, allow_demo=True):
+        time.sleep(0.2)
+        return make_player(ally_code, unit_count=1)
+
+    monkeypatch.setattr(swgoh_app, 'fetch_player_data', slow_fetch)
+    codes = [f'{i:09d}' for i in range(1, 9)]
+
+    start = time.monotonic()
+    report = swgoh_app.ingest_players(codes, workers=8)
+
+    assert time.monotonic() - start < 8 * 0.2 / 2
+    assert len(report['succeeded']) == 8
+    assert report['players_per_minute'] > 0
+
+
+def test_save_streamed_roster_in_one_transaction(temp_db, monkeypatch):
+    """
+    Un roster en flux est parsé avant la première écriture : les autres
+    écrivains ne sont pas bloqués pendant le parsing, les lecteurs voient
+    l'ancien roster jusqu'au commit
+    """
+    monkeypatch.setattr(swgoh_app, 'SAVE_BATCH_SIZE', 4)
+    assert swgoh_app.save_player_data('123456789', make_player('123456789', unit_count=3))
+    player = make_player('123456789', unit_count=10)
+    units = player['data']['roster']
+    visible = []
+
+    def streamed_roster():
+        for i, unit in enumerate(units):
+            if i == 8:
+                conn = sqlite3.connect(str(temp_db), timeout=0.1)
+                visible.append(conn.execute('SELECT COUNT(*) FROM characters').fetchone()[0])
+                with conn:
+                    conn.execute("INSERT INTO player_info (ally_code, name) VALUES ('987654321', 'Autre')")
+                conn.close()
+            yield unit
+
+    player['data']['roster'] = streamed_roster()
+
+    assert swgoh_app.save_player_data('123456789', player)
+    assert visible == [3]
+
+    conn = swgoh_app.get_db_connection()
+    count = conn.execute('SELECT COUNT(*) FROM characters').fetchone()[0]
+    conn.close()
+    assert count == 10
+
+
+def test_save_reports_rows_and_mods(temp_db, monkeypatch):
+    """Personnages et mods sont écrits par lots ; la sauvegarde renvoie son débit"""
+    monkeypatch.setattr(swgoh_app, 'SAVE_BATCH_SIZE', 7)
+    player = make_player('123456789', unit_count=20)
+    for i, unit in enumerate(player['data']['roster']):
+        unit['mods'] = [
+            {'id': f'mod-{i}-{slot}', 'slot': slot, 'set': 'speed', 'level': 15, 'tier': 5, 'rarity': 6,
+             'primary_stat': {'name': 'Speed', 'value': 32},
+             'secondary_stats': [{'name': 'Speed', 'value': slot}, {'name': 'Offense %', 'value': 1.5}]}
+            for slot in range(1, 7)
+        ]
+
+    stats = swgoh_app.save_player_data('123456789', player)
+
+    assert stats['characters'] == 20
+    assert stats['mods'] == 120
+    assert stats['rows'] == 141
+    assert stats['rows_per_s'] > 0
+
+    conn = swgoh_app.get_db_connection()
+    mod = dict(conn.execute("SELECT * FROM mods WHERE id = 'mod-19-6'").fetchone())
+    assert mod['character_id'] == 'UNIT19'
+    assert mod['speed'] == 6
+    assert mod['offense_percent'] == 1.5
+    assert mod['is_equipped'] == 1
+
+    inventory = [(None, {'id': f'free-{i}', 'slot': i % 6 + 1}, False) for i in range(15)]
+    assert swgoh_app.save_mods(conn.cursor(), '123456789', inventory, batch_size=4) == 15
+    conn.commit()
+    free = conn.execute('SELECT COUNT(*) FROM mods WHERE is_equipped = 0 AND character_id IS NULL').fetchone()[0]
+    conn.close()
+    assert free == 15
@@ -0,0 +1,115 @@
+"""
+Tests de la file de jobs et du chargement asynchrone (sans réseau)
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as swgoh_app
+from conftest import make_player
+
+
+def wait_job(queue, job_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job['status'] in ('done', 'error'):
+            return job
+        time.sleep(0.01)
+    raise AssertionError("job non terminé")
+
+
+def test_job_reports_phases_and_result():
+    """Le job passe par ses phases et expose son résultat"""
+    queue = swgoh_app.JobQueue(workers=1)
+    release = threading.Event()
+
+    def task(report, value):
+        report('fetching', 10)
+        release.wait(2)
+        report('saving', 80)
+        return value * 2
+
+    job = queue.submit(task, 21)
+    assert job['status'] in ('queued', 'running')
+
+    time.sleep(0.05)
+    assert queue.get(job['id'])['phase'] == 'fetching'
+    release.set()
+
+    job = wait_job(queue, job['id'])
+    assert job['status'] == 'done'
+    assert job['progress'] == 100
+    assert job['result'] == 42
+
+
+def test_job_error_and_key_dedup():
+    """Les erreurs sont capturées ; une même clé n'est pas mise deux fois en file"""
+    queue = swgoh_app.JobQueue(workers=1)
+    release = threading.Event()
+
+    def failing(report):
+        release.wait(2)
+        raise ValueError("boom")
+
+    first = queue.submit(failing, key='player:1')
+    second = queue.submit(failing, key='player:1')
+    assert first['id'] == second['id']
+
+    release.set()
+    job = wait_job(queue, first['id'])
+    assert job['status'] == 'error'
+    assert job['error'] == 'boom'
+
+    # Une fois terminé, la clé est libérée
+    third = queue.submit(lambda report: 'ok', key='player:1')
+    assert third['id'] != first['id']
+
+
+def test_load_player_data_endpoint_enqueues(client, monkeypatch):
+    """/api/load_player_data renvoie un job_id, le dashboard arrive via /api/jobs"""
+    monkeypatch.setattr(swgoh_app, 'fetch_player_data',
+                        lambda ally_code, allow_demo=True, progress=None, stream_roster=False: make_player(ally_code, unit_count=12))
+    monkeypatch.setattr(swgoh_app, 'JOB_QUEUE', swgoh_app.JobQueue(workers=1))
+
+    response = client.post('/api/load_player_data', json={'ally_code': '123-456-789'})
+    assert response.status_code == 202
+    job_id = response.get_json()['job_id']
+
+    wait_job(swgoh_app.JOB_QUEUE, job_id)
+    job = client.get(f'/api/jobs/{job_id}').get_json()['job']
+
+    assert job['status'] == 'done'
+    assert job['result']['player']['name'] == 'Player 123456789'
+    assert job['result']['stats']['total_characters'] == 12
+    assert len(job['result']['top_characters']) == 10
+    assert client.get('/api/jobs/inconnu').status_code == 404
+
+
+@pytest.mark.parametrize('workers, expected', [(None, None), (2, 2), ('3', 3), (10000, 4), (-5, 1)])
+def test_bulk_load_clamps_workers(monkeypatch, workers, expected):
+    monkeypatch.setattr(swgoh_app, 'INGEST_WORKERS', 4)
+    submitted = []
+    monkeypatch.setattr(swgoh_app.JOB_QUEUE, 'submit',
+                        lambda fn, *args, **kwargs: submitted.append(kwargs) or {'id': 'job'})
+    client = swgoh_app.app.test_client()
+
+    response = client.post('/api/bulk_load', json={'ally_codes': ['123456789'], 'workers': workers})
+
+    assert response.status_code == 202
+    assert submitted == [{'workers': expected}]
+
+
+@pytest.mark.parametrize('workers', ['beaucoup', [2], {'n': 2}])
+def test_bulk_load_rejects_invalid_workers(workers):
+    client = swgoh_app.app.test_client()
+
+    response = client.post('/api/bulk_load', json={'ally_codes': ['123456789'], 'workers': workers})
+
+    assert response.status_code == 400
@@ -0,0 +1,118 @@
+"""
+Tests des loadouts : liste paginée, contenu compressé et dédoublonné (base temporaire)
+"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as swgoh_app
+
+ALLY_CODE = '123456789'
+
+
+def team(size=3):
+    return {'type': 'gac', 'characters': [{'base_id': f'UNIT{i}', 'name': f'Unit {i}', 'gear_level': 13}
+                                          for i in range(size)]}
+
+
+def save(client, name, data, **extra):
+    response = client.post('/api/loadout/save', json={'ally_code': ALLY_CODE, 'name': name, 'data': data, **extra})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def count_rows(table):
+    conn = swgoh_app.get_db_connection()
+    count = conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+    conn.close()
+    return count
+
+
+def test_listing_is_metadata_only_and_detail_decodes(client):
+    loadout_id = save(client, 'GAC défense', team(5), description='Mur')['loadout_id']
+
+    listing = client.get(f'/api/loadouts/{ALLY_CODE}').get_json()
+    [summary] = listing['loadouts']
+    assert 'data' not in summary
+    assert summary['loadout_type'] == 'gac'
+    assert summary['character_count'] == 5
+    assert listing['total'] == 1
+    assert listing['next_cursor'] is None
+
+    detail = client.get(f'/api/loadout/{loadout_id}').get_json()['loadout']
+    assert detail['data'] == team(5)
+    assert detail['name'] == 'GAC défense'
+    assert client.get('/api/loadout/999').status_code == 404
+
+
+def test_identical_saves_deduplicated(client):
+    """Même sauvegarde -> même loadout ; même contenu sous un autre nom -> contenu partagé"""
+    first = save(client, 'Équipe', team())
+    again = save(client, 'Équipe', team())
+    renamed = save(client, 'Autre nom', team())
+
+    assert again['loadout_id'] == first['loadout_id']
+    assert again['duplicate'] and not first['duplicate']
+    assert renamed['loadout_id'] != first['loadout_id']
+    assert count_rows('loadouts') == 2
+    assert count_rows('loadout_payloads') == 1
+
+    conn = swgoh_app.get_db_connection()
+    payload = conn.execute('SELECT payload, size FROM loadout_payloads').fetchone()
+    conn.close()
+    assert len(payload['payload']) < payload['size']
+
+
+def test_pagination_with_cursor(client):
+    for i in range(7):
+        save(client, f'Loadout {i}', team(i))
+
+    seen = []
+    cursor = None
+    while True:
+        url = f'/api/loadouts/{ALLY_CODE}?limit=3' + (f'&cursor={cursor}' if cursor else '')
+        page = client.get(url).get_json()
+        seen.extend(loadout['name'] for loadout in page['loadouts'])
+        cursor = page['next_cursor']
+        if not cursor:
+            break
+
+    assert seen == [f'Loadout {i}' for i in reversed(range(7))]
+    assert client.get(f'/api/loadouts/{ALLY_CODE}?cursor=invalide').status_code == 400
+
+
+def test_delete_prunes_unshared_payload(client):
+    first = save(client, 'A', team())['loadout_id']
+    second = save(client, 'B', team())['loadout_id']
+
+    client.delete(f'/api/loadout/delete/{first}')
+    assert count_rows('loadout_payloads') == 1
+
+    client.delete(f'/api/loadout/delete/{second}')
+    assert count_rows('loadout_payloads') == 0
+
+
+def test_migration_moves_legacy_payloads(tmp_path, monkeypatch):
+    """Les loadouts enregistrés en JSON brut sont compressés par la migration 6"""
+    monkeypatch.setattr(swgoh_app, 'DATABASE_PATH', str(tmp_path / 'legacy.db'))
+    conn = swgoh_app.get_db_connection()
+    swgoh_app.migrate_db(conn, swgoh_app.SCHEMA_MIGRATIONS[:5])
+    conn.execute('INSERT INTO loadouts (ally_code, name, data, created_at) VALUES (?, ?, ?, ?)',
+                 (ALLY_CODE, 'Ancien', json.dumps(team(2)), '2024-01-01 10:00:00'))
+    conn.commit()
+    swgoh_app.migrate_db(conn)
+    row = conn.execute('SELECT id, data, loadout_type, character_count FROM loadouts').fetchone()
+    conn.close()
+
+    assert row['data'] is None
+    assert (row['loadout_type'], row['character_count']) == ('gac', 2)
+    client = swgoh_app.app.test_client()
+    detail = client.get(f"/api/loadout/{row['id']}").get_json()['loadout']
+    assert detail['data'] == team(2)
+
+    # Même encodage que l'application : un loadout identique réutilise le contenu migré
+    save(client, 'Nouveau', team(2))
+    assert count_rows('loadout_payloads') == 1
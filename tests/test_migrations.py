@@ -0,0 +1,109 @@
+"""
+Tests des migrations du schéma et des index (base temporaire)
+"""
+
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as swgoh_app
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    path = str(tmp_path / 'test.db')
+    monkeypatch.setattr(swgoh_app, 'DATABASE_PATH', path)
+    return path
+
+
+def index_names(conn):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+
+def query_plan(conn, query, params=()):
+    return ' | '.join(row[-1] for row in conn.execute(f'EXPLAIN QUERY PLAN {query}', params))
+
+
+def test_fresh_database_at_latest_version(db_path):
+    """Une base neuve reçoit toutes les migrations ; init_db est idempotent"""
+    swgoh_app.init_db()
+    swgoh_app.init_db()
+
+    conn = swgoh_app.get_db_connection()
+    try:
+        assert swgoh_app.schema_version(conn) == swgoh_app.SCHEMA_VERSION
+        assert {'idx_characters_ally_gp', 'idx_mods_ally_equipped_slot',
+                'idx_loadouts_ally_created'} <= index_names(conn)
+        assert swgoh_app.migrate_db(conn) == []
+    finally:
+        conn.close()
+
+
+def test_legacy_database_migrated_in_place(db_path):
+    """Une base créée avant les migrations (user_version 0) garde ses données"""
+    legacy = sqlite3.connect(db_path)
+    legacy.execute('CREATE TABLE player_info (ally_code TEXT PRIMARY KEY, name TEXT, level INTEGER, '
+                   'guild_name TEXT, galactic_power INTEGER, character_gp INTEGER, ship_gp INTEGER, '
+                   'last_updated TIMESTAMP)')
+    legacy.execute("INSERT INTO player_info (ally_code, name) VALUES ('123456789', 'Ancien')")
+    legacy.commit()
+    legacy.close()
+
+    swgoh_app.init_db()
+
+    conn = swgoh_app.get_db_connection()
+    try:
+        assert swgoh_app.schema_version(conn) == swgoh_app.SCHEMA_VERSION
+        assert conn.execute('SELECT name FROM player_info').fetchone()[0] == 'Ancien'
+        assert 'idx_player_info_updated' in index_names(conn)
+    finally:
+        conn.close()
+
+
+def test_failed_migration_rolled_back(db_path):
+    """Une migration en échec n'est pas appliquée à moitié"""
+    migrations = swgoh_app.SCHEMA_MIGRATIONS[:1] + [
+        (2, "Migration cassée", [
+            'CREATE INDEX idx_partial ON characters (ally_code)',
+            'CREATE INDEX idx_broken ON missing_table (id)',
+        ]),
+    ]
+    conn = swgoh_app.get_db_connection()
+    try:
+        with pytest.raises(sqlite3.OperationalError):
+            swgoh_app.migrate_db(conn, migrations)
+
+        assert swgoh_app.schema_version(conn) == 1
+        assert 'idx_partial' not in index_names(conn)
+    finally:
+        conn.close()
+
+
+def test_hot_queries_use_indexes(db_path):
+    """Les requêtes des endpoints passent par les index (pas de scan ni de tri)"""
+    swgoh_app.init_db()
+    conn = swgoh_app.get_db_connection()
+    try:
+        top = query_plan(conn, 'SELECT name, galactic_power FROM characters WHERE ally_code = ? '
+                               'ORDER BY galactic_power DESC LIMIT 10', ('1',))
+        assert 'COVERING INDEX idx_characters_ally_gp' in top
+        assert 'TEMP B-TREE' not in top
+
+        relics = query_plan(conn, 'SELECT COUNT(*) FROM characters WHERE ally_code = ? AND relic_tier >= 5', ('1',))
+        assert 'COVERING INDEX idx_characters_ally_relic' in relics
+
+        unequipped = query_plan(conn, 'SELECT COUNT(*) FROM mods WHERE ally_code = ? AND is_equipped = 0', ('1',))
+        assert 'COVERING INDEX idx_mods_ally_equipped_slot' in unequipped
+
+        loadouts = query_plan(conn, 'SELECT * FROM loadouts WHERE ally_code = ? ORDER BY created_at DESC', ('1',))
+        assert 'idx_loadouts_ally_created' in loadouts
+        assert 'TEMP B-TREE' not in loadouts
+
+        for plan in (top, relics, unequipped, loadouts):
+            assert 'SCAN' not in plan.replace('SCAN CONSTANT', '')
+    finally:
+        conn.close()
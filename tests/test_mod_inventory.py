@@ -0,0 +1,118 @@
+"""
+Tests de l'inventaire des mods en mémoire utilisé par l'optimiseur (base temporaire)
+"""
+
+import copy
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as swgoh_app
+from conftest import make_player
+
+ALLY_CODE = '123456789'
+
+
+def six_mods(i):
+    """Six mods par personnage, sets, raretés et vitesses variés"""
+    return {
+        'relic_tier': i % 5,
+        'mods': [{'id': f'mod-{i}-{slot}', 'slot': slot, 'set': (i + slot) % 8 + 1, 'level': 15, 'tier': 5,
+                  'rarity': 5 + slot % 2, 'primary_stat': {'name': 'Offense %', 'value': 5.88},
+                  'secondary_stats': [{'name': 'Speed', 'value': (i * 7 + slot * 3) % 20},
+                                      {'name': 'Health', 'value': 300 + i}]}
+                 for slot in range(1, 7)]
+    }
+
+
+@pytest.fixture
+def temp_db(temp_db, monkeypatch):
+    monkeypatch.setattr(swgoh_app, '_MOD_INVENTORIES', swgoh_app.OrderedDict())
+    swgoh_app.save_player_data(ALLY_CODE, make_player(ALLY_CODE, unit_count=12, unit=six_mods))
+    conn = swgoh_app.get_db_connection()
+    free = [(None, {'id': f'free-{i}', 'slot': i % 6 + 1,
+                    'secondary_stats': [{'name': 'Speed', 'value': 10 + i}]}, False) for i in range(12)]
+    swgoh_app.save_mods(conn.cursor(), ALLY_CODE, free)
+    swgoh_app.bump_mod_inventory_version(conn.cursor(), ALLY_CODE)
+    conn.commit()
+    conn.close()
+    return temp_db
+
+
+def reference_best_mods(character_id):
+    """Sélection faite auparavant : requête SQL, un dict par mod, tri par slot à la vitesse"""
+    conn = swgoh_app.get_db_connection()
+    mods = [dict(row) for row in conn.execute(
+        'SELECT * FROM mods WHERE ally_code = ? AND (is_equipped = 0 OR character_id = ?) ORDER BY rowid',
+        (ALLY_CODE, character_id))]
+    conn.close()
+    best = []
+    for slot in range(1, 7):
+        slot_mods = [mod for mod in mods if mod['slot'] == slot]
+        if slot_mods:
+            best.append(sorted(slot_mods, key=lambda m: m.get('speed', 0), reverse=True)[0])
+    return best
+
+
+def test_recommendations_match_row_by_row_selection(temp_db):
+    for i in range(12):
+        result = swgoh_app.optimize_mods_for_character(ALLY_CODE, f'UNIT{i}', {'speed': 1.0, 'health': 0.3})
+        assert result['recommended_mods'] == reference_best_mods(f'UNIT{i}')
+
+    assert swgoh_app.optimize_mods_for_character(ALLY_CODE, 'MISSING', {'speed': 1.0}) is None
+
+
+def test_vectorized_candidates_and_scores(temp_db):
+    conn = swgoh_app.get_db_connection()
+    inventory = swgoh_app.ModInventory.load(conn.cursor(), ALLY_CODE)
+    conn.close()
+
+    assert len(inventory) == 12 * 6 + 12
+    assert inventory.stats.shape == (84, len(swgoh_app.MOD_SECONDARY_COLUMNS))
+    assert int(inventory.candidates('UNIT3').sum()) == 6 + 12
+    assert int(inventory.candidates('UNKNOWN').sum()) == 12
+
+    health = swgoh_app.MOD_SECONDARY_COLUMNS.index('health')
+    scores = inventory.scores({'speed': 2.0, 'health': 0.5})
+    assert scores.tolist() == (inventory.stats[:, 0] * 2.0 + inventory.stats[:, health] * 0.5).tolist()
+
+    best = inventory.best_per_slot('UNIT3', {'health': 1.0})
+    assert [inventory.mod(index)['id'] for index in best] == [f'mod-3-{slot}' for slot in range(1, 7)]
+
+
+def test_inventory_rebuilt_once_per_version(temp_db):
+    """Réutilisé tant que les mods ne changent pas, reconstruit après un rechargement qui les modifie"""
+    first = swgoh_app.optimize_mods_for_character(ALLY_CODE, 'UNIT0', {'speed': 1.0})
+    inventory = swgoh_app._MOD_INVENTORIES[ALLY_CODE]
+    swgoh_app.optimize_mods_for_character(ALLY_CODE, 'UNIT1', {'speed': 1.0})
+    assert swgoh_app._MOD_INVENTORIES[ALLY_CODE] is inventory
+
+    player = make_player(ALLY_CODE, unit_count=12, unit=six_mods)
+    swgoh_app.save_player_data(ALLY_CODE, copy.deepcopy(player))  # supprime les mods libres
+    second = swgoh_app.optimize_mods_for_character(ALLY_CODE, 'UNIT0', {'speed': 1.0})
+    assert second['inventory_version'] == first['inventory_version'] + 1
+    assert len(swgoh_app._MOD_INVENTORIES[ALLY_CODE]) == 12 * 6
+
+    inventory = swgoh_app._MOD_INVENTORIES[ALLY_CODE]
+    swgoh_app.save_player_data(ALLY_CODE, copy.deepcopy(player))  # mods inchangés
+    assert swgoh_app.optimize_mods_for_character(ALLY_CODE, 'UNIT0', {'speed': 1.0}) == second
+    assert swgoh_app._MOD_INVENTORIES[ALLY_CODE] is inventory
+
+    player['data']['roster'][0]['mods'][0]['secondary_stats'][0]['value'] = 25
+    swgoh_app.save_player_data(ALLY_CODE, player)
+    result = swgoh_app.optimize_mods_for_character(ALLY_CODE, 'UNIT0', {'speed': 1.0})
+    assert result['inventory_version'] == second['inventory_version'] + 1
+    assert result['recommended_mods'][0]['speed'] == 25
+
+
+def test_cache_is_bounded(temp_db, monkeypatch):
+    monkeypatch.setattr(swgoh_app, 'MOD_INVENTORY_CACHE_SIZE', 2)
+    conn = swgoh_app.get_db_connection()
+    for ally_code in ('1', '2', '3'):
+        swgoh_app.get_mod_inventory(conn.cursor(), ally_code)
+    conn.close()
+
+    assert list(swgoh_app._MOD_INVENTORIES) == ['2', '3']
@@ -0,0 +1,199 @@
+"""
+Tests du parsing des pages SWGOH.gg sur le corpus de fixtures
+"""
+
+import glob
+import json
+import os
+import sys
+from concurrent.futures import Future
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+from lxml import etree
+
+import app as swgoh_app
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'swgoh_gg')
+GOLDEN = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'golden')
+
+
+def read_fixture(*parts):
+    with open(os.path.join(FIXTURES, *parts), encoding='utf-8') as f:
+        return f.read()
+
+
+def full_tree_roster(html):
+    """Référence : arbre html.parser complet, comme avant lxml + SoupStrainer"""
+    soup = BeautifulSoup(html, 'html.parser')
+    cards = (swgoh_app.parse_unit_card(card) for card in soup.find_all('div', class_='unit-card'))
+    return [card for card in cards if card]
+
+
+def test_strained_roster_matches_full_tree():
+    """L'arbre restreint aux unit-cards donne le même roster que l'arbre complet"""
+    html = read_fixture('p', '123456789', 'characters', 'index.html')
+
+    roster = swgoh_app.parse_character_roster(html)
+
+    assert roster == full_tree_roster(html)
+    assert len(roster) == 11
+
+
+def test_strained_soup_keeps_only_unit_cards():
+    html = read_fixture('p', '123456789', 'characters', 'index.html')
+
+    soup = swgoh_app.make_soup(html, swgoh_app.ROSTER_STRAINER)
+
+    assert soup.find('nav') is None
+    assert soup.find('footer') is None
+    assert len(soup.find_all('div', class_='unit-card')) == 13
+
+
+def test_profile_page():
+    profile = swgoh_app.parse_profile_page(read_fixture('p', '123456789', 'index.html'))
+
+    assert profile == {
+        'name': 'Fixture Player',
+        'guild_name': 'Fixture Guild',
+        'galactic_power': 6234567,
+        'character_galactic_power': 4123456,
+        'ship_galactic_power': 2111111
+    }
+
+
+def test_parser_fallback(monkeypatch):
+    """Sans le parseur configuré, on retombe sur html.parser"""
+    monkeypatch.setattr(swgoh_app, 'HTML_PARSER', 'parseur-inexistant')
+    html = read_fixture('p', '123456789', 'characters', 'index.html')
+
+    assert swgoh_app.parse_character_roster(html) == full_tree_roster(html)
+
+
+def test_roster_matches_golden_outputs():
+    """Parité de l'extracteur une passe avec les sorties de référence du corpus"""
+    golden_files = sorted(glob.glob(os.path.join(GOLDEN, '*_characters.json')))
+    assert golden_files
+
+    for golden_file in golden_files:
+        ally_code = os.path.basename(golden_file).split('_')[0]
+        with open(golden_file, encoding='utf-8') as f:
+            expected = json.load(f)
+
+        roster = swgoh_app.parse_character_roster(read_fixture('p', ally_code, 'characters', 'index.html'))
+
+        assert roster == expected, ally_code
+
+
+def test_scan_unit_card_single_pass():
+    """Le premier <text> de chaque svg est retrouvé, y compris dans un svg imbriqué"""
+    card = BeautifulSoup(
+        '<div class="unit-card"><svg></svg><svg><g><svg><text>1</text></svg></g><text>2</text></svg>'
+        '<text>3</text><img class="character-portrait__img" src="tex.charui_vader.png">'
+        '<div>Darth | Vader</div></div>', 'html.parser').div
+
+    lines, svg_texts, portrait_src = swgoh_app._scan_unit_card(card)
+
+    assert lines == ['1', '2', '3', 'Darth', 'Vader']
+    assert svg_texts == ['1', '1']
+    assert portrait_src == 'tex.charui_vader.png'
+
+
+def test_scan_unit_element_matches_soup():
+    """Le parcours lxml (text/tail) donne les mêmes lignes que BeautifulSoup"""
+    html = ('<div class="unit-card">avant<svg><text>4</text></svg>après<!-- commentaire -->suite'
+            '<script>var x = "Darth Vader";</script><b>Grand | Admiral</b>fin'
+            '<img class="character-portrait__img" src="tex.charui_thrawn.png"></div>')
+    element = etree.fromstring(html, etree.HTMLParser()).find('.//div')
+
+    assert swgoh_app._scan_unit_element(element) == swgoh_app._scan_unit_card(BeautifulSoup(html, 'lxml').div)
+
+
+def test_iter_roster_yields_before_page_is_read():
+    """Le premier personnage sort avant que tous les morceaux aient été lus"""
+    html = read_fixture('p', '123456789', 'characters', 'index.html').encode('utf-8')
+    chunk_size = 512
+    consumed = []
+
+    def chunks():
+        for offset in range(0, len(html), chunk_size):
+            consumed.append(offset)
+            yield html[offset:offset + chunk_size]
+
+    roster = swgoh_app.iter_character_roster(chunks())
+    first = next(roster)
+
+    assert len(consumed) < len(html) / chunk_size
+    assert [first] + list(roster) == swgoh_app.parse_character_roster(html.decode('utf-8'))
+
+
+def test_iter_roster_golden_outputs_by_chunks(monkeypatch):
+    """Parité avec les sorties de référence, même avec de tout petits morceaux"""
+    monkeypatch.setattr(swgoh_app, 'ROSTER_CHUNK_SIZE', 37)
+
+    for golden_file in sorted(glob.glob(os.path.join(GOLDEN, '*_characters.json'))):
+        ally_code = os.path.basename(golden_file).split('_')[0]
+        with open(golden_file, encoding='utf-8') as f:
+            expected = json.load(f)
+
+        html = read_fixture('p', ally_code, 'characters', 'index.html')
+
+        assert list(swgoh_app.iter_character_roster(html)) == expected, ally_code
+
+
+def test_parse_pool_matches_inline_parsing(monkeypatch):
+    """Le pool de processus renvoie les mêmes personnages que le parsing local"""
+    html = read_fixture('p', '123456789', 'characters', 'index.html')
+    monkeypatch.setattr(swgoh_app, 'PARSE_WORKERS', 2)
+    monkeypatch.setattr(swgoh_app, 'PARSE_POOL_MIN_BYTES', 0)
+
+    try:
+        roster = swgoh_app.parse_roster_page(html, timeout=60)
+        assert swgoh_app._PARSE_POOL is not None
+    finally:
+        swgoh_app.shutdown_parse_pool()
+
+    assert roster == swgoh_app.parse_character_roster(html)
+
+
+class PendingPool:
+    """Pool saturé : les pages soumises restent en file d'attente"""
+
+    def submit(self, fn, *args):
+        self.future = Future()
+        return self.future
+
+
+def test_parse_timeout_cancels_queued_page(monkeypatch):
+    """Une page encore en file à l'échéance est annulée au lieu d'être parsée pour rien"""
+    pool = PendingPool()
+    monkeypatch.setattr(swgoh_app, 'PARSE_POOL_MIN_BYTES', 0)
+    monkeypatch.setattr(swgoh_app, 'get_parse_pool', lambda: pool)
+
+    with pytest.raises(TimeoutError):
+        swgoh_app.parse_roster_page(read_fixture('p', '123456789', 'characters', 'index.html'), timeout=0.01)
+
+    assert pool.future.cancelled()
+
+
+def test_roster_records_are_compact_tuples():
+    html = read_fixture('p', '123456789', 'characters', 'index.html')
+
+    records = swgoh_app.parse_roster_records(html.encode('utf-8'))
+
+    assert all(isinstance(record, tuple) for record in records)
+    assert swgoh_app.records_to_roster(records) == swgoh_app.parse_character_roster(html)
+
+
+def test_small_pages_parsed_inline(monkeypatch):
+    """Sous le seuil de taille, aucun processus n'est lancé"""
+    monkeypatch.setattr(swgoh_app, 'PARSE_WORKERS', 2)
+    monkeypatch.setattr(swgoh_app, 'PARSE_POOL_MIN_BYTES', 10 ** 9)
+
+    roster = swgoh_app.parse_roster_page(read_fixture('p', '123456789', 'characters', 'index.html'))
+
+    assert len(roster) == 11
+    assert swgoh_app._PARSE_POOL is None
@@ -0,0 +1,210 @@
+"""
+Tests de la limitation de débit, des reprises et du disjoncteur (sans réseau)
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as swgoh_app
+from conftest import make_player
+from test_fetch import PROFILE_HTML, FakeResponse
+
+
+class ScriptedSession:
+    """Session factice qui renvoie une suite de réponses prédéfinies"""
+
+    responses = []
+    calls = 0
+
+    def get(self, url, timeout=None, headers=None):
+        ScriptedSession.calls += 1
+        if ScriptedSession.responses:
+            return ScriptedSession.responses.pop(0)
+        return FakeResponse(429, 'Too Many Requests', headers={'Retry-After': '0'})
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def scripted(monkeypatch):
+    ScriptedSession.responses = []
+    ScriptedSession.calls = 0
+    monkeypatch.setattr(swgoh_app, 'SCRAPER_POOL', swgoh_app.ScraperPool(size=2, factory=ScriptedSession))
+    monkeypatch.setattr(swgoh_app, 'RATE_LIMITER', swgoh_app.TokenBucket(rate=1000, capacity=1000))
+    monkeypatch.setattr(swgoh_app, 'SCRAPE_BREAKER', swgoh_app.CircuitBreaker(threshold=10))
+    monkeypatch.setattr(swgoh_app, 'SCRAPE_BACKOFF_BASE', 0.01)
+    return ScriptedSession
+
+
+def test_token_bucket_paces_requests():
+    """Au-delà de la réserve, les jetons arrivent au rythme configuré"""
+    bucket = swgoh_app.TokenBucket(rate=20, capacity=2)
+    start = time.monotonic()
+    for _ in range(4):
+        bucket.acquire()
+    assert time.monotonic() - start >= 0.09
+
+    with pytest.raises(TimeoutError):
+        bucket.acquire(deadline=time.monotonic() + 0.001)
+
+
+def test_retry_after_parsing():
+    assert swgoh_app._parse_retry_after('12') == 12.0
+    assert swgoh_app._parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
+    assert swgoh_app._parse_retry_after(None) is None
+    assert swgoh_app._parse_retry_after('n/a') is None
+
+
+def test_retries_until_success(scripted):
+    """Un 429 puis un 503 sont réessayés avant le succès"""
+    scripted.responses = [
+        FakeResponse(429, '', headers={'Retry-After': '0'}),
+        FakeResponse(503, ''),
+        FakeResponse(200, 'ok'),
+    ]
+    response = swgoh_app.scrape_get('https://swgoh.gg/p/1/', time.monotonic() + 5)
+
+    assert response.text == 'ok'
+    assert scripted.calls == 3
+
+
+def test_persistent_throttle_raises(scripted):
+    """Après les reprises, un 429 persistant lève ThrottledError"""
+    with pytest.raises(swgoh_app.ThrottledError):
+        swgoh_app.scrape_get('https://swgoh.gg/p/1/', time.monotonic() + 5)
+    assert scripted.calls == swgoh_app.SCRAPE_MAX_RETRIES + 1
+
+
+def test_circuit_breaker_opens():
+    """Le circuit s'ouvre après le seuil puis laisse passer un essai"""
+    breaker = swgoh_app.CircuitBreaker(threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert breaker.state == 'half_open'
+    breaker.record_success()
+    assert breaker.state == 'closed'
+
+
+class ChallengeError(Exception):
+    """Erreur non réseau levée par la session (ex: challenge Cloudflare)"""
+
+
+class FailingSession(ScriptedSession):
+    def get(self, url, timeout=None, headers=None):
+        raise ChallengeError('Cloudflare 1020')
+
+
+def test_half_open_probe_failure_reopens(scripted, monkeypatch):
+    """Une erreur quelconque pendant l'essai semi-ouvert rouvre le circuit au lieu de le bloquer"""
+    breaker = swgoh_app.CircuitBreaker(threshold=1, reset_timeout=0.01)
+    monkeypatch.setattr(swgoh_app, 'SCRAPE_BREAKER', breaker)
+    monkeypatch.setattr(swgoh_app, 'SCRAPER_POOL', swgoh_app.ScraperPool(size=1, factory=FailingSession))
+    breaker.record_failure()
+    time.sleep(0.02)
+
+    with pytest.raises(ChallengeError):
+        swgoh_app.scrape_get('https://swgoh.gg/p/1/', time.monotonic() + 5)
+    assert breaker.state == 'open'
+    assert swgoh_app.SCRAPER_POOL.stats['discarded'] == 1
+
+    time.sleep(0.02)
+    monkeypatch.setattr(swgoh_app, 'SCRAPER_POOL', swgoh_app.ScraperPool(size=1, factory=ScriptedSession))
+    scripted.responses = [FakeResponse(200, 'ok')]
+    assert swgoh_app.scrape_get('https://swgoh.gg/p/1/', time.monotonic() + 5).text == 'ok'
+    assert breaker.state == 'closed'
+
+
+def test_busy_pool_is_not_a_swgoh_failure(scripted, monkeypatch):
+    """Aucune session libre : ThrottledError sans échec compté ni essai semi-ouvert perdu"""
+    breaker = swgoh_app.CircuitBreaker(threshold=1, reset_timeout=0.01)
+    monkeypatch.setattr(swgoh_app, 'SCRAPE_BREAKER', breaker)
+    busy = swgoh_app.SCRAPER_POOL.acquire()
+    swgoh_app.SCRAPER_POOL.acquire()
+
+    with pytest.raises(swgoh_app.ThrottledError):
+        swgoh_app.scrape_get('https://swgoh.gg/p/1/', time.monotonic() + 0.05)
+    assert (breaker.state, breaker.failures) == ('closed', 0)
+
+    breaker.record_failure()
+    time.sleep(0.02)
+    with pytest.raises(swgoh_app.ThrottledError):
+        swgoh_app.scrape_get('https://swgoh.gg/p/1/', time.monotonic() + 0.05)
+    assert breaker.state == 'open'
+    assert breaker.allow()
+
+    breaker.cancel_probe()
+    swgoh_app.SCRAPER_POOL.release(busy)
+    scripted.responses = [FakeResponse(200, 'ok')]
+    assert swgoh_app.scrape_get('https://swgoh.gg/p/1/', time.monotonic() + 5).text == 'ok'
+    assert breaker.state == 'closed'
+
+
+class SlowStartSession(ScriptedSession):
+    """Session dont la création (challenge Cloudflare) dépasse l'échéance"""
+
+    def __init__(self):
+        time.sleep(0.05)
+
+
+def test_deadline_before_request_is_not_a_swgoh_failure(scripted, monkeypatch):
+    """Échéance passée avant l'envoi : la session saine est rendue, aucun échec compté"""
+    pool = swgoh_app.ScraperPool(size=2, factory=SlowStartSession)
+    monkeypatch.setattr(swgoh_app, 'SCRAPER_POOL', pool)
+
+    with pytest.raises(swgoh_app.ThrottledError):
+        swgoh_app.scrape_get('https://swgoh.gg/p/1/', time.monotonic() + 0.02)
+
+    assert (swgoh_app.SCRAPE_BREAKER.state, swgoh_app.SCRAPE_BREAKER.failures) == ('closed', 0)
+    assert scripted.calls == 0
+    assert len(pool._idle) == 1
+
+
+def test_token_bucket_rejects_non_positive_rate():
+    for rate in (0, -1):
+        with pytest.raises(ValueError):
+            swgoh_app.TokenBucket(rate=rate)
+
+
+def test_throttled_load_keeps_last_good_data(scripted, temp_db):
+    """Un chargement limité conserve les données existantes au lieu de la démo"""
+    assert swgoh_app.save_player_data('123456789', make_player('123456789', unit_count=8))
+
+    result = swgoh_app.run_player_load(lambda phase, percent=None: None, '123456789')
+
+    assert result['stale'] is True
+    assert result['player']['name'] == 'Player 123456789'
+    assert result['stats']['total_characters'] == 8
+
+
+class RosterDownSession(ScriptedSession):
+    """Profil disponible, page roster en 502"""
+
+    def get(self, url, timeout=None, headers=None):
+        ScriptedSession.calls += 1
+        if url.endswith('/characters/'):
+            return FakeResponse(502, 'Bad Gateway')
+        return FakeResponse(200, PROFILE_HTML)
+
+
+def test_failed_roster_keeps_last_good_data(scripted, temp_db, monkeypatch):
+    """Un roster en erreur fait échouer le chargement au lieu de vider le roster enregistré"""
+    monkeypatch.setattr(swgoh_app, 'SCRAPER_POOL', swgoh_app.ScraperPool(size=2, factory=RosterDownSession))
+    monkeypatch.setattr(swgoh_app, 'PLAYER_JSON_ENABLED', False)
+    assert swgoh_app.save_player_data('123456789', make_player('123456789', unit_count=5))
+
+    assert swgoh_app.fetch_player_data('123456789', allow_demo=False) is None
+    result = swgoh_app.run_player_load(lambda phase, percent=None: None, '123456789')
+
+    assert result['stale'] is True
+    assert result['stats']['total_characters'] == 5
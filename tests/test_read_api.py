@@ -0,0 +1,79 @@
+"""
+Tests des endpoints de lecture en flux (personnages, mods, comparaison GAC)
+"""
+
+import os
+import statistics
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as swgoh_app
+from conftest import make_player
+
+
+def speed_mods(owner):
+    """Unités de gear et GP variés, deux mods de vitesse chacune (ids préfixés par `owner`)"""
+    return lambda i: {
+        'gear_level': 10 + i % 4, 'relic_tier': i % 8, 'galactic_power': 20000 + (i * 7919) % 5000,
+        'mods': [{'id': f'{owner}-mod-{i}-{slot}', 'slot': slot,
+                  'secondary_stats': [{'name': 'Speed', 'value': slot}]} for slot in (1, 2)]
+    }
+
+
+@pytest.fixture
+def client(client, monkeypatch):
+    monkeypatch.setattr(swgoh_app, 'JSON_STREAM_BATCH', 7)
+    swgoh_app.save_player_data('111111111', make_player('111111111', unit_count=25, unit=speed_mods('one')))
+    swgoh_app.save_player_data('222222222', make_player('222222222', unit_count=6, unit=speed_mods('two')))
+    conn = swgoh_app.get_db_connection()
+    mods = [(None, {'id': f'free-{i}', 'slot': i % 6 + 1}, False) for i in range(9)]
+    swgoh_app.save_mods(conn.cursor(), '111111111', mods)
+    conn.commit()
+    conn.close()
+    return client
+
+
+def test_characters_streamed_in_gp_order(client):
+    response = client.get('/api/characters/111111111')
+
+    assert response.is_streamed
+    data = response.get_json()
+    assert data['success']
+    gps = [character['galactic_power'] for character in data['characters']]
+    assert len(gps) == 25
+    assert gps == sorted(gps, reverse=True)
+    assert data['characters'][0]['ally_code'] == '111111111'
+
+    assert client.get('/api/characters/999999999').get_json() == {'success': True, 'characters': []}
+
+
+@pytest.mark.parametrize('equipped, total, unequipped', [('all', 59, 9), ('yes', 50, 0), ('no', 9, 9)])
+def test_mods_filtered_and_counted_in_sql(client, equipped, total, unequipped):
+    data = client.get(f'/api/mods/111111111?equipped={equipped}').get_json()
+
+    assert data['total'] == len(data['mods']) == total
+    assert data['unequipped'] == unequipped
+    if equipped == 'no':
+        assert all(mod['character_id'] is None for mod in data['mods'])
+
+
+def test_compare_matches_reference_stats(client):
+    """Les statistiques SQL reproduisent celles calculées auparavant sur toutes les lignes (pandas)"""
+    response = client.post('/api/compare', json={'ally_code_1': '111111111', 'ally_code_2': '222222222'})
+    stats = response.get_json()['comparison']['stats']
+
+    conn = swgoh_app.get_db_connection()
+    for key, ally_code in (('player1', '111111111'), ('player2', '222222222')):
+        rows = conn.execute('SELECT * FROM characters WHERE ally_code = ?', (ally_code,)).fetchall()
+        gps = sorted((row['galactic_power'] for row in rows), reverse=True)
+        assert stats[key] == pytest.approx({
+            'total_characters': len(rows),
+            'avg_gear': statistics.mean(row['gear_level'] for row in rows),
+            'avg_relic': statistics.mean(row['relic_tier'] for row in rows),
+            'top_gp': sum(gps[:10]) if len(rows) >= 10 else 0
+        })
+    conn.close()
+    assert stats['player2']['top_gp'] == 0
@@ -0,0 +1,83 @@
+"""
+Tests du pool de sessions cloudscraper (sans réseau)
+"""
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as swgoh_app
+
+
+class FakeSession:
+    """Session factice : compte les fermetures"""
+
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def make_pool(**kwargs):
+    return swgoh_app.ScraperPool(factory=FakeSession, **kwargs)
+
+
+def test_session_reused():
+    """Une session rendue est réutilisée au prochain emprunt"""
+    pool = make_pool(size=2)
+    with pool.session() as first:
+        pass
+    with pool.session() as second:
+        pass
+
+    assert first is second
+    assert pool.stats['created'] == 1
+    assert pool.stats['reused'] == 1
+
+
+def test_pool_size_is_bounded():
+    """Le pool ne crée jamais plus de `size` sessions"""
+    pool = make_pool(size=1)
+    session = pool.acquire()
+
+    with pytest.raises(TimeoutError):
+        pool.acquire(timeout=0.05)
+
+    # Une libération depuis un autre thread débloque l'attente
+    threading.Timer(0.05, pool.release, args=(session,)).start()
+    assert pool.acquire(timeout=2) is session
+    assert pool.stats['created'] == 1
+
+
+def test_idle_sessions_evicted():
+    """Les sessions inactives trop longtemps sont fermées"""
+    pool = make_pool(size=2, idle_timeout=0.01)
+    with pool.session() as old:
+        pass
+    time.sleep(0.05)
+
+    with pool.session() as new:
+        pass
+
+    assert old.closed
+    assert new is not old
+    assert pool.stats['evicted'] == 1
+
+
+def test_session_discarded_on_error():
+    """Une session qui lève une exception n'est pas remise dans le pool"""
+    pool = make_pool(size=1)
+    with pytest.raises(RuntimeError):
+        with pool.session() as broken:
+            raise RuntimeError("connexion coupée")
+
+    assert broken.closed
+    with pool.session() as fresh:
+        assert fresh is not broken
+    assert pool.stats['discarded'] == 1
@@ -0,0 +1,103 @@
+"""
+Tests du résumé du dashboard maintenu à l'écriture (base temporaire)
+"""
+
+import copy
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as swgoh_app
+from conftest import make_player
+
+
+def summary_unit(i):
+    """Reliques 0 à 8, un mod pour un personnage sur deux"""
+    return {'gear_level': 13, 'relic_tier': i % 9, 'galactic_power': 20000 + i * 100,
+            'mods': [{'id': f'mod-{i}', 'slot': 1}] if i % 2 else []}
+
+
+def live_payload(ally_code):
+    """Dashboard recalculé directement depuis characters et mods"""
+    conn = swgoh_app.get_db_connection()
+    c = conn.cursor()
+    chars = c.execute('SELECT COUNT(*) FROM characters WHERE ally_code = ?', (ally_code,)).fetchone()[0]
+    r5 = c.execute('SELECT COUNT(*) FROM characters WHERE ally_code = ? AND relic_tier >= 5', (ally_code,)).fetchone()[0]
+    mods = c.execute('SELECT COUNT(*) FROM mods WHERE ally_code = ?', (ally_code,)).fetchone()[0]
+    top = [dict(row) for row in c.execute('SELECT name, galactic_power as gp FROM characters WHERE ally_code = ? '
+                                          'ORDER BY galactic_power DESC LIMIT 10', (ally_code,))]
+    conn.close()
+    return chars, r5, mods, top
+
+
+def test_summary_matches_live_queries(temp_db):
+    """Le résumé suit les synchronisations successives"""
+    player = make_player(unit_count=15, unit=summary_unit)
+    swgoh_app.save_player_data('123456789', copy.deepcopy(player))
+    player['data']['roster'][0].update(relic_tier=8, galactic_power=99999)
+    del player['data']['roster'][-1]
+    swgoh_app.save_player_data('123456789', player)
+
+    payload = swgoh_app.build_dashboard_payload('123456789')
+    chars, r5, mods, top = live_payload('123456789')
+
+    assert payload['player'] == {'name': 'Player 123456789', 'level': 85, 'guild_name': 'Test Guild'}
+    assert payload['stats']['total_gp'] == 1000000
+    assert payload['stats']['total_characters'] == chars == 14
+    assert payload['stats']['relics_r5_plus'] == r5
+    assert payload['stats']['total_mods'] == mods == 7
+    assert payload['top_characters'] == top
+    assert payload['top_characters'][0] == {'name': 'Unit 0', 'gp': 99999}
+    assert sum(payload['stats']['relic_distribution'].values()) == 14
+    assert payload['stats']['relic_distribution']['8'] == 2
+
+
+def test_dashboard_is_a_single_lookup(temp_db):
+    """build_dashboard_payload ne fait qu'une requête, par clé primaire"""
+    swgoh_app.save_player_data('123456789', make_player(unit_count=15, unit=summary_unit))
+    conn = swgoh_app.get_db_connection()
+    statements = []
+    conn.set_trace_callback(statements.append)
+    conn.close()
+
+    try:
+        assert swgoh_app.build_dashboard_payload('123456789')
+        assert swgoh_app.build_dashboard_payload('987654321') is None
+    finally:
+        conn.set_trace_callback(None)
+
+    selects = [sql for sql in statements if sql.lstrip().upper().startswith('SELECT')]
+    assert len(selects) == 2
+    assert all('player_summary' in sql for sql in selects)
+
+
+def test_check_loaded_data_returns_latest_player(client):
+    swgoh_app.save_player_data('111111111', make_player('111111111', unit_count=15))
+    swgoh_app.save_player_data('222222222', make_player('222222222', unit_count=3))
+
+    data = client.get('/api/check_loaded_data').get_json()
+
+    assert data['has_data']
+    assert data['player']['name'] == 'Player 222222222'
+    assert data['stats']['total_characters'] == 3
+
+
+def test_migration_backfills_existing_players(temp_db):
+    """Les joueurs enregistrés avant le résumé en reçoivent un à la migration"""
+    player = make_player(unit_count=15, unit=summary_unit)
+    player['data']['roster'][3]['relic_tier'] = None
+    swgoh_app.save_player_data('123456789', player)
+    swgoh_app.save_player_data('222222222', make_player('222222222', unit_count=0))
+    expected = {ally_code: swgoh_app.build_dashboard_payload(ally_code) for ally_code in ('123456789', '222222222')}
+    conn = swgoh_app.get_db_connection()
+    conn.execute('DROP TABLE player_summary')
+    conn.execute('PRAGMA user_version = 4')
+    conn.commit()
+
+    swgoh_app.migrate_db(conn)
+    conn.close()
+
+    # Le backfill figé de la migration donne le même résumé que celui maintenu à l'écriture
+    assert {ally_code: swgoh_app.build_dashboard_payload(ally_code) for ally_code in expected} == expected
+    assert expected['123456789']['stats']['total_characters'] == 15